@@ -0,0 +1,219 @@
+"""
+Read replicas: a database router and the middleware that drives it.
+
+Only reads made while handling a request can go to a replica. Management
+commands, task workers and the shell always use ``default``, the primary,
+so code that reads what it has just written outside a request never sees
+replication lag. Within a request, reads go to a randomly chosen healthy
+replica unless the request is pinned to the primary, which happens when:
+
+- the method is not GET, HEAD or OPTIONS;
+- the request has written anything (reads after the first write follow it);
+- a transaction is open on the primary;
+- the client wrote something less than ``REPLICA_PIN_SECONDS`` ago
+  (read-your-writes). Browsers carry this in a cookie; API clients
+  authenticating with a header are remembered in the cache by header.
+
+Sessions and the task queue never leave the primary.
+
+A replica is checked at most every ``REPLICA_HEALTH_INTERVAL`` seconds,
+by the request that needs it. A replica that cannot be queried, has no
+schema, or (on PostgreSQL) lags more than ``REPLICA_MAX_LAG`` seconds
+behind is left out until its next check. With no healthy replica, reads
+go to the primary.
+
+Locally two SQLite files can stand in for a primary and its replica
+(``DJANGO_SQLITE_REPLICAS``, see backend/settings.py).
+``manage.py sync_replicas`` plays the part of replication by copying the
+primary into them.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, DEFAULT_DB_ALIAS, connections
+
+from metrics.registry import register_collector
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_ONLY_APPS = ('sessions', 'taskqueue')
+PIN_COOKIE = 'primary_until'
+PIN_KEY_PREFIX = 'primary-until:'
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+class RequestState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('replica_request_state', default=None)
+
+
+class ReplicaHealth:
+    """When each replica was last checked and whether it passed."""
+
+    def __init__(self):
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def healthy(self, aliases):
+        interval = getattr(settings, 'REPLICA_HEALTH_INTERVAL', 10)
+        now = time.monotonic()
+        healthy = []
+        for alias in aliases:
+            checked = self._checked.get(alias)
+            if checked is None or now - checked[0] > interval:
+                # One thread checks; the others use the last result meanwhile
+                if self._lock.acquire(blocking=checked is None):
+                    try:
+                        checked = self._checked[alias] = (now, self.check(alias))
+                    finally:
+                        self._lock.release()
+            if checked is not None and checked[1]:
+                healthy.append(alias)
+        return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+                lag = self.lag(connection, cursor)
+        except DatabaseError as exc:
+            logger.warning("Replica %s is unavailable: %s", alias, exc)
+            connection.close()
+            return False
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG', 30)
+        if lag is not None and lag > max_lag:
+            logger.warning("Replica %s is %.1fs behind the primary", alias, lag)
+            return False
+        return True
+
+    def lag(self, connection, cursor):
+        """Seconds of replication lag, where the database can tell."""
+        if connection.vendor != 'postgresql':
+            return None
+        cursor.execute("SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())")
+        lag = cursor.fetchone()[0]
+        return float(lag) if lag is not None else None
+
+    def status(self):
+        return {alias: checked[1] for alias, checked in self._checked.items()}
+
+    def clear(self):
+        self._checked.clear()
+
+
+health = ReplicaHealth()
+
+
+@register_collector
+def replica_metrics():
+    return [
+        ('db_replica_healthy', "Whether each read replica passed its last health check.", 'gauge',
+         [({'alias': alias}, int(ok)) for alias, ok in sorted(health.status().items())]),
+    ]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None or state.pinned or not replicas()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        healthy = health.healthy(replicas())
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """Sets up the request's routing state and remembers clients that wrote."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        if request.method not in SAFE_METHODS:
+            return RequestState(pinned=True)
+        pinned_until = request.COOKIES.get(PIN_COOKIE, '')
+        if not pinned_until.isdigit():
+            key = header_key(request)
+            pinned_until = str(cache.get(key, '')) if key else ''
+        return RequestState(pinned=pinned_until.isdigit() and int(pinned_until) > time.time())
+
+    def finish(self, request, response, state):
+        if state.wrote and replicas():
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+            until = int(time.time() + seconds) + 1
+            response.set_cookie(PIN_COOKIE, str(until), max_age=seconds + 1, httponly=True, samesite='Lax')
+            key = header_key(request)
+            if key:
+                cache.set(key, until, seconds + 1)
+        return response
+
+
+def header_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return PIN_KEY_PREFIX + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+def sync_sqlite(alias):
+    """Copy the primary into the SQLite replica ``alias``, as replication would."""
+    source, target = connections[DEFAULT_DB_ALIAS], connections[alias]
+    if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+        raise ValueError("Only SQLite databases can be synced this way.")
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
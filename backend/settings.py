@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # BASE DIRECTORY
@@ -22,11 +23,16 @@ INSTALLED_APPS = [
 
     'users',
     'job',
+    'taskqueue',
+    'metrics',
 ]
 
 # MIDDLEWARE
 MIDDLEWARE = [
+    'metrics.middleware.RequestMetricsMiddleware',
+    'backend.replicas.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -41,7 +47,7 @@ ROOT_URLCONF = 'backend.urls'
 # --- TEMPLATE CONFIGURATION ---
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'metrics.templates.DjangoTemplates',
         'DIRS': [
             BASE_DIR / 'frontend_static' / 'Internship-Job-Portal-main',
             BASE_DIR / 'templates',
@@ -60,6 +66,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# Serve the read-heavy pages and APIs with the async views in job/async_views.py.
+# backend/asgi.py turns this on; under WSGI the synchronous views are used.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 # DATABASE
 DATABASES = {
     'default': {
@@ -68,6 +78,28 @@ DATABASES = {
     }
 }
 
+# READ REPLICAS (backend/replicas.py)
+# Locally, SQLite files can stand in for replicas of db.sqlite3:
+# DJANGO_SQLITE_REPLICAS=db.replica.sqlite3 adds the alias 'replica1', and
+# manage.py sync_replicas copies the primary into it.
+for number, name in enumerate(filter(None, os.environ.get('DJANGO_SQLITE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['backend.replicas.PrimaryReplicaRouter']
+# Seconds a client's reads stay on the primary after it writes
+REPLICA_PIN_SECONDS = 5
+# Seconds between health checks of each replica, and the most lag (PostgreSQL) a healthy one may have
+REPLICA_HEALTH_INTERVAL = 10
+REPLICA_MAX_LAG = 30
+
+# AUTHENTICATION
+# Loads the student and employer profiles with the session's user (users/backends.py)
+AUTHENTICATION_BACKENDS = ['users.backends.ProfileModelBackend']
+
 # PASSWORD VALIDATION
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -92,9 +124,25 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Collect only the files the templates reference, with hashed names and
+# .gz/.br copies, served by WhiteNoise with immutable caching (backend/staticfiles.py)
+STATICFILES_FINDERS = ['backend.staticfiles.ReferencedFilesFinder']
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'backend.staticfiles.CompressedManifestStorage'},
+}
+# The unhashed copies are never linked once collected
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
 # MEDIA FILES
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# How CVs and application files reach the client once the API has checked
+# who may see them (job/downloads.py): None sends them from Python,
+# 'x-accel-redirect' hands them to nginx (an internal location at
+# MEDIA_ACCEL_REDIRECT_PREFIX aliasing MEDIA_ROOT), 'x-sendfile' to Apache or lighttpd.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
 
 # DEFAULT PRIMARY KEY FIELD TYPE
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -108,10 +156,38 @@ LOGIN_URL = '/users/login/'
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'metrics.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'job.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+}
+
+# Lifetimes in seconds of the API's signed tokens (users/tokens.py)
+TOKEN_ACCESS_LIFETIME = 15 * 60
+TOKEN_REFRESH_LIFETIME = 7 * 24 * 60 * 60
+
+# Token buckets per scope (users/throttling.py): 'n/period' for all clients
+# together ('endpoint'), per client address ('ip') and per account ('user').
+# THROTTLE_STORE is 'local' (this process) or a CACHES alias shared by every worker.
+THROTTLE_STORE = 'local'
+THROTTLE_RATES = {
+    'login': {'endpoint': '300/min', 'ip': '20/min', 'user': '5/min'},
+    'apply': {'endpoint': '600/min', 'ip': '60/min', 'user': '20/min'},
 }
 
 # CUSTOM USER MODEL
-AUTH_USER_MODEL = "users.User"
\ No newline at end of file
+AUTH_USER_MODEL = "users.User"
+
+# REQUEST METRICS (see metrics/middleware.py)
+METRICS_SERVER_TIMING = True
+METRICS_SLOW_REQUEST_MS = None
+METRICS_SLOW_QUERY_LOG_LIMIT = 5
+# /metrics needs staff or the token. Addresses listed here skip both, so
+# never list the address a reverse proxy connects from.
+METRICS_ALLOWED_IPS = []
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN') or None
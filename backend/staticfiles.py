@@ -0,0 +1,163 @@
+"""
+The static files pipeline: collect only what the pages use, fingerprint
+it, and compress it ahead of time.
+
+``ReferencedFilesFinder`` replaces Django's finders. Third-party apps (the
+admin, DRF) still contribute all their files, since their assets are also
+picked in Python code. The project's own sources, STATICFILES_DIRS and
+apps inside BASE_DIR, contribute only the files that are referenced:
+
+- ``{% static '...' %}`` tags with a literal path, in the templates the
+  project renders (template names in the project's Python code, plus
+  whatever those extend or include);
+- ``url(...)`` and ``@import`` in those stylesheets, followed recursively
+  (fonts, background images, other stylesheets).
+
+The vendored theme's demo pages, docs and unused plugins are left out.
+
+``CompressedManifestStorage`` is WhiteNoise's storage. It gives each file
+a content hash in its name and writes ``.gz`` and, with Brotli installed,
+``.br`` copies at collectstatic time. WhiteNoise serves the hashed names
+with a far-future ``immutable`` Cache-Control. A referenced file that is
+missing, or was not collected, is linked by its plain name instead of
+breaking the page.
+"""
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import AppDirectoriesFinder, BaseFinder, FileSystemFinder
+from django.template import TemplateDoesNotExist, engines
+from django.utils.functional import cached_property
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+STATIC_TAG = re.compile(r"""\{%\s*static\s+(['"])([^'"]+)\1""")
+TEMPLATE_TAG = re.compile(r"""\{%\s*(?:extends|include)\s+(['"])([^'"]+)\1""")
+TEMPLATE_NAME = re.compile(r"""['"]([\w./-]+\.html)['"]""")
+CSS_REFERENCE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3""")
+
+# Source maps are only fetched by developer tools, and .eot/.ttf fonts only
+# by browsers without WOFF support: not worth compressing at build time
+SKIP_COMPRESS_EXTENSIONS = Compressor.SKIP_COMPRESS_EXTENSIONS + ('map', 'eot', 'ttf')
+
+SKIPPED_DIRS = {'migrations', 'static', 'templates', 'frontend_static', 'media', 'staticfiles'}
+
+
+def project_python_files():
+    for path in Path(settings.BASE_DIR).rglob('*.py'):
+        if not SKIPPED_DIRS.intersection(path.relative_to(settings.BASE_DIR).parts):
+            yield path
+
+
+def template_source(name):
+    for engine in engines.all():
+        try:
+            return engine.get_template(name).template.source
+        except TemplateDoesNotExist:
+            continue
+    return None
+
+
+def rendered_templates():
+    """Sources of the templates named in the project's code and of those they extend or include."""
+    pending = set()
+    for path in project_python_files():
+        pending.update(TEMPLATE_NAME.findall(path.read_text(errors='ignore')))
+    sources = {}
+    while pending:
+        name = pending.pop()
+        source = template_source(name)
+        if source is None:
+            continue
+        sources[name] = source
+        pending.update(match[1] for match in TEMPLATE_TAG.findall(source) if match[1] not in sources)
+    return sources
+
+
+def css_references(path, source):
+    """Static paths referenced by the stylesheet at static path ``path``."""
+    references = []
+    for match in CSS_REFERENCE.finditer(source):
+        target = (match.group(2) or match.group(4)).strip()
+        if target.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+            continue
+        target = target.split('#')[0].split('?')[0]
+        if target:
+            references.append(posixpath.normpath(posixpath.join(posixpath.dirname(path), target)))
+    return references
+
+
+def referenced_paths(find):
+    """Every static path the rendered templates need, given ``find(path)`` returning a file or None."""
+    pending = set()
+    for source in rendered_templates().values():
+        pending.update(match[1] for match in STATIC_TAG.findall(source))
+    found = set()
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        if path.endswith('.css'):
+            location = find(path)
+            if location:
+                source = Path(location).read_text(errors='ignore')
+                pending.update(css_references(path, source))
+    return found
+
+
+class ReferencedFilesFinder(BaseFinder):
+    def __init__(self, *args, **kwargs):
+        self.file_system = FileSystemFinder(*args, **kwargs)
+        self.apps = AppDirectoriesFinder(*args, **kwargs)
+
+    @cached_property
+    def referenced(self):
+        return referenced_paths(self.find)
+
+    def is_project(self, storage):
+        return Path(storage.location).is_relative_to(settings.BASE_DIR)
+
+    def check(self, **kwargs):
+        return self.file_system.check(**kwargs)
+
+    def find(self, path, find_all=False, **kwargs):
+        if kwargs:
+            find_all = self._check_deprecated_find_param(find_all=find_all, **kwargs)
+        matches = []
+        for finder in (self.file_system, self.apps):
+            result = finder.find(path, find_all=find_all)
+            if result and not find_all:
+                return result
+            matches.extend(result or [])
+        return matches if find_all else None
+
+    def list(self, ignore_patterns):
+        for finder in (self.file_system, self.apps):
+            for path, storage in finder.list(ignore_patterns):
+                if not self.is_project(storage) or path.replace('\\', '/') in self.referenced:
+                    yield path, storage
+
+
+class CompressedManifestStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def create_compressor(self, **kwargs):
+        if kwargs.get('extensions') is None:
+            kwargs['extensions'] = SKIP_COMPRESS_EXTENSIONS
+        return super().create_compressor(**kwargs)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # A stylesheet pointing at a file the theme never shipped
+            return name
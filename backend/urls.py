@@ -1,11 +1,17 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
 from job.views import home_view 
 from job.views import job_list_view 
+from metrics.views import metrics_view
+
+if settings.ASYNC_VIEWS:
+    from job.async_views import async_home_view as home_view, async_job_list_view as job_list_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('users/', include('users.urls')),
     
     path('', home_view, name='home'),
@@ -13,5 +19,6 @@ urlpatterns = [
     
     path('', include('job.job_templates_urls')), 
     
+    path('api/auth/', include('users.api_urls')),
     path('api/', include('job.urls')),
 ]
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JobConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'job'
+
+    def ready(self):
+        import job.signals  # Keep the search index in step with job changes
@@ -0,0 +1,139 @@
+"""
+Async versions of the read-heavy views, used when the site is served over
+ASGI (``ASYNC_VIEWS``, switched on by backend/asgi.py).
+
+Rows are fetched with Django's async ORM, so a request waiting on the
+database does not hold a thread and one process can keep many requests in
+flight. DRF itself is synchronous: authentication and permission checks
+(one query for the session user and its profiles), search ranking and the
+write methods run through sync_to_async. Serializing happens on rows that
+are already loaded. Querysets, filters, serializers and validators are
+shared with job/views.py, so both paths return the same responses.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.shortcuts import render
+
+from users.profiles import load_profiles
+from . import summary
+from .views import (
+    JOBS_PER_PAGE,
+    JobDetailAPIView, JobListAPIView, MyApplicationsAPIView,
+    apply_job_filters, home_context, job_list_queryset, job_listing_context,
+    listing_queryset, ranked_search_ids,
+)
+
+
+async def afilter_jobs(queryset, params):
+    """filter_jobs() for async views."""
+    ranked_ids = await sync_to_async(ranked_search_ids)(params) if params.get('search') else None
+    return apply_job_filters(queryset, params, ranked_ids)
+
+
+class AsyncReadMixin:
+    """
+    Runs DRF's request cycle from an async ``dispatch``. Views define async
+    handlers; ``alist`` and ``aretrieve`` are the async counterparts of
+    ConditionalGetMixin.list and retrieve.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Cache the profiles now so role lookups in async code never query
+        load_profiles(request.user)
+
+    async def options(self, request, *args, **kwargs):
+        return await sync_to_async(super().options)(request, *args, **kwargs)
+
+    async def aget_queryset(self):
+        return self.get_queryset()
+
+    async def aload_applied_job_ids(self):
+        if self.needs_applied_job_ids() and self.applied_job_ids is None:
+            self.applied_job_ids = {job_id async for job_id in self.applied_job_ids_queryset()}
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        if self.paginator is None:
+            rows = [row async for row in queryset]
+        else:
+            rows = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        await self.aload_applied_job_ids()
+        return self.list_response(rows, paginated=self.paginator is not None)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            # Same message as get_object_or_404 in the sync view
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        self.check_object_permissions(request, instance)
+        await self.aload_applied_job_ids()
+        return self.object_response(instance)
+
+
+class AsyncJobListAPIView(AsyncReadMixin, JobListAPIView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def aget_queryset(self):
+        queryset = job_list_queryset(self.requested_fields()).filter(is_active=True)
+        return await afilter_jobs(queryset, self.request.query_params)
+
+
+class AsyncJobDetailAPIView(AsyncReadMixin, JobDetailAPIView):
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    # Writes are rare; they keep the synchronous code path in a worker thread
+    async def put(self, request, *args, **kwargs):
+        return await sync_to_async(super().put)(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(super().patch)(request, *args, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        return await sync_to_async(super().delete)(request, *args, **kwargs)
+
+
+class AsyncMyApplicationsAPIView(AsyncReadMixin, MyApplicationsAPIView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+async def async_home_view(request):
+    """home_view for ASGI."""
+    context = home_context(await summary.afeatured_jobs(), await summary.acategory_counts())
+    return render(request, "index.html", context)
+
+
+async def async_job_list_view(request):
+    """job_list_view for ASGI."""
+    jobs = await afilter_jobs(listing_queryset(), request.GET)
+    paginator = Paginator(jobs, JOBS_PER_PAGE)
+    # count is a cached_property: fill it in so get_page() does not query
+    paginator.count = await jobs.acount()
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = [job async for job in page_obj.object_list]
+    return render(request, "job_listing.html", job_listing_context(request, paginator, page_obj))
@@ -0,0 +1,315 @@
+"""
+Endpoint benchmarks (``manage.py benchmark``).
+
+Every named route in job/urls.py, job/job_templates_urls.py and users/urls.py
+has a scenario: which seeded user calls it, with what arguments and body.
+Each scenario is requested in-process through the test client and timed
+end to end, including reading streamed bodies. Requests that write are run
+inside a transaction that is rolled back, so every iteration sees the same
+data, and so are the files some scenarios store before their first
+request. A response with an unexpected status (by default, any 4xx or
+5xx) is reported, since its timings are of the error rather than the
+route. Throttles are switched off, since repeating one request is exactly
+what they exist to stop. The results can be saved as a JSON baseline and
+compared with a later run to flag regressions.
+"""
+import json
+import math
+import platform
+import tempfile
+import time
+from contextlib import nullcontext
+from importlib import import_module
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import Student, User
+from .models import Job, Application
+
+ROUTE_SOURCES = [
+    ('job.urls', None),
+    ('job.job_templates_urls', None),
+    ('users.urls', 'users'),
+]
+
+# Regressions smaller than these are treated as noise
+LATENCY_THRESHOLD = 0.25
+MIN_LATENCY_DELTA_MS = 2.0
+SIZE_THRESHOLD = 0.10
+
+
+class Fixtures:
+    """The seeded rows the scenarios point at: the busiest active job and its people."""
+
+    def __init__(self, password):
+        self.password = password
+        self.job = (
+            Job.objects.filter(is_active=True)
+            .annotate(application_total=Count('applications'))
+            .order_by('-application_total', 'id')
+            .select_related('employer__user')
+            .first()
+        )
+        if self.job is None:
+            raise LookupError("No active jobs found. Run manage.py seed_data first.")
+        self.employer = self.job.employer
+        self.applications = list(self.job.applications.order_by('id')[:20])
+        if not self.applications:
+            raise LookupError("The busiest job has no applications. Run manage.py seed_data first.")
+        self.application = self.applications[0]
+        self.student = self.application.applicant
+        self.open_job = (
+            Job.objects.filter(is_active=True)
+            .exclude(applications__applicant=self.student)
+            .order_by('-posted_on')
+            .first()
+        ) or self.job
+
+    def user(self, role):
+        if role == 'student':
+            return User.objects.get(pk=self.student.user_id)
+        if role == 'employer':
+            return User.objects.get(pk=self.employer.user_id)
+        return None
+
+
+class Scenario:
+    def __init__(self, role=None, method='get', kwargs=None, data=None, content_type=None,
+                 max_iterations=None, login_each_time=False, expected_status=None, prepare=None):
+        self.role = role
+        self.method = method
+        self.kwargs = kwargs or (lambda fx: {})
+        self.data = data or (lambda fx: {})
+        self.content_type = content_type
+        self.max_iterations = max_iterations
+        self.login_each_time = login_each_time
+        # None: any status below 400
+        self.expected_status = expected_status
+        # Called with the fixtures before the first request; undone afterwards
+        self.prepare = prepare
+
+    def unexpected(self, status):
+        if self.expected_status is not None:
+            return status != self.expected_status
+        return status >= 400
+
+    @property
+    def writes(self):
+        return self.method != 'get'
+
+
+def _store_cv(fx):
+    """Give the fixture student a CV, also sent as their application's resume."""
+    fx.student.cv.save('cv.pdf', ContentFile(b"%PDF-1.4 " + b"benchmark " * 20000), save=False)
+    Student.objects.filter(pk=fx.student.pk).update(cv=fx.student.cv.name)
+    Application.objects.filter(pk=fx.application.pk).update(resume=fx.student.cv.name)
+
+
+def _cv_upload(fx):
+    return {'cv': SimpleUploadedFile('cv.txt', b"Python, Django and SQL", content_type='text/plain')}
+
+
+SCENARIOS = {
+    # job/urls.py
+    'job-list': Scenario('student'),
+    'job-create': Scenario('employer', 'post', content_type='application/json', data=lambda fx: {
+        'title': "Benchmark Developer", 'description': "Measure how fast every route answers.",
+        'location': "Potchefstroom", 'type': "Full Time",
+    }),
+    'job-detail': Scenario('student', kwargs=lambda fx: {'pk': fx.job.pk}),
+    'my-jobs': Scenario('employer'),
+    'job-stats': Scenario('employer'),
+    'job-recommendations': Scenario('student'),
+    'application-create': Scenario('student', 'post', content_type='application/json', data=lambda fx: {
+        'job': fx.open_job.pk, 'cover_letter': "Benchmark application",
+    }),
+    'my-applications': Scenario('student'),
+    'employer-applications': Scenario('employer', kwargs=lambda fx: {'job_id': fx.job.pk}),
+    'employer-applications-export': Scenario(
+        'employer', kwargs=lambda fx: {'job_id': fx.job.pk, 'export_format': 'csv'},
+    ),
+    'employer-applications-files': Scenario('employer', kwargs=lambda fx: {'job_id': fx.job.pk}),
+    'application-bulk-update-status': Scenario('employer', 'post', content_type='application/json', data=lambda fx: {
+        'updates': [{'application_id': a.pk, 'status': 'reviewed'} for a in fx.applications],
+    }),
+    'application-update-status': Scenario(
+        'employer', 'patch', content_type='application/json',
+        kwargs=lambda fx: {'application_id': fx.application.pk}, data=lambda fx: {'status': 'shortlisted'},
+    ),
+    'application-detail': Scenario('employer', kwargs=lambda fx: {'application_id': fx.application.pk}),
+    'application-file': Scenario(
+        'employer', kwargs=lambda fx: {'application_id': fx.application.pk, 'field': 'resume'}, prepare=_store_cv,
+    ),
+    'student-cv': Scenario('employer', kwargs=lambda fx: {'student_id': fx.student.pk}, prepare=_store_cv),
+    # job/job_templates_urls.py
+    'job_listing': Scenario(),
+    'job_details': Scenario(kwargs=lambda fx: {'pk': fx.job.pk}),
+    'application_form': Scenario('student', kwargs=lambda fx: {'job_id': fx.open_job.pk}),
+    # users/urls.py
+    'users:register': Scenario(),
+    'users:login': Scenario(method='post', max_iterations=10, data=lambda fx: {
+        'username': fx.student.user.username, 'password': fx.password,
+    }),
+    'users:logout': Scenario('student', login_each_time=True),
+    'users:student_profile': Scenario('student'),
+    'users:upload_cv': Scenario('student', 'post', data=_cv_upload),
+    'users:employer_dashboard': Scenario('employer'),
+}
+
+
+def route_names():
+    """Names of every route in the benchmarked URLconfs, namespaced where needed."""
+    names = []
+    for module_name, namespace in ROUTE_SOURCES:
+        for pattern in import_module(module_name).urlpatterns:
+            if pattern.name:
+                names.append(f"{namespace}:{pattern.name}" if namespace else pattern.name)
+    return names
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def _request(client, scenario, url, fx):
+    """Send one request and read the whole body. Returns ``(response, size)``."""
+    data = scenario.data(fx)
+    method = getattr(client, scenario.method)
+    if scenario.content_type == 'application/json':
+        response = method(url, json.dumps(data), content_type=scenario.content_type)
+    else:
+        response = method(url, data)
+    if response.streaming:
+        return response, sum(len(chunk) for chunk in response.streaming_content)
+    return response, len(response.content)
+
+
+def run_scenario(name, scenario, fx, iterations, warmup):
+    url = reverse(name, kwargs=scenario.kwargs(fx))
+    client = Client(raise_request_exception=False)
+    user = fx.user(scenario.role) if scenario.role else None
+    if user is not None:
+        client.force_login(user)
+    if scenario.max_iterations:
+        iterations = min(iterations, scenario.max_iterations)
+
+    timings = []
+    queries = 0
+    size = 0
+    status = None
+    unexpected = set()
+    with transaction.atomic() if scenario.prepare else nullcontext():
+        if scenario.prepare:
+            scenario.prepare(fx)
+        for i in range(warmup + iterations):
+            if scenario.login_each_time and user is not None:
+                client.force_login(user)
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                if scenario.writes:
+                    with transaction.atomic():
+                        response, body_size = _request(client, scenario, url, fx)
+                        transaction.set_rollback(True)
+                else:
+                    response, body_size = _request(client, scenario, url, fx)
+                elapsed = (time.perf_counter() - started) * 1000
+            if i >= warmup:
+                timings.append(elapsed)
+                queries = max(queries, counter.count)
+                size = body_size
+                status = response.status_code
+                if scenario.unexpected(status):
+                    unexpected.add(status)
+        if scenario.prepare:
+            transaction.set_rollback(True)
+
+    timings.sort()
+    return {
+        'method': scenario.method.upper(),
+        'path': url,
+        'status': status,
+        'iterations': len(timings),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': queries,
+        'bytes': size,
+        # Timings of an error response say nothing about the route
+        'unexpected_statuses': sorted(unexpected),
+    }
+
+
+def run(iterations=30, warmup=3, only=None, password='benchmark'):
+    """
+    Benchmark every route (or those named in ``only``) and return the
+    report: run metadata plus one result per route.
+    """
+    names = route_names()
+    missing = [name for name in names if name not in SCENARIOS]
+    fx = Fixtures(password)
+    results = {}
+    with tempfile.TemporaryDirectory() as media_root, \
+            override_settings(MEDIA_ROOT=media_root, ALLOWED_HOSTS=['testserver'], THROTTLE_RATES={}):
+        for name in names:
+            if name in missing or (only and name not in only):
+                continue
+            results[name] = run_scenario(name, SCENARIOS[name], fx, iterations, warmup)
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'iterations': iterations,
+        'rows': {
+            'jobs': Job.objects.count(),
+            'applications': Application.objects.count(),
+            'users': User.objects.count(),
+        },
+        'missing_scenarios': missing,
+        'results': results,
+    }
+
+
+def compare(baseline, current, latency_threshold=LATENCY_THRESHOLD,
+            min_latency_delta_ms=MIN_LATENCY_DELTA_MS, size_threshold=SIZE_THRESHOLD):
+    """
+    Routes that got worse since ``baseline``, as ``(route, problem)`` pairs:
+    a p95 latency increase above ``latency_threshold`` (and above the noise
+    floor), any extra query, a response ``size_threshold`` larger, or a
+    different status code.
+    """
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if now['status'] != before['status']:
+            regressions.append((name, f"status {before['status']} -> {now['status']}"))
+        delta = now['p95_ms'] - before['p95_ms']
+        if delta > min_latency_delta_ms and now['p95_ms'] > before['p95_ms'] * (1 + latency_threshold):
+            regressions.append((name, f"p95 {before['p95_ms']:.1f}ms -> {now['p95_ms']:.1f}ms"))
+        if now['queries'] > before['queries']:
+            regressions.append((name, f"queries {before['queries']} -> {now['queries']}"))
+        if now['bytes'] > before['bytes'] * (1 + size_threshold):
+            regressions.append((name, f"size {before['bytes']}B -> {now['bytes']}B"))
+    return regressions
@@ -0,0 +1,84 @@
+"""
+Conditional GET support (ETag / Last-Modified) for jobs and applications.
+
+Validators are built from values that are already loaded before a response
+is serialized: each object's ``updated_at``, the nested job's ``updated_at``
+for applications, and annotations such as ``applications_count``. Changes to
+an employer or student profile touch the ``updated_at`` of the jobs and
+applications that embed it (see job/signals.py), so a matching ETag means the
+body would be byte for byte the same and a 304 can be sent without
+serializing anything.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+VARY_HEADERS = ('Authorization', 'Cookie')
+
+
+def object_version(obj):
+    """The parts of ``obj`` and its loaded relations that its representation depends on."""
+    parts = [obj._meta.label_lower, obj.pk, _timestamp(getattr(obj, 'updated_at', None))]
+    job = obj._state.fields_cache.get('job')
+    if job is not None:
+        parts.append(object_version(job))
+    for annotation in ('applications_count',):
+        if hasattr(obj, annotation):
+            parts.append(getattr(obj, annotation))
+    return parts
+
+
+def last_modified(objects):
+    """Newest ``updated_at`` among ``objects`` and their loaded jobs, or None."""
+    stamps = []
+    for obj in objects:
+        stamps.append(getattr(obj, 'updated_at', None))
+        job = obj._state.fields_cache.get('job')
+        if job is not None:
+            stamps.append(job.updated_at)
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def strong_etag(*parts):
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def validators(objects, variant=()):
+    """``(etag, last_modified)`` for a response listing ``objects``."""
+    objects = list(objects)
+    etag = strong_etag(list(variant), [object_version(obj) for obj in objects])
+    modified = last_modified(objects)
+    # HTTP dates have whole-second precision
+    return etag, int(modified.timestamp()) if modified else None
+
+
+def not_modified(request, etag, modified, use_last_modified=True):
+    """
+    The 304 (or 412) response for ``request`` if its preconditions say the
+    client's copy is current, otherwise None. The API views pass
+    ``use_last_modified=False``: a row dropping out of a page, or a job
+    gaining an application, does not move any ``updated_at``, so only the
+    ETag can tell that the body changed.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=modified if use_last_modified else None,
+    )
+    if response is not None:
+        add_validators(response, etag, modified)
+    return response
+
+
+def add_validators(response, etag, modified):
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def _timestamp(value):
+    return value.isoformat() if value is not None else None
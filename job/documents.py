@@ -0,0 +1,273 @@
+"""
+Text extraction and keyword search for CVs and application documents.
+
+When a Student's CV or an Application's files change, the stored file is
+queued as a background task (see job/tasks.py), so uploads do not wait for
+it. A worker pulls the plain text out of the DOCX, PDF or TXT file and
+indexes it with the job search tokenizer (see job/search.py). Text is
+cached per content hash: a file that was already extracted under another name
+is copied rather than parsed again.
+
+Employers search a job's applicants with ``?search=`` on the employer
+applications API, which ranks applications with BM25 over the text of the
+resume, the additional documents and the applicant's profile CV.
+"""
+import hashlib
+import html
+import io
+import logging
+import math
+import os
+import re
+import zipfile
+import zlib
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.storage import blob_storage, is_blob
+from .models import Application, DocumentText, DocumentTerm
+from .search import B, K1, MAX_RESULTS, parse_query, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Larger files are truncated; a CV is a few hundred KB at most
+MAX_FILE_SIZE = 10 * 1024 * 1024
+# Most a file may expand to when unzipped or inflated, against zip bombs
+MAX_EXPANDED_SIZE = 20 * 1024 * 1024
+MAX_TEXT_LENGTH = 200_000
+
+# What the extractors raise for a file they cannot read: corrupt or
+# encrypted archives, bad encodings, unsupported types. Other errors
+# (storage, database) are left to the task's retries.
+PARSE_ERRORS = (ValueError, LookupError, EOFError, RuntimeError, zipfile.BadZipFile, zlib.error)
+
+
+# Extractors
+
+def read_txt(data):
+    for encoding in ('utf-8-sig', 'cp1252'):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('latin-1')
+
+
+DOCX_BREAK_RE = re.compile(r'</w:p>|<w:br\s*/>|<w:tab\s*/>')
+XML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def read_docx(data):
+    """Text of the main document part of a DOCX file, one line per paragraph."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        info = archive.getinfo('word/document.xml')
+        if info.file_size > MAX_EXPANDED_SIZE:
+            raise ValueError(f"Document text is too large to extract ({info.file_size} bytes).")
+        with archive.open(info) as part:
+            # The declared size is not trusted either
+            xml = part.read(MAX_EXPANDED_SIZE).decode('utf-8', 'replace')
+    xml = DOCX_BREAK_RE.sub('\n', xml)
+    return html.unescape(XML_TAG_RE.sub('', xml))
+
+
+PDF_STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.DOTALL)
+PDF_TEXT_RE = re.compile(rb'\[((?:\\.|[^\]\\])*)\]\s*TJ|\(((?:\\.|[^)\\])*)\)\s*(?:Tj|\'|")|(T\*|ET)')
+PDF_STRING_RE = re.compile(rb'\(((?:\\.|[^)\\])*)\)')
+PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'', b'f': b''}
+
+
+def _pdf_string(raw):
+    def unescape(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return PDF_ESCAPES.get(escaped, escaped)
+
+    return re.sub(rb'\\([0-7]{1,3}|.)', unescape, raw, flags=re.DOTALL)
+
+
+def read_pdf(data):
+    """
+    Text drawn by the Tj/TJ operators of a PDF's content streams. Enough for
+    CVs exported from word processors; scanned PDFs come back empty.
+    Streams are inflated up to ``MAX_EXPANDED_SIZE`` in total; whatever
+    is past that is left out.
+    """
+    lines = []
+    current = []
+    budget = MAX_EXPANDED_SIZE
+    for match in PDF_STREAM_RE.finditer(data):
+        if budget <= 0:
+            break
+        stream = match.group(1)
+        try:
+            stream = zlib.decompressobj().decompress(stream, budget)
+        except zlib.error:
+            stream = stream[:budget]
+        budget -= len(stream)
+        for array, string, operator in PDF_TEXT_RE.findall(stream):
+            if operator:
+                if current:
+                    lines.append(b''.join(current))
+                    current = []
+            elif array:
+                current.extend(_pdf_string(part) for part in PDF_STRING_RE.findall(array))
+            else:
+                current.append(_pdf_string(string))
+    if current:
+        lines.append(b''.join(current))
+    return '\n'.join(line.decode('latin-1') for line in lines)
+
+
+EXTRACTORS = {
+    '.txt': read_txt,
+    '.docx': read_docx,
+    '.pdf': read_pdf,
+}
+
+
+def extract_text(name, data):
+    """Plain text of ``data``, picking the extractor from the file extension."""
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in EXTRACTORS:
+        raise ValueError(f"Unsupported file type: {extension or 'none'}")
+    return EXTRACTORS[extension](data)[:MAX_TEXT_LENGTH]
+
+
+# Indexing
+
+def _digest_for(name, data):
+    if is_blob(name):
+        # Content-addressed names start with their SHA-256
+        return os.path.splitext(os.path.basename(name))[0]
+    return hashlib.sha256(data).hexdigest()
+
+
+def _index(document, text):
+    tokens = [term for term in tokenize(text) if term is not None]
+    document.terms.all().delete()
+    DocumentTerm.objects.bulk_create([
+        DocumentTerm(document=document, term=term, frequency=frequency)
+        for term, frequency in Counter(tokens).items()
+    ])
+    return len(tokens)
+
+
+def extract_document(name, storage=blob_storage):
+    """
+    Extract and index the stored file ``name``. Files that were already
+    extracted are left alone, so calling this twice is harmless. Files that
+    cannot be parsed are marked failed; any other error is raised, so the
+    task is retried.
+    """
+    document, _ = DocumentText.objects.get_or_create(name=name)
+    if document.status == 'done':
+        return document
+
+    with storage.open(name, 'rb') as source:
+        data = source.read(MAX_FILE_SIZE)
+    digest = _digest_for(name, data)
+    cached = (
+        DocumentText.objects.filter(digest=digest, status='done')
+        .exclude(pk=document.pk).first()
+    )
+    try:
+        text = cached.text if cached else extract_text(name, data)
+    except PARSE_ERRORS as exc:
+        logger.warning("Text extraction failed for %s: %s", name, exc)
+        document.status = 'failed'
+        document.error = str(exc)[:1000]
+        document.extracted_at = timezone.now()
+        document.save(update_fields=['status', 'error', 'extracted_at'])
+        return document
+
+    with transaction.atomic():
+        document.digest = digest
+        document.text = text
+        document.length = _index(document, text)
+        document.status = 'done'
+        document.error = ''
+        document.extracted_at = timezone.now()
+        document.save()
+    return document
+
+
+def pending_names():
+    """Stored CV and application file names that have no extracted text yet."""
+    from users.models import Student
+
+    names = set()
+    for model, field_name in ((Student, 'cv'), (Application, 'resume'), (Application, 'additional_documents')):
+        names.update(
+            model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+            .values_list(field_name, flat=True).distinct().iterator()
+        )
+    names.difference_update(DocumentText.objects.filter(status='done').values_list('name', flat=True))
+    return sorted(names)
+
+
+# Candidate search
+
+APPLICATION_TEXT_SOURCES = ('resume', 'additional_documents', 'applicant__cv')
+
+
+def search_application_ids(job, query, limit=MAX_RESULTS):
+    """
+    Return the ids of ``job``'s applications whose files mention every term of
+    ``query``, best match first. Quoted phrases are matched as separate terms.
+    Returns ``None`` when the query has no words at all, and no ids when its
+    words are all stop words.
+    """
+    terms, _ = parse_query(query)
+    if not terms:
+        return [] if tokenize(query) else None
+
+    applications = Application.objects.filter(job=job)
+    in_sources = Q()
+    for source in APPLICATION_TEXT_SOURCES:
+        in_sources |= Q(document__name__in=applications.values(source))
+
+    documents = {}
+    for name, term, frequency, length in (
+        DocumentTerm.objects.filter(in_sources, term__in=terms)
+        .values_list('document__name', 'term', 'frequency', 'document__length')
+    ):
+        entry = documents.setdefault(name, {'length': length, 'terms': {}})
+        entry['terms'][term] = frequency
+    if not documents:
+        return []
+
+    matches = {}
+    for row in applications.values_list('id', *APPLICATION_TEXT_SOURCES):
+        application_id, names = row[0], set(filter(None, row[1:]))
+        found = Counter()
+        length = 0
+        for name in names & documents.keys():
+            found.update(documents[name]['terms'])
+            length += documents[name]['length']
+        if found:
+            matches[application_id] = (length, found)
+    if not matches:
+        return []
+
+    document_frequency = Counter(term for _, found in matches.values() for term in found)
+    document_count = applications.count()
+    average_length = sum(length for length, _ in matches.values()) / len(matches) or 1.0
+
+    scores = []
+    for application_id, (length, found) in matches.items():
+        if len(found) < len(terms):
+            continue
+        normalizer = K1 * (1 - B + B * length / average_length)
+        score = 0.0
+        for term, frequency in found.items():
+            df = document_frequency[term]
+            idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+            score += idf * frequency * (K1 + 1) / (frequency + normalizer)
+        scores.append((-score, application_id))
+
+    scores.sort()
+    return [application_id for _, application_id in scores[:limit]]
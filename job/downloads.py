@@ -0,0 +1,170 @@
+"""
+Serving CVs, resumes and application documents after a permission check.
+
+The views decide who may see a file; this module only sends it. With
+``MEDIA_SENDFILE`` set, Django answers with headers alone and the front
+server sends the bytes, ranges included, without holding a Python worker:
+
+``'x-accel-redirect'`` (nginx)
+    ``X-Accel-Redirect: <MEDIA_ACCEL_REDIRECT_PREFIX><name>``, where the
+    prefix is an ``internal`` location aliasing MEDIA_ROOT.
+``'x-sendfile'`` (Apache mod_xsendfile, lighttpd)
+    ``X-Sendfile: <absolute path>``.
+
+Otherwise the file is sent from Python as a FileResponse, so WSGI servers
+with ``wsgi.file_wrapper`` (gunicorn, uWSGI) use ``sendfile()``. The
+fallback answers ``Range`` with 206 or 416 (one range per request; several
+get the whole file), honours ``If-Range``, and answers conditional
+requests from the ETag. Blob names contain the SHA-256 of their content
+(users/storage.py), so the ETag costs nothing to compute.
+"""
+import io
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+from users.models import StoredBlob
+from .conditional import VARY_HEADERS
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+def original_name(field):
+    """The uploaded name of the blob in ``field``, as an annotation for the permission query."""
+    return Subquery(StoredBlob.objects.filter(name=OuterRef(field)).values('original_name')[:1])
+
+
+def download_name(fieldfile, original, fallback):
+    """``original`` if the upload had a name, else ``fallback`` plus the stored extension."""
+    return original or fallback + os.path.splitext(fieldfile.name)[1]
+
+
+def etag_for(name, stat):
+    digest = os.path.splitext(os.path.basename(name))[0]
+    if DIGEST.match(digest):
+        return f'"{digest}"'
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single-range ``Range`` header,
+    ``None`` to send the whole file, or ``False`` if nothing in the file
+    satisfies it.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if match is None:
+        # Malformed, other units or several ranges: send it all
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # The final ``last`` bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class FileRange(io.RawIOBase):
+    """Reads ``file`` from its current position up to byte ``end``, inclusive."""
+
+    def __init__(self, file, end):
+        self.file = file
+        self.end = end
+        self.name = file.name
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        remaining = self.end + 1 - self.file.tell()
+        if remaining <= 0:
+            return b''
+        return self.file.read(remaining if size is None or size < 0 else min(size, remaining))
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.file.seek(offset, whence)
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        # For wsgi.file_wrapper: sendfile() stops at Content-Length
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def serve(request, fieldfile, filename):
+    """The response sending ``fieldfile`` to the client as an attachment named ``filename``."""
+    if not fieldfile:
+        raise Http404("No file has been uploaded.")
+    try:
+        path = fieldfile.path
+        stat = os.stat(path)
+    except (OSError, NotImplementedError):
+        raise Http404("The file is missing.")
+
+    etag = etag_for(fieldfile.name, stat)
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        backend = getattr(settings, 'MEDIA_SENDFILE', None)
+        if backend == 'x-accel-redirect':
+            response = HttpResponse()
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix + fieldfile.name
+        elif backend == 'x-sendfile':
+            response = HttpResponse()
+            response['X-Sendfile'] = path
+        else:
+            response = _file_response(request, path, stat.st_size, etag)
+        response['Accept-Ranges'] = 'bytes'
+    if response.status_code in (200, 206):
+        content_type, encoding = mimetypes.guess_type(filename)
+        # A compressed file is sent as it is stored, not decoded on the way
+        response['Content-Type'] = content_type if content_type and not encoding else 'application/octet-stream'
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Private, and the file behind a URL changes when a CV is replaced
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def _file_response(request, path, size, etag):
+    byte_range = None
+    if request.method in ('GET', 'HEAD') and 'HTTP_RANGE' in request.META:
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None or etag in parse_etags(if_range):
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        return FileResponse(file)
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(FileRange(file, end), status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
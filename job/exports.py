@@ -0,0 +1,218 @@
+"""
+Streaming exports of a job's applications.
+
+Rows are read with ``values()`` through a chunked server-side cursor and
+written out one at a time, so memory use does not depend on how many
+applicants a job has. The same holds for the ZIP bundle of application
+files, which is assembled on the fly from storage.
+
+Under ASGI, Django reads a plain iterator to the end before sending any of
+it, so ``streaming_content()`` hands the ASGI handler an async iterator
+that runs the generator on the request's sync thread a batch at a time.
+"""
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+from .models import Application
+
+CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    ('application_id', 'id'),
+    ('applied_date', 'applied_date'),
+    ('status', 'status'),
+    ('student_id', 'applicant__student_id'),
+    ('username', 'applicant__user__username'),
+    ('first_name', 'applicant__user__first_name'),
+    ('last_name', 'applicant__user__last_name'),
+    ('email', 'applicant__user__email'),
+    ('degree', 'applicant__degree'),
+    ('year_of_study', 'applicant__year_of_study'),
+    ('resume', 'resume'),
+    ('additional_documents', 'additional_documents'),
+    ('notes', 'notes'),
+    ('cover_letter', 'cover_letter'),
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object that hands back whatever csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(job, status=None):
+    """Yield one dict per application of ``job``, keyed by export column name."""
+    queryset = Application.objects.filter(job=job)
+    if status:
+        queryset = queryset.filter(status=status)
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    rows = queryset.order_by('applied_date', 'id').values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield dict(zip(names, row))
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow([_text(value) for value in row.values()])
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=_text) + '\n'
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
+
+
+# ZIP bundle of resumes and documents
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+MANIFEST_COLUMNS = [name for name, _ in EXPORT_COLUMNS if name != 'cover_letter']
+
+
+class ZipStreamBuffer(io.RawIOBase):
+    """Unseekable sink for ZipFile whose written bytes are drained by the generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _member_name(row, label, stored_name):
+    folder = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{row['student_id']}-{row['username']}").strip('_')
+    extension = os.path.splitext(stored_name)[1].lower()
+    return f"{folder or row['application_id']}/{label}{extension}"
+
+
+def _file_members(row):
+    for label, column in (('resume', 'resume'), ('document', 'additional_documents')):
+        if row[column]:
+            yield column, _member_name(row, label, row[column])
+
+
+def stream_zip(job, storage, status=None):
+    """
+    Yield a ZIP archive holding a manifest.csv of applicant metadata and every
+    resume and additional document for ``job``. Files are copied from storage
+    in small chunks and stored uncompressed, since DOCX and PDF are already
+    compressed.
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        with archive.open('manifest.csv', mode='w') as member:
+            text = io.TextIOWrapper(member, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow([*MANIFEST_COLUMNS, 'resume_file', 'document_file'])
+            for row in export_rows(job, status=status):
+                members = dict(_file_members(row))
+                writer.writerow([
+                    *(_text(row[name]) for name in MANIFEST_COLUMNS),
+                    members.get('resume', ''),
+                    members.get('additional_documents', ''),
+                ])
+                text.flush()
+                yield buffer.drain()
+            text.flush()
+            text.detach()
+        yield buffer.drain()
+
+        for row in export_rows(job, status=status):
+            for column, member_name in _file_members(row):
+                try:
+                    source = storage.open(row[column], 'rb')
+                except FileNotFoundError:
+                    continue
+                with source, archive.open(member_name, mode='w', force_zip64=True) as member:
+                    for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                        member.write(chunk)
+                        yield buffer.drain()
+                yield buffer.drain()
+    yield buffer.drain()
+
+
+# Serving
+
+# Bytes gathered per hop to the sync thread under ASGI
+ASYNC_BATCH_SIZE = 64 * 1024
+
+
+def _batches(chunks):
+    """Join the str or bytes ``chunks`` into bytes pieces of about ``ASYNC_BATCH_SIZE``."""
+    pending = []
+    pending_size = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= ASYNC_BATCH_SIZE:
+                yield b''.join(pending)
+                pending.clear()
+                pending_size = 0
+        if pending:
+            yield b''.join(pending)
+    finally:
+        chunks.close()
+
+
+async def _aiterate(chunks):
+    batches = _batches(chunks)
+    # The generator holds a database cursor, so every step runs on the
+    # same thread as the view did
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (batch := await step(batches, None)) is not None:
+            yield batch
+    finally:
+        await sync_to_async(batches.close, thread_sensitive=True)()
+
+
+def streaming_content(request, chunks):
+    """
+    ``chunks`` (a generator) as StreamingHttpResponse content for
+    ``request``: as it is under WSGI, as an async iterator under ASGI.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return _aiterate(chunks)
+    return chunks
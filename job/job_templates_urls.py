@@ -1,8 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from . import views 
 
+job_list_view = views.job_list_view
+if settings.ASYNC_VIEWS:
+    from .async_views import async_job_list_view as job_list_view
+
 urlpatterns = [
-    path('listing/', views.job_list_view, name='job_listing'),
+    path('listing/', job_list_view, name='job_listing'),
     
     path(
         'job_detail/<int:pk>/', 
@@ -0,0 +1,204 @@
+"""
+Requests in flight per process under WSGI and ASGI (``manage.py loadtest``).
+
+Each mode runs in its own process, because the URLconf picks the sync or
+async views when it is imported (see ASYNC_VIEWS). The request handler is
+driven directly, the way a server would: under WSGI by a fixed number of
+worker threads (``--wsgi-threads``, 1 for a gunicorn sync worker), under
+ASGI by one event loop with a coroutine per client. ``--db-latency-ms``
+adds a sleep to every query to stand in for a database on another
+machine; with a local SQLite file queries return too fast for waiting on
+the database to matter.
+"""
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db.backends.signals import connection_created
+from django.db import connections
+from django.test import Client, override_settings
+
+from .benchmark import Fixtures, percentile
+
+
+class InFlight:
+    """Counts the requests currently inside the handler and remembers the peak."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+def add_latency(seconds):
+    """Sleep ``seconds`` before every query on every connection, current and future."""
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if slow_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(slow_query)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(None, connection)
+
+
+def session_cookie(password):
+    client = Client()
+    client.force_login(Fixtures(password).user('student'))
+    return '; '.join(f"{name}={morsel.value}" for name, morsel in client.cookies.items())
+
+
+def wsgi_environ(path, cookie):
+    url = urlsplit(path)
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'testserver',
+        'HTTP_COOKIE': cookie,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def run_wsgi(path, cookie, concurrency, total, threads):
+    application = get_wsgi_application()
+    in_flight = InFlight()
+    workers = threading.Semaphore(threads)
+    statuses = []
+    latencies = []
+
+    def one_request():
+        started = time.perf_counter()
+        with workers, in_flight:
+            result = {}
+
+            def start_response(status, headers, exc_info=None):
+                result['status'] = int(status.split()[0])
+
+            response = application(wsgi_environ(path, cookie), start_response)
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            connections.close_all()
+        latencies.append(time.perf_counter() - started)
+        statuses.append(result['status'])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        for future in [clients.submit(one_request) for _ in range(total)]:
+            future.result()
+    return _summary(time.perf_counter() - started, latencies, statuses, in_flight.peak)
+
+
+def run_asgi(path, cookie, concurrency, total):
+    application = get_asgi_application()
+    in_flight = InFlight()
+    statuses = []
+    latencies = []
+    url = urlsplit(path)
+
+    async def one_request():
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Never disconnect; Django cancels this once the response is sent
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        started = time.perf_counter()
+        with in_flight:
+            await application(scope, receive, send)
+        latencies.append(time.perf_counter() - started)
+
+    async def client(requests):
+        for _ in range(requests):
+            await one_request()
+
+    async def main():
+        share, extra = divmod(total, concurrency)
+        await asyncio.gather(*(client(share + (i < extra)) for i in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return _summary(time.perf_counter() - started, latencies, statuses, in_flight.peak)
+
+
+def run(mode, path='/api/jobs/', concurrency=50, total=500, wsgi_threads=1, db_latency_ms=10,
+        password='benchmark'):
+    """Load one mode in this process and return its summary."""
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        cookie = session_cookie(password)
+        if db_latency_ms:
+            add_latency(db_latency_ms / 1000)
+        if mode == 'wsgi':
+            result = run_wsgi(path, cookie, concurrency, total, wsgi_threads)
+        else:
+            result = run_asgi(path, cookie, concurrency, total)
+    result.update(mode=mode, path=path, concurrency=concurrency, wsgi_threads=wsgi_threads,
+                  db_latency_ms=db_latency_ms)
+    return result
+
+
+def _summary(elapsed, latencies, statuses, peak):
+    latencies = sorted(seconds * 1000 for seconds in latencies)
+    return {
+        'requests': len(latencies),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'peak_in_flight': peak,
+    }
@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from job import benchmark, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every route in job/urls.py, job/job_templates_urls.py and users/urls.py "
+        "against the current (seeded) database and report p50/p95/p99 latency, "
+        "query count and response size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--route', action='append', dest='routes', help="Only benchmark this route name (repeatable).")
+        parser.add_argument('--password', default=seeding.DEFAULT_PASSWORD, help="Password of the seeded users.")
+        parser.add_argument('--output', help="Write the results to this JSON file, e.g. as a new baseline.")
+        parser.add_argument('--compare', help="Baseline JSON file to compare the results with.")
+        parser.add_argument('--threshold', type=float, default=benchmark.LATENCY_THRESHOLD,
+                            help="Relative p95 latency increase counted as a regression (default 0.25).")
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help="Exit with an error when the comparison finds regressions.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        try:
+            report = benchmark.run(
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                only=set(options['routes'] or ()),
+                password=options['password'],
+            )
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        self.write_table(report)
+        for name in report['missing_scenarios']:
+            self.stderr.write(self.style.WARNING(f"No benchmark scenario for route {name!r}"))
+        for name, result in report['results'].items():
+            if result['unexpected_statuses']:
+                statuses = ', '.join(map(str, result['unexpected_statuses']))
+                self.stderr.write(self.style.ERROR(f"Route {name!r} answered {statuses}: its timings are of a failure"))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if baseline is not None:
+            regressions = benchmark.compare(baseline, report, latency_threshold=options['threshold'])
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+            for name, problem in regressions:
+                self.stdout.write(self.style.ERROR(f"REGRESSION {name}: {problem}"))
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regressions against {options['compare']}")
+
+    def write_table(self, report):
+        rows = report['rows']
+        self.stdout.write(
+            f"{rows['jobs']} jobs, {rows['applications']} applications, {rows['users']} users "
+            f"on {report['database']}, {report['iterations']} iterations"
+        )
+        header = f"{'route':<34} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'bytes':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f"{name:<34} {result['status']:>6} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries']:>8} {result['bytes']:>9}"
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from job.documents import extract_document, pending_names
+from job.models import DocumentText
+
+
+class Command(BaseCommand):
+    help = "Extract and index the text of CVs and application files that have not been processed yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help="Try files whose extraction failed before again.",
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            DocumentText.objects.filter(status='failed').update(status='pending')
+        extracted = failed = 0
+        for name in pending_names():
+            document = extract_document(name)
+            if document.status == 'done':
+                extracted += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Extracted {extracted} files, {failed} failed."))
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from job import loadtest, seeding
+
+MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how many requests one process keeps in flight under WSGI and ASGI. "
+        "Needs seeded data (manage.py seed_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+        parser.add_argument('--path', default='/api/jobs/')
+        parser.add_argument('--concurrency', type=int, default=50, help="Concurrent clients.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode.")
+        parser.add_argument('--wsgi-threads', type=int, default=1,
+                            help="Worker threads in the WSGI process (1 = gunicorn sync worker).")
+        parser.add_argument('--db-latency-ms', type=float, default=10,
+                            help="Simulated round trip added to every query.")
+        parser.add_argument('--password', default=seeding.DEFAULT_PASSWORD)
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+        results = [self.run_mode(mode, options) for mode in modes]
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(
+            f"{options['path']}: {options['concurrency']} clients, {options['requests']} requests, "
+            f"+{options['db_latency_ms']:g}ms per query, {options['wsgi_threads']} WSGI thread(s)"
+        )
+        self.stdout.write(f"{'mode':<6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'in flight':>10} {'errors':>7}")
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<6} {result['requests_per_second']:>8} {result['p50_ms']:>9} "
+                f"{result['p95_ms']:>9} {result['peak_in_flight']:>10} {result['errors']:>7}"
+            )
+
+    def run_mode(self, mode, options):
+        """Run ``mode`` in a child process, since the URLconf is fixed at import time."""
+        wants_async = mode == 'asgi'
+        if options['mode'] == mode and settings.ASYNC_VIEWS == wants_async:
+            try:
+                return loadtest.run(
+                    mode, path=options['path'], concurrency=options['concurrency'],
+                    total=options['requests'], wsgi_threads=options['wsgi_threads'],
+                    db_latency_ms=options['db_latency_ms'], password=options['password'],
+                )
+            except LookupError as exc:
+                raise CommandError(str(exc))
+
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'loadtest', '--json',
+            '--mode', mode, '--path', options['path'],
+            '--concurrency', str(options['concurrency']), '--requests', str(options['requests']),
+            '--wsgi-threads', str(options['wsgi_threads']),
+            '--db-latency-ms', str(options['db_latency_ms']), '--password', options['password'],
+        ]
+        env = dict(os.environ, DJANGO_ASYNC_VIEWS='1' if wants_async else '0')
+        child = subprocess.run(command, env=env, capture_output=True, text=True)
+        if child.returncode:
+            raise CommandError(f"The {mode} run failed:\n{child.stderr}")
+        return json.loads(child.stdout.strip().splitlines()[-1])[0]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from job.stats import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Recount the per-job application counters from the applications table."
+
+    def handle(self, *args, **options):
+        jobs = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt application counters for {jobs} jobs."))
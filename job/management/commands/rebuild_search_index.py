@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from job.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the job search index from the jobs table."
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} active jobs."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from job import recommendations
+
+
+class Command(BaseCommand):
+    help = "Rank jobs for every student and cache the results, so recommendation requests start warm."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=recommendations.DEFAULT_LIMIT,
+            help="Jobs to recommend per student (default: %(default)s).",
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Rebuild the job vectors from scratch first.",
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            recommendations.invalidate()
+        started = time.perf_counter()
+        index = recommendations.get_index()
+        indexed = time.perf_counter()
+        students = recommendations.recommend_all(options['limit'])
+        finished = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS(
+            f"Vectorised {index.size} jobs in {indexed - started:.2f}s and ranked them for "
+            f"{students} students in {finished - indexed:.2f}s."
+        ))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from job import seeding
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic employers, students, jobs and applications with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employers', type=int, default=20)
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--jobs', type=int, default=200)
+        parser.add_argument('--applications', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default=seeding.DEFAULT_PASSWORD,
+                            help="Password shared by every seeded user.")
+        parser.add_argument('--prefix', default=seeding.DEFAULT_PREFIX, help="Username prefix for seeded users.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable data.")
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help="Skip rebuilding the search index and job counters afterwards.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = seeding.seed(
+            employers=options['employers'],
+            students=options['students'],
+            jobs=options['jobs'],
+            applications=options['applications'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            prefix=options['prefix'],
+            random_seed=options['seed'],
+            rebuild=not options['no_rebuild'],
+        )
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {time.perf_counter() - started:.1f}s."))
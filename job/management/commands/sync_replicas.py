@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the SQLite read replicas, standing in "
+        "for replication in local setups (see DJANGO_SQLITE_REPLICAS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep syncing every this many seconds instead of once.")
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas are configured. Set DJANGO_SQLITE_REPLICAS.")
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                try:
+                    replicas.sync_sqlite(alias)
+                except ValueError as exc:
+                    raise CommandError(f"{alias}: {exc}")
+                self.stdout.write(f"Synced {alias}.")
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from job.search import index_job
+
+    Job = apps.get_model('job', 'Job')
+    JobSearchDocument = apps.get_model('job', 'JobSearchDocument')
+    JobSearchPosting = apps.get_model('job', 'JobSearchPosting')
+    for job in Job.objects.filter(is_active=True).iterator():
+        index_job(job, JobSearchDocument, JobSearchPosting)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchDocument',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='job.job')),
+                ('length', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField()),
+                ('positions', models.TextField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='job.job')),
+            ],
+            options={
+                'unique_together': {('term', 'job')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
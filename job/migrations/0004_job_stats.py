@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_job_stats(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    Application = apps.get_model('job', 'Application')
+    JobStats = apps.get_model('job', 'JobStats')
+    counts = {}
+    rows = Application.objects.values_list('job_id', 'status').annotate(n=Count('id')).order_by()
+    for job_id, status, n in rows:
+        entry = counts.setdefault(job_id, {'total': 0})
+        entry[status] = n
+        entry['total'] += n
+    JobStats.objects.bulk_create([
+        JobStats(job_id=job_id, **counts.get(job_id, {}))
+        for job_id in Job.objects.values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0003_job_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobStats',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='job.job')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('reviewed', models.PositiveIntegerField(default=0)),
+                ('shortlisted', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_job_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:50
+
+import users.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0004_job_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='additional_documents',
+            field=models.FileField(blank=True, null=True, storage=users.storage.ContentAddressedStorage(), upload_to='documents/'),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(storage=users.storage.ContentAddressedStorage(), upload_to='resumes/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    Application = apps.get_model('job', 'Application')
+    Application.objects.update(updated_at=F('applied_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0006_document_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
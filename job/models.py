@@ -1,12 +1,14 @@
 from django.db import models
 from django.conf import settings
 from users.models import Employer, Student
+from users.storage import blob_storage
 
 
 class Job(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     posted_on = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     type = models.CharField(max_length=200, default="")  # full time, part time
     experience = models.CharField(max_length=200, default="")
     detailed_experience = models.TextField(default="")
@@ -20,6 +22,19 @@ class Job(models.Model):
     salary_range = models.CharField(max_length=50, blank=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        # Listings order by (-posted_on, -id). Active jobs get a partial index
+        # because is_active=True compiles to a bare "WHERE is_active", which
+        # a composite index led by is_active cannot serve on SQLite.
+        indexes = [
+            models.Index(
+                fields=['posted_on', 'id'],
+                condition=models.Q(is_active=True),
+                name='job_active_posted_idx',
+            ),
+            models.Index(fields=['employer', 'posted_on', 'id'], name='job_employer_posted_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -40,14 +55,110 @@ class Application(models.Model):
         related_name="applications"
     )
     cover_letter = models.TextField()
-    resume = models.FileField(upload_to="resumes/")
-    additional_documents = models.FileField(upload_to="documents/", blank=True, null=True)
+    resume = models.FileField(upload_to="resumes/", storage=blob_storage)
+    additional_documents = models.FileField(
+        upload_to="documents/", storage=blob_storage, blank=True, null=True
+    )
     applied_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     notes = models.TextField(blank=True)
 
     class Meta:
         unique_together = ('job', 'applicant')  # Prevent duplicate applications
+        indexes = [
+            models.Index(fields=['applicant', 'applied_date', 'id'], name='app_applicant_applied_idx'),
+            models.Index(fields=['job', 'applied_date', 'id'], name='app_job_applied_idx'),
+            models.Index(fields=['job', 'status', 'applied_date'], name='app_job_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.applicant.student_id} - {self.job.title}"
+
+
+class JobSearchDocument(models.Model):
+    """Per-job entry in the search index, holding the weighted token count."""
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document"
+    )
+    length = models.PositiveIntegerField(default=0)
+
+
+class JobSearchPosting(models.Model):
+    """One stemmed term occurring in one job, with its frequency and positions."""
+    term = models.CharField(max_length=64)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="search_postings")
+    frequency = models.PositiveIntegerField()
+    positions = models.TextField()  # space separated token offsets
+
+    class Meta:
+        unique_together = ('term', 'job')
+
+    def __str__(self):
+        return f"{self.term} -> {self.job_id}"
+
+
+class JobStats(models.Model):
+    """
+    Application counters for one job, kept up to date by job/stats.py as
+    applications are created, change status or are deleted.
+    """
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+    total = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    reviewed = models.PositiveIntegerField(default=0)
+    shortlisted = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+
+    STATUS_FIELDS = [choice[0] for choice in Application.STATUS_CHOICES]
+
+    def __str__(self):
+        return f"Stats for job {self.job_id}"
+
+    def funnel(self):
+        return {
+            'total': self.total,
+            **{status: getattr(self, status) for status in self.STATUS_FIELDS},
+        }
+
+
+class DocumentText(models.Model):
+    """
+    Plain text extracted from an uploaded CV or document, keyed by the stored
+    file name. Extraction is cached per content hash (``digest``).
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    digest = models.CharField(max_length=64, db_index=True, blank=True)
+    text = models.TextField(blank=True)
+    length = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    error = models.TextField(blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DocumentTerm(models.Model):
+    """One stemmed term found in an extracted document."""
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(DocumentText, on_delete=models.CASCADE, related_name="terms")
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'document')
@@ -0,0 +1,68 @@
+"""
+Role and ownership checks for the job API.
+
+Role checks read the profiles cached on the request's user (see
+users/profiles.py). Object checks compare foreign key ids on the object
+the view already fetched, so the view's queryset must select the owner
+chain (``job`` for applications) for them to be free. Views can word
+the refusal with ``permission_denied_messages``, keyed by HTTP method
+or ``'*'``.
+"""
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+from users.profiles import employer_profile, student_profile
+
+
+class ViewMessageMixin:
+    def deny(self, request, view):
+        messages = getattr(view, 'permission_denied_messages', {})
+        message = messages.get(request.method, messages.get('*'))
+        if message:
+            self.message = message
+        return False
+
+
+class IsEmployer(ViewMessageMixin, BasePermission):
+    message = "Only employers can do this."
+
+    def has_permission(self, request, view):
+        return employer_profile(request.user) is not None or self.deny(request, view)
+
+
+class IsStudent(ViewMessageMixin, BasePermission):
+    message = "Only students can do this."
+
+    def has_permission(self, request, view):
+        return student_profile(request.user) is not None or self.deny(request, view)
+
+
+class IsJobOwnerOrReadOnly(ViewMessageMixin, BasePermission):
+    """Anyone may read a job; only the employer who posted it may change it."""
+    message = "You can only change your own job postings."
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        employer = employer_profile(request.user)
+        return (employer is not None and obj.employer_id == employer.id) or self.deny(request, view)
+
+
+class IsApplicationJobOwner(ViewMessageMixin, BasePermission):
+    """The employer who posted the application's job."""
+    message = "You can only manage applications for your own job postings."
+
+    def has_object_permission(self, request, view, obj):
+        employer = employer_profile(request.user)
+        return (employer is not None and obj.job.employer_id == employer.id) or self.deny(request, view)
+
+
+class IsApplicantOrJobOwner(ViewMessageMixin, BasePermission):
+    """The student who applied, or the employer who posted the job."""
+    message = "You do not have permission to view this application."
+
+    def has_object_permission(self, request, view, obj):
+        student = student_profile(request.user)
+        if student is not None and obj.applicant_id == student.id:
+            return True
+        employer = employer_profile(request.user)
+        return (employer is not None and obj.job.employer_id == employer.id) or self.deny(request, view)
@@ -0,0 +1,401 @@
+"""
+"Recommended for you": active jobs ranked against a student's profile.
+
+Jobs and students are TF-IDF vectors over the search tokenizer's stemmed
+terms (job/search.py). A job is its title, education, experience,
+detailed experience and description; a student is their degree and the
+text extracted from their CV (job/documents.py). Similarity is the cosine
+of the two vectors, scaled down for jobs asking for more experience than
+a student in their year of study is likely to have.
+
+The job side is precomputed once per process as a matrix with one
+L2-normalised row per active job. A student's scores against every job
+are then one matrix product, and many students are scored together in
+batches, so ranking every student costs a few matrix multiplications
+rather than a query or a loop per (student, job) pair. NumPy is used
+when it is installed; without it the same scores come from an inverted
+index in pure Python, which is slower but gives the same ranking.
+
+The matrix is refreshed incrementally: saving a job marks the index
+stale (see job/signals.py), and the next lookup re-reads only the jobs
+whose ``updated_at`` moved, reusing the vocabulary and IDF weights. The
+same check runs every ``REFRESH_INTERVAL`` seconds regardless, for jobs
+changed by queryset updates. Many changes at once, deleted jobs and bulk
+writes (``invalidate()``) rebuild it from scratch.
+
+Each student's top jobs are cached under the index version and a
+signature of their profile, so editing either one simply stops the old
+entry from being read.
+"""
+import hashlib
+import heapq
+import math
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+
+from users.models import Student
+from .models import Application, DocumentText, Job
+from .search import tokenize
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# (field, weight): each token of the field counts this many times
+JOB_FIELDS = (
+    ('title', 3), ('education', 2), ('experience', 1), ('detailed_experience', 2), ('description', 1),
+)
+DEGREE_WEIGHT = 3
+
+# Vocabulary size cap, the most widespread terms first. Keeps the dense
+# matrix at (jobs x MAX_TERMS) float32s.
+MAX_TERMS = 4096
+# Share of the index that may change before a refresh becomes a rebuild
+REBUILD_FRACTION = 0.25
+REFRESH_INTERVAL = 60
+# Students scored per matrix product
+BATCH_SIZE = 256
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+CACHE_TIMEOUT = 60 * 60
+CACHE_KEY_PREFIX = 'job-recommendations'
+GENERATION_CACHE_KEY = 'job-recommendations-generation'
+CHANGED_CACHE_KEY = 'job-recommendations-changed'
+
+YEARS_RE = re.compile(r'\d+')
+SENIOR_YEARS = ('3', '4', '5', '6')
+
+
+def job_terms(row):
+    terms = Counter()
+    for field, weight in JOB_FIELDS:
+        for token in tokenize(row[field]):
+            if token:
+                terms[token] += weight
+    return terms
+
+
+def student_terms(degree, cv_text):
+    terms = Counter()
+    for token in tokenize(degree):
+        if token:
+            terms[token] += DEGREE_WEIGHT
+    for token in tokenize(cv_text):
+        if token:
+            terms[token] += 1
+    return terms
+
+
+def required_years(experience):
+    """Years of experience a job's ``experience`` text asks for (0 for none or junior)."""
+    match = YEARS_RE.search(experience or '')
+    return int(match.group()) if match else 0
+
+
+def experience_allowance(year_of_study):
+    """Years of experience a student is credited with: senior students have usually interned."""
+    return 1 if str(year_of_study).strip() in SENIOR_YEARS else 0
+
+
+def experience_fit(years, year_of_study):
+    """Score multiplier for a job asking ``years`` of a student in ``year_of_study``."""
+    return 1.0 / (1 + max(0, years - experience_allowance(year_of_study)))
+
+
+class JobIndex:
+    """TF-IDF vectors of the active jobs, dense with NumPy or sparse without it."""
+
+    def __init__(self, rows, generation):
+        self.generation = generation
+        self.checked_at = time.monotonic()
+        self.updated_through = max((row['updated_at'] for row in rows), default=None)
+        documents = [job_terms(row) for row in rows]
+        document_frequency = Counter(term for terms in documents for term in terms)
+        kept = sorted(document_frequency, key=lambda term: (-document_frequency[term], term))[:MAX_TERMS]
+        self.vocabulary = {term: column for column, term in enumerate(kept)}
+        total = len(rows)
+        # Smoothed IDF, always positive
+        self.idf = [math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in kept]
+        self.job_ids = []
+        self.row_of = {}
+        self.years = []
+        self.vectors = []
+        for row, terms in zip(rows, documents):
+            self._set_row(row['id'], self.vector(terms), required_years(row['experience']))
+        self._pack()
+
+    def vector(self, terms):
+        """``{column: weight}``: sublinear TF times IDF, L2-normalised, terms outside the vocabulary dropped."""
+        weights = {}
+        for term, count in terms.items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                weights[column] = (1 + math.log(count)) * self.idf[column]
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {column: weight / norm for column, weight in weights.items()} if norm else {}
+
+    def _set_row(self, job_id, vector, years):
+        """Store a job's vector, appending a row for a job not seen before. Returns the row."""
+        row = self.row_of.get(job_id)
+        if row is None:
+            row = self.row_of[job_id] = len(self.job_ids)
+            self.job_ids.append(job_id)
+            self.vectors.append(vector)
+            self.years.append(years)
+        else:
+            self.vectors[row] = vector
+            self.years[row] = years
+        return row
+
+    def _pack(self, changed=None):
+        """
+        Build the structures scoring reads: a matrix with NumPy, postings
+        lists without. With NumPy, only the ``changed`` rows are written
+        into a copy of the current matrix. The matrix, the required years
+        and the job ids then replace ``packed`` in one assignment, so that
+        requests scoring meanwhile keep a consistent set.
+        """
+        if numpy is not None:
+            matrix = numpy.zeros((len(self.job_ids), len(self.vocabulary)), dtype=numpy.float32)
+            if changed is None:
+                changed = range(len(self.job_ids))
+            else:
+                current = self.packed[0]
+                matrix[:len(current)] = current
+            for row in changed:
+                vector = self.vectors[row]
+                matrix[row] = 0
+                if vector:
+                    matrix[row, list(vector)] = list(vector.values())
+            self.packed = (
+                matrix,
+                numpy.array(self.years, dtype=numpy.float32),
+                numpy.array(self.job_ids),
+            )
+        else:
+            postings = {}
+            for row, vector in enumerate(self.vectors):
+                for column, weight in vector.items():
+                    postings.setdefault(column, []).append((row, weight))
+            self.postings = postings
+
+    @property
+    def size(self):
+        return sum(1 for vector in self.vectors if vector)
+
+    @property
+    def version(self):
+        stamp = self.updated_through.timestamp() if self.updated_through else 0
+        return f"{self.generation}:{stamp:.6f}:{len(self.job_ids)}"
+
+    def apply_changes(self, rows):
+        """
+        Re-vectorise changed jobs with the current vocabulary and IDF. Jobs
+        no longer active keep their row, emptied, until the next rebuild.
+        """
+        changed = []
+        for row in rows:
+            if row['is_active']:
+                changed.append(self._set_row(row['id'], self.vector(job_terms(row)), required_years(row['experience'])))
+            elif row['id'] in self.row_of:
+                changed.append(self._set_row(row['id'], {}, 0))
+            if self.updated_through is None or row['updated_at'] > self.updated_through:
+                self.updated_through = row['updated_at']
+        self._pack(changed)
+
+    def score(self, profiles, exclude, limit):
+        """
+        ``{student_id: [(job_id, score), ...]}``, the best ``limit`` first,
+        for ``profiles`` of ``(student_id, terms, year_of_study)``, leaving
+        out the job ids in ``exclude[student_id]``.
+        """
+        if numpy is not None:
+            return self._score_matrix(profiles, exclude, limit)
+        return {
+            student_id: self._score_sparse(self.vector(terms), year, limit, exclude.get(student_id, ()))
+            for student_id, terms, year in profiles
+        }
+
+    def _score_matrix(self, profiles, exclude, limit):
+        # Read once: a refresh may publish new arrays while this runs. Rows
+        # only ever get appended, so rows past this snapshot are skipped.
+        matrix, year_array, job_id_array = self.packed
+        job_ids = job_id_array.tolist()
+        results = {}
+        limit = min(limit, len(job_ids))
+        for start in range(0, len(profiles), BATCH_SIZE):
+            batch = profiles[start:start + BATCH_SIZE]
+            students = numpy.zeros((len(batch), len(self.vocabulary)), dtype=numpy.float32)
+            allowances = numpy.zeros((len(batch), 1), dtype=numpy.float32)
+            for i, (student_id, terms, year) in enumerate(batch):
+                vector = self.vector(terms)
+                if vector:
+                    students[i, list(vector)] = list(vector.values())
+                allowances[i, 0] = experience_allowance(year)
+            # (students x terms) @ (terms x jobs), then the experience fit per pair
+            scores = students @ matrix.T
+            scores /= 1 + numpy.maximum(0, year_array[numpy.newaxis, :] - allowances)
+            for i, (student_id, _, _) in enumerate(batch):
+                rows = [
+                    row for row in map(self.row_of.get, exclude.get(student_id, ()))
+                    if row is not None and row < len(job_ids)
+                ]
+                scores[i, rows] = 0
+            if limit == 0:
+                top = numpy.zeros((len(batch), 0), dtype=numpy.intp)
+            elif limit < len(job_ids):
+                top = numpy.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+            else:
+                top = numpy.broadcast_to(numpy.arange(limit), (len(batch), limit))
+            top_scores = numpy.take_along_axis(scores, top, axis=1)
+            # Best first, ties by job id
+            order = numpy.lexsort((job_id_array[top], -top_scores), axis=1)
+            top = numpy.take_along_axis(top, order, axis=1)
+            top_scores = numpy.take_along_axis(top_scores, order, axis=1)
+            for (student_id, _, _), rows, row_scores in zip(batch, top.tolist(), top_scores.tolist()):
+                results[student_id] = [
+                    (job_ids[row], round(score, 6)) for row, score in zip(rows, row_scores) if score > 0
+                ]
+        return results
+
+    def _score_sparse(self, vector, year, limit, excluded):
+        scores = {}
+        for column, weight in vector.items():
+            for row, job_weight in self.postings.get(column, ()):
+                scores[row] = scores.get(row, 0.0) + weight * job_weight
+        ranked = heapq.nsmallest(limit, (
+            (-score * experience_fit(self.years[row], year), self.job_ids[row])
+            for row, score in scores.items()
+            if score > 0 and self.job_ids[row] not in excluded
+        ))
+        return [(job_id, round(-score, 6)) for score, job_id in ranked]
+
+
+def _job_rows(queryset):
+    return list(queryset.values('id', 'updated_at', 'is_active', *[field for field, _ in JOB_FIELDS]))
+
+
+_index = None
+_lock = threading.Lock()
+_changed_seen = None
+
+
+def get_index():
+    """The current JobIndex, refreshed or rebuilt first if jobs changed."""
+    global _index, _changed_seen
+    generation = cache.get(GENERATION_CACHE_KEY)
+    changed = cache.get(CHANGED_CACHE_KEY)
+    with _lock:
+        index = _index
+        if generation is None:
+            # Evicted (or never set): carry on with this process's index
+            generation = index.generation if index is not None else new_generation()
+            cache.add(GENERATION_CACHE_KEY, generation, None)
+        if index is None or index.generation != generation:
+            index = JobIndex(_job_rows(Job.objects.filter(is_active=True)), generation)
+        elif changed != _changed_seen or time.monotonic() - index.checked_at > REFRESH_INTERVAL:
+            index = _refreshed(index)
+        _index, _changed_seen = index, changed
+        return index
+
+
+def _refreshed(index):
+    index.checked_at = time.monotonic()
+    changes = Job.objects.all()
+    if index.updated_through is not None:
+        changes = changes.filter(updated_at__gt=index.updated_through)
+    # One extra row tells a big change set from a small one
+    threshold = max(1, int(len(index.job_ids) * REBUILD_FRACTION))
+    rows = _job_rows(changes.order_by('updated_at')[:threshold + 1])
+    if len(rows) > threshold or not index.vocabulary:
+        return JobIndex(_job_rows(Job.objects.filter(is_active=True)), index.generation)
+    if rows:
+        index.apply_changes(rows)
+    return index
+
+
+def job_changed():
+    """Mark the index stale after a job was saved; the next lookup re-reads changed jobs."""
+    cache.set(CHANGED_CACHE_KEY, time.time_ns(), None)
+
+
+def new_generation():
+    return uuid.uuid4().hex[:12]
+
+
+def invalidate():
+    """Rebuild the index from scratch on next use (jobs deleted or bulk-written)."""
+    cache.set(GENERATION_CACHE_KEY, new_generation(), None)
+
+
+def _profiles(students):
+    """``(student, signature, terms)`` per student, with CV texts read in one query."""
+    cv_names = [student.cv.name for student in students if student.cv]
+    texts = dict(
+        DocumentText.objects.filter(name__in=cv_names, status='done').values_list('name', 'text')
+    ) if cv_names else {}
+    profiles = []
+    for student in students:
+        text = texts.get(student.cv.name, '') if student.cv else ''
+        signature = hashlib.sha256(
+            f"{student.degree}\0{student.year_of_study}\0{student.cv.name if student.cv else ''}\0{bool(text)}".encode()
+        ).hexdigest()[:16]
+        profiles.append((student, signature, student_terms(student.degree, text)))
+    return profiles
+
+
+def _cache_key(index, student, signature, limit):
+    return f"{CACHE_KEY_PREFIX}:{index.version}:{student.pk}:{signature}:{limit}"
+
+
+def recommend_many(students, limit=DEFAULT_LIMIT):
+    """
+    ``{student_id: [(job_id, score), ...]}``: each student's best ``limit``
+    active jobs they have not applied to, best first. Cached per student.
+    """
+    students = list(students)
+    if not students:
+        return {}
+    index = get_index()
+    profiles = _profiles(students)
+    keys = {student.pk: _cache_key(index, student, signature, limit) for student, signature, _ in profiles}
+    cached = cache.get_many(list(keys.values()))
+    results = {student_id: cached[key] for student_id, key in keys.items() if key in cached}
+
+    missing = [profile for profile in profiles if profile[0].pk not in results]
+    if missing:
+        exclude = {}
+        applied = Application.objects.filter(applicant__in=[student for student, _, _ in missing])
+        for student_id, job_id in applied.values_list('applicant_id', 'job_id'):
+            exclude.setdefault(student_id, set()).add(job_id)
+        profiles = [(student.pk, terms, student.year_of_study) for student, _, terms in missing]
+        scored = index.score(profiles, exclude, limit)
+        results.update(scored)
+        cache.set_many({keys[student_id]: ranked for student_id, ranked in scored.items()}, CACHE_TIMEOUT)
+    return results
+
+
+def recommend(student, limit=DEFAULT_LIMIT):
+    return recommend_many([student], limit)[student.pk]
+
+
+def recommend_all(limit=DEFAULT_LIMIT, batch_size=1000):
+    """Compute (and cache) recommendations for every student. Returns how many students were scored."""
+    total = 0
+    students = Student.objects.order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(students.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return total
+        recommend_many(batch, limit)
+        total += len(batch)
+        last_pk = batch[-1].pk
@@ -0,0 +1,253 @@
+"""
+Inverted index and BM25 ranking for job search.
+
+Each active job is tokenized into a stream of stemmed terms. The index keeps
+one posting row per (term, job) with the term frequency and the term's token
+positions, so a search only reads the postings for the terms in the query.
+Quoted parts of a query ("data science") must appear as consecutive tokens.
+"""
+import math
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Case, Count, IntegerField, Value, When
+
+# BM25 tuning constants
+K1 = 1.2
+B = 0.75
+
+# Title matches count this many times towards the term frequency
+TITLE_WEIGHT = 3
+
+# Token gap between fields so phrases never match across two fields
+FIELD_GAP = 100
+
+MAX_RESULTS = 1000
+MAX_TERM_LENGTH = 64
+
+STATS_CACHE_KEY = 'job-search-stats'
+STATS_CACHE_TIMEOUT = 300
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have in is it its of on or our
+    that the their this to was we were will with you your
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+|(?:'[a-z]+))?")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+# Longest suffixes first; each entry is (suffix, replacement)
+SUFFIXES = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'),
+    ('iveness', 'ive'), ('ousness', 'ous'), ('ments', ''), ('ment', ''),
+    ('ness', ''), ('ings', ''), ('ing', ''), ('ies', 'y'), ('ied', 'y'),
+    ('ers', ''), ('er', ''), ('edly', ''), ('ed', ''), ('ly', ''),
+    ('es', ''), ('s', ''),
+)
+
+
+def stem(word):
+    """Strip common English suffixes, keeping at least three characters of stem."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == 's' and word.endswith('ss'):
+                return word
+            word = word[:-len(suffix)] + replacement
+            # "planning" -> "plann" -> "plan"
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    # "experience" and "experienced" share the stem "experienc"
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercase, split and stem ``text``. Stop words keep their position slot."""
+    tokens = []
+    for match in TOKEN_RE.finditer((text or '').lower()):
+        word = match.group().replace("'", '')
+        tokens.append(None if word in STOP_WORDS else stem(word)[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def analyze_job(job):
+    """
+    Return ``(length, postings)`` for a job, where postings maps each term to
+    ``(weighted_frequency, positions)``.
+    """
+    postings = {}
+    offset = 0
+    length = 0
+    fields = (
+        (job.title, TITLE_WEIGHT),
+        (job.description, 1),
+        (job.detailed_experience, 1),
+    )
+    for text, weight in fields:
+        tokens = tokenize(text)
+        for position, term in enumerate(tokens):
+            if term is None:
+                continue
+            frequency, positions = postings.get(term, (0, []))
+            positions.append(offset + position)
+            postings[term] = (frequency + weight, positions)
+            length += weight
+        offset += len(tokens) + FIELD_GAP
+    return length, postings
+
+
+def index_job(job, document_model=None, posting_model=None):
+    """
+    Replace the index entries for ``job``. Inactive jobs are removed from the
+    index. The model arguments let migrations pass their historical models.
+    """
+    if document_model is None:
+        from .models import JobSearchDocument as document_model
+    if posting_model is None:
+        from .models import JobSearchPosting as posting_model
+
+    with transaction.atomic():
+        posting_model.objects.filter(job_id=job.pk).delete()
+        if not job.is_active:
+            document_model.objects.filter(job_id=job.pk).delete()
+        else:
+            length, postings = analyze_job(job)
+            document_model.objects.update_or_create(job_id=job.pk, defaults={'length': length})
+            posting_model.objects.bulk_create([
+                posting_model(
+                    job_id=job.pk,
+                    term=term,
+                    frequency=frequency,
+                    positions=' '.join(str(p) for p in positions),
+                )
+                for term, (frequency, positions) in postings.items()
+            ])
+    invalidate_stats()
+
+
+def invalidate_stats():
+    """Forget the cached collection statistics after the index changes."""
+    cache.delete(STATS_CACHE_KEY)
+
+
+def rebuild_index():
+    """Reindex every job. Returns the number of active jobs indexed."""
+    from .models import Job, JobSearchDocument, JobSearchPosting
+
+    with transaction.atomic():
+        JobSearchPosting.objects.all().delete()
+        JobSearchDocument.objects.all().delete()
+        indexed = 0
+        for job in Job.objects.filter(is_active=True).iterator(chunk_size=500):
+            index_job(job)
+            indexed += 1
+    invalidate_stats()
+    return indexed
+
+
+def collection_stats():
+    """Return ``(document_count, average_length)``, cached between index changes."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        from .models import JobSearchDocument
+
+        totals = JobSearchDocument.objects.aggregate(count=Count('job_id'), avg=Avg('length'))
+        stats = (totals['count'] or 0, totals['avg'] or 0.0)
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def parse_query(query):
+    """
+    Split a query into ``(terms, phrases)``. Phrases are lists of
+    ``(offset, term)`` pairs; stop words keep their slot in the offsets, as
+    they do in the indexed positions.
+    """
+    phrases = []
+    for text in PHRASE_RE.findall(query):
+        phrase = [(offset, term) for offset, term in enumerate(tokenize(text)) if term is not None]
+        if len(phrase) > 1:
+            first = phrase[0][0]
+            phrases.append([(offset - first, term) for offset, term in phrase])
+    terms = [term for term in tokenize(query.replace('"', ' ')) if term is not None]
+    return list(dict.fromkeys(terms)), phrases
+
+
+def _contains_phrase(positions, phrase):
+    """True if the terms of ``phrase`` appear at their offsets from a common start."""
+    starts = positions[phrase[0][1]]
+    for offset, term in phrase[1:]:
+        following = positions[term]
+        starts = {start for start in starts if start + offset in following}
+        if not starts:
+            return False
+    return True
+
+
+def search_job_ids(query, limit=MAX_RESULTS):
+    """
+    Return the ids of active jobs matching every term of ``query``, best
+    match first. Returns ``None`` when the query has no words at all, and
+    no ids when its words are all stop words.
+    """
+    from .models import JobSearchPosting
+
+    terms, phrases = parse_query(query)
+    if not terms:
+        return [] if tokenize(query) else None
+
+    matches = {}
+    for job_id, term, frequency, positions, length in (
+        JobSearchPosting.objects
+        .filter(term__in=terms)
+        .values_list('job_id', 'term', 'frequency', 'positions', 'job__search_document__length')
+    ):
+        entry = matches.setdefault(job_id, {'length': length or 0, 'terms': {}})
+        entry['terms'][term] = (frequency, positions)
+
+    document_frequency = dict.fromkeys(terms, 0)
+    for entry in matches.values():
+        for term in entry['terms']:
+            document_frequency[term] += 1
+
+    document_count, average_length = collection_stats()
+    document_count = max(document_count, len(matches))
+    average_length = average_length or 1.0
+
+    scores = []
+    for job_id, entry in matches.items():
+        found = entry['terms']
+        if len(found) < len(terms):
+            continue
+        if phrases:
+            positions = {
+                term: {int(p) for p in found[term][1].split()}
+                for term in found
+            }
+            if not all(_contains_phrase(positions, phrase) for phrase in phrases):
+                continue
+        normalizer = K1 * (1 - B + B * entry['length'] / average_length)
+        score = 0.0
+        for term, (frequency, _) in found.items():
+            df = document_frequency[term]
+            idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+            score += idf * frequency * (K1 + 1) / (frequency + normalizer)
+        scores.append((-score, job_id))
+
+    scores.sort()
+    return [job_id for _, job_id in scores[:limit]]
+
+
+def rank_expression(job_ids):
+    """An expression giving each job its position in ``job_ids``."""
+    if not job_ids:
+        return Value(0, output_field=IntegerField())
+    return Case(
+        *[When(id=job_id, then=rank) for rank, job_id in enumerate(job_ids)],
+        output_field=IntegerField(),
+    )
@@ -0,0 +1,182 @@
+"""
+Synthetic data for load testing and benchmarks (``manage.py seed_data``).
+
+Rows are written with bulk_create in batches, so model signals do not run:
+profiles are created here the way users.signals.create_profile would, and
+the search index and per-job counters are rebuilt once at the end instead
+of once per row. All seeded users share one password, hashed once.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import User, Student, Employer
+from .models import Job, Application
+from . import recommendations, search, stats, summary
+
+DEFAULT_PASSWORD = 'benchmark'
+DEFAULT_PREFIX = 'seed'
+
+FIRST_NAMES = [
+    'Thabo', 'Lerato', 'Sipho', 'Naledi', 'Pieter', 'Anika', 'Kagiso', 'Zanele',
+    'Johan', 'Ayesha', 'Lwazi', 'Marike', 'Tumelo', 'Refilwe', 'Jaco', 'Nomsa',
+]
+LAST_NAMES = [
+    'Mokoena', 'Nkosi', 'Botha', 'Dlamini', 'van der Merwe', 'Naidoo', 'Molefe',
+    'Pretorius', 'Khumalo', 'Smit', 'Mahlangu', 'Venter',
+]
+COMPANIES = [
+    'Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay',
+    'Soylent', 'Cyberdyne', 'Tyrell', 'Wonka',
+]
+INDUSTRIES = ['Software', 'Finance', 'Mining', 'Retail', 'Healthcare', 'Education', 'Telecoms', 'Logistics']
+TITLES = [
+    'Graduate Developer', 'Data Analyst', 'Junior Accountant', 'Mining Engineer',
+    'Marketing Intern', 'UX Designer', 'Network Technician', 'Business Analyst',
+    'Software Tester', 'HR Assistant', 'Data Scientist', 'DevOps Engineer',
+]
+SKILLS = [
+    'Python', 'Django', 'SQL', 'Excel', 'Java', 'React', 'Linux', 'Docker',
+    'communication', 'teamwork', 'statistics', 'AutoCAD', 'accounting', 'Figma',
+]
+LOCATIONS = ['Potchefstroom', 'Johannesburg', 'Pretoria', 'Cape Town', 'Durban', 'Mahikeng', 'Vanderbijlpark']
+JOB_TYPES = ['Full Time', 'Part Time', 'Internship', 'Contract']
+EXPERIENCE = ['None', 'Junior', '1-2 years', '3+ years']
+DEGREES = ['BSc Computer Science', 'BCom Accounting', 'BEng Mining', 'BA Psychology', 'BSc IT']
+STATUS_WEIGHTS = [
+    ('pending', 50), ('reviewed', 20), ('shortlisted', 12), ('rejected', 15), ('accepted', 3),
+]
+
+# Posting and application dates are spread over this period
+HISTORY = timedelta(days=365)
+
+
+def _batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _bulk_create(model, rows, batch_size):
+    created = []
+    for batch in _batches(rows, batch_size):
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+def _users(prefix, role, count, start, password, rng):
+    users = []
+    for i in range(start, start + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f"{prefix}-{role}-{i}"
+        users.append(User(
+            username=username,
+            email=f"{username}@example.com",
+            first_name=first,
+            last_name=last,
+            role=role,
+            password=password,
+        ))
+    return users
+
+
+def _description(rng):
+    skills = ', '.join(rng.sample(SKILLS, 4))
+    return (
+        f"Join our team and work with {skills}. You will learn from experienced "
+        f"colleagues, take ownership of real projects and grow your career."
+    )
+
+
+def seed(employers=20, students=500, jobs=200, applications=2000, batch_size=1000,
+         password=DEFAULT_PASSWORD, prefix=DEFAULT_PREFIX, random_seed=0, rebuild=True):
+    """
+    Insert the requested numbers of rows and return the counts created.
+    Usernames are ``<prefix>-<role>-<n>`` and continue after earlier seeded
+    users with the same prefix, so the command can be run repeatedly.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    hashed = make_password(password)
+    start = User.objects.filter(username__startswith=f"{prefix}-").count()
+
+    with transaction.atomic():
+        employer_users = _bulk_create(User, _users(prefix, 'employer', employers, start, hashed, rng), batch_size)
+        student_users = _bulk_create(User, _users(prefix, 'student', students, start + employers, hashed, rng), batch_size)
+
+        employer_rows = _bulk_create(Employer, [
+            Employer(
+                user=user,
+                employer_id=f"EMP{user.pk:04d}",
+                company_name=f"{rng.choice(COMPANIES)} {user.last_name}",
+                industry=rng.choice(INDUSTRIES),
+            )
+            for user in employer_users
+        ], batch_size)
+        student_rows = _bulk_create(Student, [
+            Student(
+                user=user,
+                student_id=f"STU{user.pk:04d}",
+                degree=rng.choice(DEGREES),
+                year_of_study=str(rng.randint(1, 4)),
+            )
+            for user in student_users
+        ], batch_size)
+
+        job_rows = []
+        if employer_rows:
+            job_rows = _bulk_create(Job, [
+                Job(
+                    employer=rng.choice(employer_rows),
+                    title=rng.choice(TITLES),
+                    description=_description(rng),
+                    type=rng.choice(JOB_TYPES),
+                    experience=rng.choice(EXPERIENCE),
+                    detailed_experience=f"Experience with {rng.choice(SKILLS)} is a plus.",
+                    location=rng.choice(LOCATIONS),
+                    salary_range=f"R{rng.randint(8, 25)}k - R{rng.randint(26, 45)}k",
+                    is_active=rng.random() < 0.85,
+                )
+                for _ in range(jobs)
+            ], batch_size)
+            # auto_now_add fields are stamped on insert, so backdate afterwards
+            for job in job_rows:
+                job.posted_on = job.updated_at = now - HISTORY * rng.random()
+            Job.objects.bulk_update(job_rows, ['posted_on', 'updated_at'], batch_size=batch_size)
+
+        application_rows = []
+        pairs = set()
+        applications = min(applications, len(job_rows) * len(student_rows))
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        while len(pairs) < applications:
+            job, student = rng.choice(job_rows), rng.choice(student_rows)
+            if (job.pk, student.pk) in pairs:
+                continue
+            pairs.add((job.pk, student.pk))
+            application_rows.append(Application(
+                job=job,
+                applicant=student,
+                cover_letter=f"I would love to work as a {job.title.lower()}.",
+                status=rng.choices(statuses, weights)[0],
+            ))
+        application_rows = _bulk_create(Application, application_rows, batch_size)
+        for application in application_rows:
+            posted_on = application.job.posted_on
+            application.applied_date = application.updated_at = posted_on + (now - posted_on) * rng.random()
+        Application.objects.bulk_update(application_rows, ['applied_date', 'updated_at'], batch_size=batch_size)
+
+    if rebuild:
+        search.rebuild_index()
+        stats.rebuild_all()
+    summary.invalidate()
+    recommendations.invalidate()
+
+    return {
+        'employers': len(employer_rows),
+        'students': len(student_rows),
+        'jobs': len(job_rows),
+        'applications': len(application_rows),
+    }
@@ -1,22 +1,59 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Job, Application
-from users.serializers import StudentSerializer, EmployerSerializer
+from users.serializers import DownloadURLField, StudentSerializer, EmployerSerializer
+from metrics.timing import TimedSerializerMixin
+from users.profiles import employer_profile, student_profile
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email']
 
-class JobSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Drops fields not named in ``?fields=`` (passed in as the ``fields``
+    context entry). Only applies to the top-level serializer, so nested
+    serializers keep their own shape.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested and self._is_top_level():
+            for name in list(fields):
+                if name not in requested:
+                    fields.pop(name)
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (
+            isinstance(parent, serializers.ListSerializer) and parent.parent is None
+        )
+
+
+class JobSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Lightweight job representation used when nesting a job in another resource"""
+    company = serializers.CharField(source='employer.company_name', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'title', 'company', 'location']
+
+
+class JobSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     employer = EmployerSerializer(read_only=True)
     applications_count = serializers.SerializerMethodField()
     user_has_applied = serializers.SerializerMethodField() 
     
     def get_user_has_applied(self, obj):
+        applied_job_ids = self.context.get('applied_job_ids')
+        if applied_job_ids is not None:
+            return obj.id in applied_job_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            student = getattr(request.user, 'student_profile', None)
+            student = student_profile(request.user)
             if student:
                 return Application.objects.filter(job=obj, applicant=student).exists()
         return False
@@ -31,12 +68,35 @@ class JobSerializer(serializers.ModelSerializer):
         read_only_fields = ['posted_on']
     
     def get_applications_count(self, obj):
+        annotated = getattr(obj, 'applications_count', None)
+        if annotated is not None:
+            return annotated
         return obj.applications.count()
 
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class RecommendedJobSerializer(JobSerializer):
+    """A job with its similarity to the requesting student's profile, 0 to 1"""
+    match_score = serializers.FloatField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['match_score']
+
+
+def application_file_kwargs(application, field):
+    return {'application_id': application.pk, 'field': field}
+
+
+class ApplicationSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     applicant = StudentSerializer(read_only=True)
-    job = JobSerializer(read_only=True)
+    job = JobSummarySerializer(read_only=True)
+    resume = DownloadURLField('application-file', application_file_kwargs)
+    additional_documents = DownloadURLField('application-file', application_file_kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'job' in fields and 'job' in self.context.get('expand', ()):
+            fields['job'] = JobSerializer(read_only=True)
+        return fields
     
     class Meta:
         model = Application
@@ -59,19 +119,19 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         user = self.context['request'].user
-        if not hasattr(user, 'student_profile'):
+        if student_profile(user) is None:
             raise serializers.ValidationError("Only students can apply for jobs.")
         return data
 
     def create(self, validated_data):
         user = self.context['request'].user
-        student_profile = user.student_profile
+        student = student_profile(user)
         
         application = Application.objects.create(
-            applicant=student_profile,
+            applicant=student,
             job=validated_data['job'],
             cover_letter=validated_data['cover_letter'],
-            resume=student_profile.cv,  # automatically use student's CV
+            resume=student.cv,  # automatically use student's CV
             additional_documents=validated_data.get('additional_documents')
         )
         return application
@@ -88,6 +148,23 @@ class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Status must be one of: {valid_statuses}")
         return value
 
+class ApplicationBulkStatusItemSerializer(serializers.Serializer):
+    # Bounded to the range of the id column so larger ids are invalid, not a database error
+    application_id = serializers.IntegerField(min_value=1, max_value=2**63 - 1)
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class ApplicationBulkStatusUpdateSerializer(serializers.Serializer):
+    MAX_ITEMS = 1000
+
+    updates = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_ITEMS,
+    )
+
+
 class JobCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Job
@@ -107,12 +184,12 @@ class JobCreateSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        employer = self.context['request'].user.employer_profile
+        employer = employer_profile(self.context['request'].user)
         job = Job.objects.create(employer=employer, **validated_data)
         return job
     
     def validate(self, data):
         user = self.context['request'].user
-        if not hasattr(user, 'employer_profile'):
+        if employer_profile(user) is None:
             raise serializers.ValidationError("Only employers can create jobs.")
         return data
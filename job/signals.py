@@ -0,0 +1,112 @@
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from users import storage as blob_storage
+from users.models import User, Student, Employer
+from .models import Job, Application
+from . import recommendations, search, stats, summary, tasks
+
+APPLICATION_FILE_FIELDS = ['resume', 'additional_documents']
+
+
+@receiver(post_save, sender=Job)
+def update_search_index(sender, instance, **kwargs):
+    search.index_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def remove_from_search_index(sender, instance, **kwargs):
+    # Postings and the document row are removed by the cascade
+    search.invalidate_stats()
+
+
+@receiver(post_save, sender=Job)
+def refresh_recommendations(sender, instance, **kwargs):
+    recommendations.job_changed()
+
+
+@receiver(post_delete, sender=Job)
+def rebuild_recommendations(sender, instance, **kwargs):
+    recommendations.invalidate()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Employer)
+@receiver(post_delete, sender=Employer)
+def invalidate_homepage(sender, **kwargs):
+    summary.invalidate()
+
+
+# Jobs embed their employer and applications embed their applicant, so
+# profile changes must move the updated_at their ETags are built from
+@receiver(post_save, sender=Employer)
+def touch_employer_jobs(sender, instance, created, **kwargs):
+    if not created:
+        Job.objects.filter(employer=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Student)
+def touch_student_applications(sender, instance, created, **kwargs):
+    if not created:
+        Application.objects.filter(applicant=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def touch_user_resources(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login', 'password'}):
+        return
+    now = timezone.now()
+    Job.objects.filter(employer__user=instance).update(updated_at=now)
+    Application.objects.filter(applicant__user=instance).update(updated_at=now)
+
+
+@receiver(post_init, sender=Application)
+def remember_application_status(sender, instance, **kwargs):
+    # Not instance.status: with status deferred that is a query per row
+    instance._saved_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=Application)
+@receiver(pre_delete, sender=Application)
+def load_deferred_application_status(sender, instance, **kwargs):
+    # Loaded with status deferred: the counters need the stored status
+    if instance._saved_status is None and instance.pk is not None and not instance._state.adding:
+        instance._saved_status = (
+            Application.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Application)
+def count_application_save(sender, instance, created, **kwargs):
+    if created:
+        stats.application_created(instance)
+    else:
+        stats.status_changed(instance.job_id, instance._saved_status, instance.status)
+    instance._saved_status = instance.status
+
+
+@receiver(post_delete, sender=Application)
+def count_application_delete(sender, instance, **kwargs):
+    stats.application_deleted(instance, status=instance._saved_status)
+
+
+@receiver(post_init, sender=Application)
+def remember_application_files(sender, instance, **kwargs):
+    blob_storage.remember_files(instance, APPLICATION_FILE_FIELDS)
+
+
+@receiver(post_save, sender=Application)
+def count_application_file_references(sender, instance, created, **kwargs):
+    blob_storage.update_references(instance, APPLICATION_FILE_FIELDS, created=created)
+
+
+@receiver(post_delete, sender=Application)
+def release_application_file_references(sender, instance, **kwargs):
+    blob_storage.release_references(instance, APPLICATION_FILE_FIELDS)
+
+
+@receiver(blob_storage.file_changed)
+def queue_document_text(sender, name, **kwargs):
+    # Student CVs and application files are parsed by the task worker
+    tasks.extract_document_text.enqueue(name)
@@ -0,0 +1,125 @@
+"""
+Incrementally maintained application counters per job (JobStats).
+
+Signals in job/signals.py call into this module so each application create,
+status change or delete adjusts the counters with a single UPDATE. Code that
+bypasses model signals (``bulk_update``, ``QuerySet.update``) must call
+``apply_status_changes`` itself.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Application, JobStats
+
+STATUS_FIELDS = JobStats.STATUS_FIELDS
+
+
+def _adjust(job_id, deltas, rebuild_missing=True):
+    """Add ``deltas`` ({field: amount}) to a job's counters, rebuilding if missing."""
+    changes = {field: F(field) + amount for field, amount in deltas.items() if amount}
+    if not changes:
+        return
+    updated = JobStats.objects.filter(job_id=job_id).update(**changes)
+    if not updated and rebuild_missing:
+        rebuild_job(job_id)
+
+
+def application_created(application):
+    _adjust(application.job_id, {'total': 1, application.status: 1})
+
+
+def application_deleted(application, status=None):
+    # No rebuild here: the row is also missing while the job itself is being deleted
+    _adjust(application.job_id, {'total': -1, status or application.status: -1}, rebuild_missing=False)
+
+
+def status_changed(job_id, old_status, new_status):
+    if old_status != new_status:
+        _adjust(job_id, {old_status: -1, new_status: 1})
+
+
+def apply_status_changes(changes):
+    """
+    Apply many ``(job_id, old_status, new_status)`` transitions with one
+    UPDATE per affected job. Used by bulk status updates.
+    """
+    per_job = {}
+    for job_id, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        deltas = per_job.setdefault(job_id, Counter())
+        deltas[old_status] -= 1
+        deltas[new_status] += 1
+    for job_id, deltas in per_job.items():
+        _adjust(job_id, deltas)
+
+
+def _counts_by_job(job_ids=None):
+    rows = Application.objects.values_list('job_id', 'status').annotate(n=Count('id')).order_by()
+    if job_ids is not None:
+        rows = rows.filter(job_id__in=job_ids)
+    counts = {}
+    for job_id, status, n in rows:
+        entry = counts.setdefault(job_id, dict.fromkeys(['total', *STATUS_FIELDS], 0))
+        entry[status] = n
+        entry['total'] += n
+    return counts
+
+
+def rebuild_job(job_id):
+    """Recount one job's counters from its applications."""
+    counts = _counts_by_job([job_id]).get(job_id, {})
+    defaults = {field: counts.get(field, 0) for field in ['total', *STATUS_FIELDS]}
+    JobStats.objects.update_or_create(job_id=job_id, defaults=defaults)
+
+
+def rebuild_all():
+    """Recount every job's counters from scratch. Returns the number of jobs."""
+    from .models import Job
+
+    with transaction.atomic():
+        counts = _counts_by_job()
+        job_ids = list(Job.objects.values_list('id', flat=True))
+        JobStats.objects.all().delete()
+        JobStats.objects.bulk_create([
+            JobStats(job_id=job_id, **counts.get(job_id, {}))
+            for job_id in job_ids
+        ], batch_size=500)
+    return len(job_ids)
+
+
+def employer_summary(employer):
+    """
+    Per-job funnels and employer totals for ``employer``, read from the
+    counters in one query.
+    """
+    jobs = []
+    totals = dict.fromkeys(['total', *STATUS_FIELDS], 0)
+    active_jobs = 0
+    rows = (
+        employer.jobs
+        .select_related('stats')
+        .only('id', 'title', 'is_active', 'employer', *[f'stats__{field}' for field in ['total', *STATUS_FIELDS]])
+        .order_by('-posted_on', '-id')
+    )
+    for job in rows:
+        stats = getattr(job, 'stats', None)
+        funnel = stats.funnel() if stats else dict.fromkeys(['total', *STATUS_FIELDS], 0)
+        for field, value in funnel.items():
+            totals[field] += value
+        active_jobs += job.is_active
+        jobs.append({
+            'id': job.id,
+            'title': job.title,
+            'is_active': job.is_active,
+            'applications': funnel,
+        })
+    return {
+        'total_jobs': len(jobs),
+        'active_jobs': active_jobs,
+        'total_applications': totals['total'],
+        'applications_by_status': {status: totals[status] for status in STATUS_FIELDS},
+        'jobs': jobs,
+    }
@@ -0,0 +1,99 @@
+"""
+Cached homepage data: featured jobs and live category/industry counts.
+
+Both are rebuilt on the first request after a job or employer changes (see
+job/signals.py), so the homepage normally renders without touching the
+database.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Job
+
+FEATURED_JOBS_CACHE_KEY = 'home-featured-jobs'
+CATEGORY_COUNTS_CACHE_KEY = 'home-category-counts'
+CACHE_TIMEOUT = 60 * 60
+
+FEATURED_JOBS_LIMIT = 6
+
+
+def featured_jobs():
+    """The most recently posted active jobs, with their employers loaded."""
+    jobs = cache.get(FEATURED_JOBS_CACHE_KEY)
+    if jobs is None:
+        jobs = list(_featured_jobs_queryset())
+        cache.set(FEATURED_JOBS_CACHE_KEY, jobs, CACHE_TIMEOUT)
+    return jobs
+
+
+async def afeatured_jobs():
+    """featured_jobs() through the async cache and ORM APIs."""
+    jobs = await cache.aget(FEATURED_JOBS_CACHE_KEY)
+    if jobs is None:
+        jobs = [job async for job in _featured_jobs_queryset()]
+        await cache.aset(FEATURED_JOBS_CACHE_KEY, jobs, CACHE_TIMEOUT)
+    return jobs
+
+
+def category_counts():
+    """
+    Active job counts per employer industry and per job type, from a single
+    grouped query. Returns ``{'industries': [...], 'types': [...]}`` with each
+    list holding ``{'name', 'job_count'}`` dicts, largest first.
+    """
+    counts = cache.get(CATEGORY_COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = _group_counts(list(_category_counts_queryset()))
+        cache.set(CATEGORY_COUNTS_CACHE_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+async def acategory_counts():
+    """category_counts() through the async cache and ORM APIs."""
+    counts = await cache.aget(CATEGORY_COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = _group_counts([row async for row in _category_counts_queryset()])
+        await cache.aset(CATEGORY_COUNTS_CACHE_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+def _featured_jobs_queryset():
+    return (
+        Job.objects.filter(is_active=True)
+        .select_related('employer')
+        .order_by('-posted_on', '-id')[:FEATURED_JOBS_LIMIT]
+    )
+
+
+def _category_counts_queryset():
+    return (
+        Job.objects.filter(is_active=True)
+        .values_list('employer__industry', 'type')
+        .annotate(job_count=Count('id'))
+        .order_by()
+    )
+
+
+def _group_counts(rows):
+    industries = {}
+    types = {}
+    for industry, job_type, job_count in rows:
+        industry = (industry or '').strip() or 'Other'
+        job_type = (job_type or '').strip() or 'Other'
+        industries[industry] = industries.get(industry, 0) + job_count
+        types[job_type] = types.get(job_type, 0) + job_count
+    return {
+        'industries': _ranked(industries),
+        'types': _ranked(types),
+    }
+
+
+def invalidate():
+    cache.delete_many([FEATURED_JOBS_CACHE_KEY, CATEGORY_COUNTS_CACHE_KEY])
+
+
+def _ranked(counts):
+    return [
+        {'name': name, 'job_count': job_count}
+        for name, job_count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    ]
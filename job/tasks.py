@@ -0,0 +1,21 @@
+"""Background tasks for the job app, run by ``manage.py run_worker``."""
+from taskqueue.registry import task
+
+from . import documents
+from .models import Job
+
+
+@task(max_attempts=3, retry_delay=30)
+def extract_document_text(name):
+    """Extract and index the text of a stored CV or application file."""
+    documents.extract_document(name)
+
+
+@task(priority=10, max_attempts=5)
+def delete_job(job_id):
+    """
+    Delete a job with its applications, counters and search postings. The
+    view hides the job straight away and leaves the cascade to this task.
+    """
+    for job in Job.objects.filter(pk=job_id):
+        job.delete()
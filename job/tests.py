@@ -1,3 +1,1487 @@
-from django.test import TestCase
+import csv
+import json
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.db import DatabaseError, connection, router
+from django.http import HttpResponse
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest.mock import patch
+from rest_framework.test import APITestCase
+
+from backend import replicas, staticfiles
+from taskqueue.models import Task
+from taskqueue.worker import run_pending
+from users.models import Student, User
+from users.profiles import employer_profile, student_profile
+from .models import Job, Application, JobStats, DocumentText
+from . import async_views, benchmark, documents, exports, loadtest, recommendations, seeding, views
+from .views import JOBS_PER_PAGE
+
+
+def make_employer(username="acme"):
+    user = User.objects.create_user(username=username, role="employer")
+    employer = user.employer_profile
+    employer.company_name = username.title()
+    employer.save()
+    return employer
+
+
+def make_student(username="thabo"):
+    user = User.objects.create_user(username=username, role="student")
+    return user.student_profile
+
+
+def make_job(employer, **kwargs):
+    defaults = {
+        'title': "Graduate Developer",
+        'description': "Build and maintain internal Django services.",
+        'location': "Potchefstroom",
+        'type': "Full Time",
+    }
+    defaults.update(kwargs)
+    return Job.objects.create(employer=employer, **defaults)
+
+
+class JobListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.student = make_student()
+
+    def add_jobs(self, count):
+        for i in range(count):
+            job = make_job(self.employer, title=f"Graduate Developer {i}")
+            other = make_student(f"applicant{job.id}")
+            Application.objects.create(job=job, applicant=other, cover_letter="Hi", resume="resumes/cv.pdf")
+            if i % 2 == 0:
+                Application.objects.create(job=job, applicant=self.student, cover_letter="Hi", resume="resumes/cv.pdf")
+
+    def login(self, user):
+        # A fresh user instance per request, so no profile lookups are cached between calls.
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+
+    def test_job_list_query_count_is_constant(self):
+        self.add_jobs(2)
+        self.login(self.student.user)
+        with self.assertNumQueries(3):
+            small = self.client.get(reverse('job-list'))
+        self.add_jobs(8)
+        self.login(self.student.user)
+        with self.assertNumQueries(3):
+            large = self.client.get(reverse('job-list'))
+        self.assertEqual(len(small.data['results']), 2)
+        self.assertEqual(len(large.data['results']), 10)
+
+    def test_job_list_reports_counts_and_applied_flag(self):
+        self.login(self.student.user)
+        self.add_jobs(3)
+        response = self.client.get(reverse('job-list'))
+        applied = {row['id']: row['user_has_applied'] for row in response.data['results']}
+        counts = {row['id']: row['applications_count'] for row in response.data['results']}
+        for job in Job.objects.all():
+            has_applied = job.applications.filter(applicant=self.student).exists()
+            self.assertEqual(applied[job.id], has_applied)
+            self.assertEqual(counts[job.id], job.applications.count())
+        self.assertEqual(response.data['results'][0]['employer']['company_name'], "Acme")
+
+    def test_my_job_postings_query_count_is_constant(self):
+        self.add_jobs(2)
+        self.login(self.employer.user)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('my-jobs'))
+        self.add_jobs(8)
+        self.login(self.employer.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('my-jobs'))
+        self.assertEqual(len(response.data['results']), 10)
+
+
+class JobSearchTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.client.force_authenticate(make_student().user)
+
+    def search(self, query):
+        response = self.client.get(reverse('job-list'), {'search': query})
+        return [row['title'] for row in response.data['results']]
+
+    def test_search_stems_and_ranks_title_matches_first(self):
+        make_job(self.employer, title="Marketing Intern",
+                 description="Support the team with analytics for our developers.")
+        make_job(self.employer, title="Junior Developer",
+                 description="Write Python services and review pull requests.")
+        make_job(self.employer, title="Accountant", description="Prepare monthly financial statements.")
+        self.assertEqual(self.search("developers"), ["Junior Developer", "Marketing Intern"])
+
+    def test_search_requires_quoted_phrases_in_order(self):
+        make_job(self.employer, title="Data Analyst", description="Apply data science to sales reports.")
+        make_job(self.employer, title="Science Teacher", description="Teach science and handle data capture.")
+        self.assertEqual(self.search('"data science"'), ["Data Analyst"])
+        self.assertEqual(len(self.search("data science")), 2)
+
+    def test_quoted_phrases_keep_their_stop_words_slots(self):
+        make_job(self.employer, title="Head of Sales")
+        make_job(self.employer, title="Sales Head", description="Lead the office of our sales team.")
+        self.assertEqual(self.search('"head of sales"'), ["Head of Sales"])
+        self.assertEqual(self.search('"head sales"'), [])
+
+    def test_query_of_only_stop_words_matches_nothing(self):
+        make_job(self.employer, title="Junior Developer")
+        self.assertEqual(self.search("the"), [])
+        self.assertEqual(self.search('"of the"'), [])
+
+    def test_index_follows_edits_and_deactivation(self):
+        job = make_job(self.employer, title="Graduate Developer")
+        job.title = "Graduate Accountant"
+        job.save()
+        self.assertEqual(self.search("accountant"), ["Graduate Accountant"])
+        self.assertEqual(self.search("developer"), [])
+        job.is_active = False
+        job.save()
+        self.assertEqual(self.search("accountant"), [])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.client.force_authenticate(make_student().user)
+        self.jobs = [make_job(self.employer, title=f"Graduate Developer {i}") for i in range(7)]
+        # Identical timestamps force the id tie-breaker to keep pages stable
+        Job.objects.filter(id__in=[job.id for job in self.jobs[2:5]]).update(posted_on=self.jobs[2].posted_on)
+
+    def walk(self, url, params):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                return seen, response
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_every_job_once_in_order(self):
+        seen, _ = self.walk(reverse('job-list'), {'page_size': 3})
+        expected = list(Job.objects.order_by('-posted_on', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get(reverse('job-list'), {'page_size': 3})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_deep_pages_do_not_count(self):
+        first = self.client.get(reverse('job-list'), {'page_size': 2})
+        with self.assertNumQueries(2):
+            self.client.get(first.data['next'])
+
+    def test_search_results_page_in_rank_order(self):
+        seen, _ = self.walk(reverse('job-list'), {'search': 'developer', 'page_size': 2})
+        self.assertEqual(sorted(seen), sorted(job.id for job in self.jobs))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('job-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class JobListingPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+
+    def test_listing_query_count_does_not_grow_with_jobs(self):
+        for i in range(3):
+            make_job(self.employer, title=f"Graduate Developer {i}")
+        with self.assertNumQueries(2):
+            self.client.get(reverse('job_listing'))
+        for i in range(20):
+            make_job(self.employer, title=f"Graduate Analyst {i}")
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('job_listing'))
+        self.assertEqual(len(response.context['jobs']), JOBS_PER_PAGE)
+        self.assertContains(response, "23 Jobs found")
+
+    def test_listing_applies_api_filters_across_pages(self):
+        for i in range(12):
+            make_job(self.employer, title=f"Graduate Developer {i}", location="Cape Town")
+        make_job(self.employer, title="Graduate Developer Remote", location="Johannesburg")
+        response = self.client.get(reverse('job_listing'), {'search': 'developer', 'location': 'cape', 'page': 2})
+        self.assertEqual(response.context['page_obj'].paginator.count, 12)
+        self.assertEqual(len(response.context['jobs']), 2)
+        self.assertContains(response, "?search=developer&amp;location=cape&page=1")
+
+    def test_cached_card_is_refreshed_when_job_changes(self):
+        job = make_job(self.employer, title="Graduate Developer")
+        self.client.get(reverse('job_listing'))
+        job.title = "Graduate Accountant"
+        job.save()
+        self.assertContains(self.client.get(reverse('job_listing')), "Graduate Accountant")
+
+
+class HomePageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.employer.industry = "Technology"
+        self.employer.save()
+
+    def test_homepage_is_served_from_cache(self):
+        make_job(self.employer)
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, "Graduate Developer")
+
+    def test_category_counts_are_live(self):
+        finance = make_employer("ledger")
+        finance.industry = "Finance"
+        finance.save()
+        make_job(self.employer, type="Full Time")
+        make_job(self.employer, type="Part Time")
+        make_job(finance, type="Full Time")
+        make_job(finance, type="Full Time", is_active=False)
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['categories'], [
+            {'name': 'Technology', 'job_count': 2},
+            {'name': 'Finance', 'job_count': 1},
+        ])
+        self.assertEqual(response.context['job_types'], [
+            {'name': 'Full Time', 'job_count': 2},
+            {'name': 'Part Time', 'job_count': 1},
+        ])
+
+    def test_job_changes_invalidate_the_cache(self):
+        job = make_job(self.employer)
+        self.client.get(reverse('home'))
+        job.delete()
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['featured_jobs'], [])
+        self.assertEqual(response.context['categories'], [])
+
+
+class JobStatsTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.jobs = [make_job(self.employer, title=f"Graduate Developer {i}") for i in range(2)]
+        self.applications = [
+            Application.objects.create(
+                job=self.jobs[i % 2], applicant=make_student(f"student{i}"),
+                cover_letter="Hi", resume="resumes/cv.pdf",
+            )
+            for i in range(5)
+        ]
+
+    def funnel(self, job):
+        return JobStats.objects.get(job=job).funnel()
+
+    def test_counters_follow_status_changes_and_deletes(self):
+        first, second = self.applications[0], self.applications[2]
+        first.status = "shortlisted"
+        first.save()
+        second.delete()
+        self.assertEqual(self.funnel(self.jobs[0]), {
+            'total': 2, 'pending': 1, 'reviewed': 0, 'shortlisted': 1, 'rejected': 0, 'accepted': 0,
+        })
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.applications[1].status = "rejected"
+        self.applications[1].save()
+        before = [self.funnel(job) for job in self.jobs]
+        call_command('rebuild_job_stats', stdout=StringIO())
+        self.assertEqual([self.funnel(job) for job in self.jobs], before)
+
+    def test_endpoint_returns_funnels_in_one_query(self):
+        self.client.force_authenticate(User.objects.get(pk=self.employer.user.pk))
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('job-stats'))
+        self.assertEqual(response.data['total_jobs'], 2)
+        self.assertEqual(response.data['total_applications'], 5)
+        self.assertEqual(response.data['applications_by_status']['pending'], 5)
+        per_job = {row['id']: row['applications']['total'] for row in response.data['jobs']}
+        self.assertEqual(per_job, {self.jobs[0].id: 3, self.jobs[1].id: 2})
+
+    def test_deleting_a_job_drops_its_counters(self):
+        self.jobs[0].delete()
+        self.assertFalse(JobStats.objects.filter(job_id=self.jobs[0].id).exists())
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.student = make_student()
+        for i in range(4):
+            job = make_job(self.employer, title=f"Graduate Developer {i}")
+            Application.objects.create(job=job, applicant=self.student, cover_letter="Hi", resume="resumes/cv.pdf")
+
+    def login(self, user):
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+
+    def test_nested_job_is_a_summary_by_default(self):
+        self.login(self.student.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('my-applications'))
+        job = response.data['results'][0]['job']
+        self.assertEqual(set(job), {'id', 'title', 'company', 'location'})
+        self.assertEqual(job['company'], "Acme")
+
+    def test_fields_trim_the_response(self):
+        self.login(self.student.user)
+        response = self.client.get(reverse('my-applications'), {'fields': 'id,status,job'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'status', 'job'})
+        self.login(self.student.user)
+        response = self.client.get(reverse('job-list'), {'fields': 'id,title'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_fields_without_status_keep_query_count_constant(self):
+        self.login(self.student.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('my-applications'), {'fields': 'id,job'})
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_saving_with_status_deferred_keeps_counters(self):
+        application = Application.objects.only('id', 'job').filter(applicant=self.student).first()
+        application.status = 'reviewed'
+        application.save()
+        stats = JobStats.objects.get(job_id=application.job_id)
+        self.assertEqual((stats.pending, stats.reviewed), (0, 1))
+        Application.objects.only('id', 'job').get(pk=application.pk).delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.total, stats.reviewed), (0, 0))
+
+    def test_expand_job_keeps_query_count_constant(self):
+        self.login(self.student.user)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('my-applications'), {'expand': 'job'})
+        job = response.data['results'][0]['job']
+        self.assertEqual(job['applications_count'], 1)
+        self.assertTrue(job['user_has_applied'])
+        self.assertEqual(job['employer']['company_name'], "Acme")
+
+
+class BulkStatusUpdateTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        self.applications = [
+            Application.objects.create(
+                job=self.job, applicant=make_student(f"student{i}"),
+                cover_letter="Hi", resume="resumes/cv.pdf",
+            )
+            for i in range(6)
+        ]
+        other_job = make_job(make_employer("globex"))
+        self.foreign = Application.objects.create(
+            job=other_job, applicant=make_student("outsider"), cover_letter="Hi", resume="resumes/cv.pdf",
+        )
+        self.client.force_authenticate(User.objects.get(pk=self.employer.user.pk))
+
+    def post(self, updates):
+        return self.client.post(reverse('application-bulk-update-status'), {'updates': updates}, format='json')
+
+    def test_batch_is_applied_in_a_fixed_number_of_queries(self):
+        updates = [{'application_id': a.id, 'status': 'shortlisted'} for a in self.applications]
+        with self.assertNumQueries(6):
+            response = self.post(updates)
+        self.assertEqual(response.data['updated'], 6)
+        self.assertEqual(Application.objects.filter(status='shortlisted').count(), 6)
+        self.assertEqual(JobStats.objects.get(job=self.job).shortlisted, 6)
+        self.assertEqual(JobStats.objects.get(job=self.job).pending, 0)
+
+    def test_each_item_gets_a_result(self):
+        first, second = self.applications[:2]
+        response = self.post([
+            {'application_id': first.id, 'status': 'rejected', 'notes': "Missing transcript"},
+            {'application_id': second.id, 'status': 'pending'},
+            {'application_id': self.foreign.id, 'status': 'accepted'},
+            {'application_id': first.id, 'status': 'accepted'},
+            {'application_id': second.id, 'status': 'hired'},
+        ])
+        self.assertEqual(
+            [item['result'] for item in response.data['results']],
+            ['updated', 'unchanged', 'not_found', 'invalid', 'invalid'],
+        )
+        first.refresh_from_db()
+        self.foreign.refresh_from_db()
+        self.assertEqual((first.status, first.notes), ('rejected', "Missing transcript"))
+        self.assertEqual(self.foreign.status, 'pending')
+
+    def test_out_of_range_ids_are_invalid(self):
+        response = self.post([
+            {'application_id': 10**30, 'status': 'accepted'},
+            {'application_id': 0, 'status': 'accepted'},
+            {'application_id': self.applications[0].id, 'status': 'accepted'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['result'] for item in response.data['results']], ['invalid', 'invalid', 'updated'])
+
+    def test_students_cannot_bulk_update(self):
+        self.client.force_authenticate(self.applications[0].applicant.user)
+        response = self.post([{'application_id': self.applications[0].id, 'status': 'accepted'}])
+        self.assertEqual(response.status_code, 403)
+
+
+class ApplicationExportTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        for i in range(3):
+            Application.objects.create(
+                job=self.job, applicant=make_student(f"student{i}"),
+                cover_letter="Line one,\nline two", resume="resumes/cv.pdf",
+                status='shortlisted' if i else 'pending',
+            )
+        self.client.force_authenticate(self.employer.user)
+
+    def export(self, export_format, **params):
+        url = reverse('employer-applications-export', args=[self.job.id, export_format])
+        response = self.client.get(url, params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_every_applicant(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([row['username'] for row in rows], ['student0', 'student1', 'student2'])
+        self.assertEqual(rows[0]['cover_letter'], "Line one,\nline two")
+
+    def test_ndjson_export_filters_by_status(self):
+        _, body = self.export('ndjson', status='shortlisted')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['status'] for row in rows}, {'shortlisted'})
+
+    def test_export_streams_under_asgi(self):
+        url = reverse('employer-applications-export', args=[self.job.id, 'csv'])
+
+        async def export():
+            await self.async_client.aforce_login(self.employer.user)
+            response = await self.async_client.get(url)
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+
+        with patch.object(exports, 'ASYNC_BATCH_SIZE', 100):
+            response, body = async_to_sync(export)()
+        # An async iterator: Django streams it instead of reading it all first
+        self.assertTrue(response.is_async)
+        rows = list(csv.DictReader(StringIO(body.decode())))
+        self.assertEqual([row['username'] for row in rows], ['student0', 'student1', 'student2'])
+
+    def test_other_employers_cannot_export(self):
+        self.client.force_authenticate(make_employer("globex").user)
+        url = reverse('employer-applications-export', args=[self.job.id, 'csv'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ApplicationFilesBundleTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        for i, status in enumerate(['pending', 'shortlisted']):
+            student = make_student(f"student{i}")
+            student.cv.save("CV.pdf", ContentFile(f"%PDF cv {i}".encode()))
+            Application.objects.create(
+                job=self.job, applicant=student, cover_letter="Hi", resume=student.cv,
+                additional_documents=ContentFile(b"transcript", name="transcript.pdf") if i else None,
+                status=status,
+            )
+        self.client.force_authenticate(self.employer.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def bundle(self, **params):
+        response = self.client.get(reverse('employer-applications-files', args=[self.job.id]), params)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def folder(self, username):
+        return f"{User.objects.get(username=username).student_profile.student_id}-{username}"
+
+    def test_bundle_holds_manifest_and_every_file(self):
+        archive = self.bundle()
+        first, second = self.folder("student0"), self.folder("student1")
+        self.assertEqual(sorted(archive.namelist()), [
+            f'{first}/resume.pdf',
+            f'{second}/document.pdf',
+            f'{second}/resume.pdf',
+            'manifest.csv',
+        ])
+        self.assertEqual(archive.read(f'{second}/resume.pdf'), b"%PDF cv 1")
+        manifest = list(csv.DictReader(StringIO(archive.read('manifest.csv').decode())))
+        self.assertEqual(manifest[1]['document_file'], f'{second}/document.pdf')
+
+    def test_bundle_can_be_filtered_by_status(self):
+        archive = self.bundle(status='pending')
+        self.assertEqual(sorted(archive.namelist()), [f'{self.folder("student0")}/resume.pdf', 'manifest.csv'])
+
+
+def make_docx(*paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def make_pdf(*lines):
+    escaped = [line.replace('(', r'\(').replace(')', r'\)').encode() for line in lines]
+    content = b' '.join(b'BT (' + line + b') Tj ET' for line in escaped)
+    stream = zlib.compress(content)
+    return b'%PDF-1.4\n1 0 obj << /Filter /FlateDecode >>\nstream\n' + stream + b'\nendstream\nendobj\n%%EOF'
+
+
+class DocumentTextTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        self.client.force_authenticate(self.employer.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def apply(self, username, resume_name, resume_data, **kwargs):
+        student = make_student(username)
+        application = Application.objects.create(
+            job=self.job, applicant=student, cover_letter="Hi",
+            resume=ContentFile(resume_data, name=resume_name), **kwargs
+        )
+        documents.extract_document(application.resume.name)
+        return application
+
+    def search(self, query):
+        response = self.client.get(reverse('employer-applications', args=[self.job.id]), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_extracts_docx_pdf_and_txt(self):
+        self.assertIn("Python developer", documents.extract_text("cv.docx", make_docx("Python developer", "Django")))
+        self.assertEqual(documents.extract_text("cv.pdf", make_pdf("SQL (advanced)", "Docker")), "SQL (advanced)\nDocker")
+        self.assertEqual(documents.extract_text("cv.txt", "Café".encode()), "Café")
+        with self.assertRaises(ValueError):
+            documents.extract_text("cv.png", b"")
+
+    def test_compressed_parts_are_not_inflated_past_the_limit(self):
+        with patch.object(documents, 'MAX_EXPANDED_SIZE', 1000):
+            with self.assertRaises(ValueError):
+                documents.extract_text("cv.docx", make_docx("Python developer " * 100))
+            bomb = make_pdf("Docker", *["padding" * 200] * 5)
+            self.assertEqual(documents.extract_text("cv.pdf", bomb), "Docker")
+
+    def test_upload_queues_extraction_as_a_task(self):
+        student = make_student()
+        student.cv.save("cv.txt", ContentFile(b"Django"))
+        self.assertFalse(DocumentText.objects.exists())
+        task = Task.objects.get()
+        self.assertEqual((task.name, task.args), ('job.tasks.extract_document_text', [student.cv.name]))
+
+        run_pending()
+        self.assertEqual(DocumentText.objects.get(name=student.cv.name).text, "Django")
+
+    def test_text_is_cached_per_content_hash(self):
+        application = self.apply("thabo", "cv.txt", b"Kotlin and Android")
+        document = DocumentText.objects.get(name=application.resume.name)
+        self.assertEqual(document.status, 'done')
+        with self.assertNumQueries(1):
+            self.assertEqual(documents.extract_document(document.name), document)
+
+        copy = default_storage_save("legacy/cv.txt", b"Kotlin and Android")
+        with patch.object(documents, 'extract_text', side_effect=AssertionError("parsed again")):
+            legacy = documents.extract_document(copy)
+        self.assertEqual(legacy.text, "Kotlin and Android")
+        self.assertEqual(legacy.digest, document.digest)
+
+    def test_unreadable_file_is_marked_failed(self):
+        with self.assertLogs('job.documents', 'WARNING'):
+            application = self.apply("thabo", "cv.docx", b"not a zip")
+        document = DocumentText.objects.get(name=application.resume.name)
+        self.assertEqual(document.status, 'failed')
+        self.assertTrue(document.error)
+
+    def test_storage_errors_are_left_for_the_task_to_retry(self):
+        student = make_student()
+        student.cv.save("cv.txt", ContentFile(b"Django"))
+        with patch.object(documents.blob_storage, 'open', side_effect=OSError("disk unavailable")):
+            run_pending()
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), ('queued', 1))
+        self.assertIn("disk unavailable", task.last_error)
+        self.assertEqual(DocumentText.objects.get(name=student.cv.name).status, 'pending')
+
+    def test_employer_searches_applicants_by_skill(self):
+        python = self.apply("thabo", "cv.docx", make_docx("Python and Django developer"))
+        both = self.apply("lerato", "cv.pdf", make_pdf("Python, Django, Django"))
+        java = self.apply("sipho", "cv.txt", b"Java developer")
+        self.assertEqual(self.search("django python"), [both.id, python.id])
+        self.assertEqual(self.search("java"), [java.id])
+        self.assertEqual(self.search("rust"), [])
+        self.assertEqual(self.search("the"), [])
+
+    def test_search_includes_additional_documents_and_profile_cv(self):
+        application = self.apply(
+            "thabo", "cv.txt", b"Python",
+            additional_documents=ContentFile(b"Kubernetes certificate", name="cert.txt"),
+        )
+        documents.extract_document(application.additional_documents.name)
+        self.assertEqual(self.search("python kubernetes"), [application.id])
+
+        other = self.apply("lerato", "cv.txt", b"Go")
+        other.applicant.cv.save("profile.txt", ContentFile(b"Terraform"))
+        documents.extract_document(other.applicant.cv.name)
+        self.assertEqual(self.search("terraform"), [other.id])
+
+    def test_search_is_limited_to_the_job(self):
+        other_job = make_job(self.employer, title="Analyst")
+        student = make_student("thabo")
+        application = Application.objects.create(
+            job=other_job, applicant=student, cover_letter="Hi", resume=ContentFile(b"Python", name="cv.txt"),
+        )
+        documents.extract_document(application.resume.name)
+        self.assertEqual(self.search("python"), [])
+
+    def test_management_command_extracts_pending_files(self):
+        student = make_student()
+        student.cv.save("cv.txt", ContentFile(b"Scala"))
+        call_command('extract_document_text', stdout=StringIO())
+        self.assertEqual(DocumentText.objects.get(name=student.cv.name).text, "Scala")
+
+
+def default_storage_save(name, data):
+    from django.core.files.storage import default_storage
+    return default_storage.save(name, ContentFile(data))
+
+
+class JobDeleteTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        Application.objects.create(job=self.job, applicant=make_student(), cover_letter="Hi")
+
+    def test_delete_hides_the_job_and_queues_the_cascade(self):
+        self.client.force_authenticate(self.employer.user)
+        response = self.client.delete(reverse('job-detail', args=[self.job.id]))
+        self.assertEqual(response.status_code, 204)
+        self.job.refresh_from_db()
+        self.assertFalse(self.job.is_active)
+        self.assertEqual(Application.objects.count(), 1)
+
+        run_pending()
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(Application.objects.exists())
+        self.assertEqual(Task.objects.get().status, 'done')
+
+    def test_only_the_owner_can_delete(self):
+        self.client.force_authenticate(make_employer("globex").user)
+        response = self.client.delete(reverse('job-detail', args=[self.job.id]))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Task.objects.exists())
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.student = make_student()
+        self.job = make_job(self.employer)
+        self.application = Application.objects.create(job=self.job, applicant=self.student, cover_letter="Hi")
+
+    def get(self, url, **headers):
+        self.client.force_authenticate(User.objects.get(pk=self.student.user.pk))
+        return self.client.get(url, headers=headers)
+
+    def test_job_detail_answers_304_without_serializing(self):
+        url = reverse('job-detail', args=[self.job.id])
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', first)
+
+        with patch('job.views.JobSerializer.to_representation', side_effect=AssertionError("serialized")):
+            cached = self.get(url, if_none_match=first['ETag'])
+            self.assertEqual(cached.status_code, 304)
+            self.assertEqual(cached['ETag'], first['ETag'])
+
+        self.job.title = "Senior Developer"
+        self.job.save()
+        changed = self.get(url, if_none_match=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_job_list_etag_follows_applications_and_employer(self):
+        url = reverse('job-list')
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 304)
+
+        Application.objects.create(job=self.job, applicant=make_student("lerato"), cover_letter="Hi")
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.employer.company_name = "Acme Holdings"
+        self.employer.save()
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['employer']['company_name'], "Acme Holdings")
+
+    def test_job_detail_follows_applications_not_just_updated_at(self):
+        url = reverse('job-detail', args=[self.job.id])
+        other = make_student("lerato")
+        self.client.force_authenticate(User.objects.get(pk=other.user.pk))
+        first = self.client.get(url)
+        self.assertEqual((first.data['applications_count'], first.data['user_has_applied']), (1, False))
+
+        Application.objects.create(job=self.job, applicant=other, cover_letter="Hi")
+        for headers in ({'if_none_match': first['ETag']}, {'if_modified_since': first['Last-Modified']}):
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.data['applications_count'], response.data['user_has_applied']), (2, True))
+
+    def test_list_ignores_if_modified_since_alone(self):
+        url = reverse('job-list')
+        first = self.get(url)
+        make_job(self.employer, title="Second").delete()
+        self.assertEqual(self.get(url, if_modified_since=first['Last-Modified']).status_code, 200)
+
+    def test_etag_differs_per_user_and_fields(self):
+        url = reverse('job-list')
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url + '?fields=id,title', if_none_match=etag).status_code, 200)
+        self.client.force_authenticate(self.employer.user)
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag}).status_code, 200)
+
+    def test_application_etag_changes_with_status_and_job(self):
+        url = reverse('application-detail', args=[self.application.id])
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 304)
+
+        self.client.force_authenticate(self.employer.user)
+        self.client.post(reverse('application-bulk-update-status'), {
+            'updates': [{'application_id': self.application.id, 'status': 'reviewed'}],
+        }, format='json')
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.job.location = "Cape Town"
+        self.job.save()
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
+
+    def test_job_details_page_is_conditional(self):
+        url = reverse('job_details', args=[self.job.id])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, headers={'if_none_match': first['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+
+# Plan lines that mean a query reads a whole table or sorts rows itself
+FULL_SCAN_RE = re.compile(r'^SCAN (?!CONSTANT ROW)\S+$')
+TEMP_SORT_RE = re.compile(r'^USE TEMP B-TREE FOR ')
+
+# (SQL fragment, plan line prefix, why it is acceptable)
+ALLOWED_PLANS = [
+    ('FROM "job_jobsearchdocument"', 'SCAN job_jobsearchdocument',
+     "collection statistics for BM25, cached between index changes"),
+    ('AS "search_rank"', 'USE TEMP B-TREE FOR ORDER BY',
+     "search results are ranked in Python and capped at search.MAX_RESULTS"),
+    ('AS "job_count"', 'USE TEMP B-TREE FOR GROUP BY',
+     "homepage category counts, cached for an hour"),
+]
+
+
+class QueryPlanTests(APITestCase):
+    """
+    Runs every GET route against a seeded database and EXPLAINs each SELECT
+    it issues. A plan that reads a whole table or builds a temporary B-tree
+    to sort fails the test unless it is listed in ALLOWED_PLANS.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers = [make_employer(f"employer{i}") for i in range(5)]
+        cls.students = [make_student(f"student{i}") for i in range(20)]
+        cls.jobs = [
+            make_job(cls.employers[i % 5], title=f"Developer {i}", is_active=i % 7 != 0)
+            for i in range(40)
+        ]
+        for i, student in enumerate(cls.students):
+            for job in cls.jobs[i:i + 8]:
+                Application.objects.create(
+                    job=job, applicant=student, cover_letter="Hi",
+                    status=['pending', 'reviewed', 'shortlisted'][i % 3],
+                )
+
+    def setUp(self):
+        cache.clear()
+        if connection.vendor != 'sqlite':
+            self.skipTest("Plan checks read SQLite's EXPLAIN QUERY PLAN output")
+
+    def routes(self):
+        employer, student, job = self.employers[1], self.students[2], self.jobs[1]
+        application = Application.objects.filter(job__employer=employer).first()
+        cursor = self.page_cursor(student.user, reverse('job-list'))
+        return [
+            (student, 'job-list', [], {}),
+            (student, 'job-list', [], {'location': 'Potch', 'type': 'Full', 'experience': 'Junior'}),
+            (student, 'job-list', [], {'search': 'developer'}),
+            (student, 'job-list', [], {'cursor': cursor, 'page_size': 5}),
+            (student, 'job-list', [], {'fields': 'id,title'}),
+            (student, 'job-detail', [job.id], {}),
+            (employer, 'my-jobs', [], {}),
+            (employer, 'job-stats', [], {}),
+            (student, 'my-applications', [], {}),
+            (student, 'my-applications', [], {'expand': 'job'}),
+            (employer, 'employer-applications', [job.id], {}),
+            (employer, 'employer-applications', [job.id], {'search': 'python'}),
+            (employer, 'employer-applications-export', [job.id, 'csv'], {'status': 'pending'}),
+            (employer, 'application-detail', [application.id], {}),
+            (student, 'home', [], {}),
+            (student, 'job_listing', [], {}),
+            (student, 'job_listing', [], {'page': 2}),
+            (student, 'job_details', [job.id], {}),
+        ]
+
+    def page_cursor(self, user, url):
+        self.client.force_authenticate(user)
+        next_url = self.client.get(url, {'page_size': 5}).data['next']
+        return re.search(r'cursor=([^&]+)', next_url).group(1)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def problems(self, sql):
+        found = []
+        for line in self.plan(sql):
+            if not (FULL_SCAN_RE.match(line) or TEMP_SORT_RE.match(line)):
+                continue
+            if any(fragment in sql and line.startswith(prefix) for fragment, prefix, _ in ALLOWED_PLANS):
+                continue
+            found.append(line)
+        return found
+
+    def test_routes_use_indexes(self):
+        for profile, name, args, params in self.routes():
+            with self.subTest(route=name, params=params):
+                self.client.force_authenticate(User.objects.get(pk=profile.user.pk))
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse(name, args=args), params)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+                for query in queries.captured_queries:
+                    if query['sql'].startswith('SELECT'):
+                        self.assertEqual(self.problems(query['sql']), [], query['sql'])
+
+    def test_checker_flags_scans_and_sorts(self):
+        self.assertEqual(self.problems('SELECT * FROM "job_job" WHERE "job_job"."location" = \'x\''), ['SCAN job_job'])
+        self.assertEqual(
+            self.problems('SELECT "id" FROM "job_application" WHERE "job_id" = 1 ORDER BY "cover_letter"'),
+            ['USE TEMP B-TREE FOR ORDER BY'],
+        )
+
+
+class ObjectPermissionTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.other_employer = make_employer("globex")
+        self.student = make_student()
+        self.job = make_job(self.employer)
+        self.application = Application.objects.create(job=self.job, applicant=self.student, cover_letter="Hi")
+
+    def selects_from(self, queries, table):
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+
+    def test_profiles_and_misses_are_cached_on_the_user(self):
+        user = User.objects.get(pk=self.student.user.pk)
+        with self.assertNumQueries(1):
+            self.assertIsNone(employer_profile(user))
+            self.assertIsNone(employer_profile(user))
+            self.assertEqual(student_profile(user), self.student)
+            self.assertFalse(hasattr(user, 'employer_profile'))
+
+    def test_session_user_comes_with_its_profiles(self):
+        self.client.force_login(self.employer.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('job-stats'))
+        self.assertEqual(self.selects_from(queries, 'users_employer'), [])
+        self.assertEqual(self.selects_from(queries, 'users_student'), [])
+
+    def test_job_is_fetched_once_for_update_and_delete(self):
+        self.client.force_login(self.employer.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse('job-detail', args=[self.job.id]), {'title': "Senior Developer"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.selects_from(queries, 'job_job')), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(reverse('job-detail', args=[self.job.id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(self.selects_from(queries, 'job_job')), 1)
+
+    def test_only_the_owner_changes_a_job(self):
+        self.client.force_login(self.other_employer.user)
+        url = reverse('job-detail', args=[self.job.id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.patch(url, {'title': "Hijacked posting"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], "You can only edit your own job postings.")
+        response = self.client.delete(url)
+        self.assertEqual(response.data['detail'], "You can only delete your own job postings.")
+        self.assertTrue(Job.objects.filter(pk=self.job.pk, is_active=True).exists())
+
+    def test_role_checks_run_before_validation(self):
+        self.client.force_login(self.student.user)
+        response = self.client.post(reverse('job-create'), {})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], "Only employers can create jobs.")
+
+    def test_application_owner_chain_is_loaded_with_the_application(self):
+        url = reverse('application-detail', args=[self.application.id])
+        for user in (self.student.user, self.employer.user):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(len(self.selects_from(queries, 'job_application')), 1)
+            self.assertEqual(self.selects_from(queries, 'job_job'), [])
+
+        self.client.force_login(self.other_employer.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], "You do not have permission to view this application.")
+
+    def test_status_update_checks_the_job_owner(self):
+        url = reverse('application-update-status', args=[self.application.id])
+        self.client.force_login(self.other_employer.user)
+        response = self.client.patch(url, {'status': 'accepted'})
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.employer.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'status': 'reviewed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.selects_from(queries, 'job_application')), 1)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'reviewed')
+
+
+class AsyncViewTests(TestCase):
+    """The async views must answer exactly like the sync views they replace under ASGI."""
+
+    def setUp(self):
+        cache.clear()
+        employers = [make_employer("acme"), make_employer("globex")]
+        employers[1].industry = "Mining"
+        employers[1].save()
+        self.student = make_student()
+        self.jobs = [
+            make_job(employers[i % 2], title=f"Python Developer {i}", type=["Full Time", "Internship"][i % 2])
+            for i in range(25)
+        ]
+        for job in self.jobs[::3]:
+            Application.objects.create(job=job, applicant=self.student, cover_letter="Hi")
+
+    def request(self, factory, path, user):
+        request = factory().get(path)
+        if user is not None:
+            # What DRF's force_authenticate does, for plain Django requests
+            request._force_auth_user = User.objects.get(pk=user.pk)
+        return request
+
+    def assertSameResponse(self, sync_view, async_view, path, user=None, **kwargs):
+        sync_response = sync_view(self.request(RequestFactory, path, user), **kwargs)
+        async_response = async_to_sync(async_view)(self.request(AsyncRequestFactory, path, user), **kwargs)
+        for response in (sync_response, async_response):
+            if hasattr(response, 'render'):
+                response.render()
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        self.assertEqual(async_response.content, sync_response.content, path)
+        self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'), path)
+        return async_response
+
+    def test_job_list(self):
+        sync_view, async_view = views.JobListAPIView.as_view(), async_views.AsyncJobListAPIView.as_view()
+        user = self.student.user
+        response = self.assertSameResponse(sync_view, async_view, '/api/jobs/?page_size=10', user)
+        cursor = re.search(r'cursor=([^&]+)', response.data['next']).group(1)
+        self.assertSameResponse(sync_view, async_view, f'/api/jobs/?page_size=10&cursor={cursor}', user)
+        self.assertSameResponse(sync_view, async_view, '/api/jobs/?search=python&type=intern', user)
+        self.assertSameResponse(sync_view, async_view, '/api/jobs/?fields=id,title,user_has_applied', user)
+        self.assertSameResponse(sync_view, async_view, '/api/jobs/?cursor=garbage', user)
+        self.assertEqual(self.assertSameResponse(sync_view, async_view, '/api/jobs/', None).status_code, 401)
+
+    def test_job_detail(self):
+        sync_view, async_view = views.JobDetailAPIView.as_view(), async_views.AsyncJobDetailAPIView.as_view()
+        job = self.jobs[3]
+        self.assertSameResponse(sync_view, async_view, f'/api/jobs/{job.pk}/', self.student.user, pk=job.pk)
+        self.assertSameResponse(sync_view, async_view, '/api/jobs/0/', self.student.user, pk=0)
+
+    def test_async_job_detail_still_accepts_writes(self):
+        job = self.jobs[0]
+        request = AsyncRequestFactory().patch(
+            f'/api/jobs/{job.pk}/', {'title': "Senior Python Developer"}, content_type='application/json',
+        )
+        request._force_auth_user = User.objects.get(pk=job.employer.user.pk)
+        response = async_to_sync(async_views.AsyncJobDetailAPIView.as_view())(request, pk=job.pk)
+        self.assertEqual(response.status_code, 200)
+        job.refresh_from_db()
+        self.assertEqual(job.title, "Senior Python Developer")
+
+    def test_my_applications(self):
+        sync_view = views.MyApplicationsAPIView.as_view()
+        async_view = async_views.AsyncMyApplicationsAPIView.as_view()
+        self.assertSameResponse(sync_view, async_view, '/api/applications/my/', self.student.user)
+        self.assertSameResponse(sync_view, async_view, '/api/applications/my/?expand=job', self.student.user)
+        employer = self.jobs[0].employer.user
+        self.assertEqual(self.assertSameResponse(sync_view, async_view, '/api/applications/my/', employer).status_code, 403)
+
+    def test_pages(self):
+        self.assertSameResponse(views.home_view, async_views.async_home_view, '/')
+        self.assertSameResponse(views.home_view, async_views.async_home_view, '/')  # from the cache
+        for query in ('', '?page=2', '?page=99', '?search=python&location=potch'):
+            self.assertSameResponse(views.job_list_view, async_views.async_job_list_view, f'/listing/{query}')
+
+    def test_read_handlers_are_async(self):
+        for view in (async_views.AsyncJobListAPIView, async_views.AsyncJobDetailAPIView,
+                     async_views.AsyncMyApplicationsAPIView):
+            self.assertTrue(view.view_is_async, view)
+
+
+class LoadTestTests(TransactionTestCase):
+    # Outside a transaction reads may go to replicas (test mirrors of default)
+    databases = '__all__'
+
+    def test_both_handlers_serve_the_requests(self):
+        seeding.seed(employers=1, students=2, jobs=3, applications=2)
+        for mode in ('wsgi', 'asgi'):
+            with self.subTest(mode=mode):
+                result = loadtest.run(mode, concurrency=3, total=6, db_latency_ms=0)
+                self.assertEqual((result['requests'], result['errors']), (6, 0))
+                self.assertGreaterEqual(result['peak_in_flight'], 1)
+
+
+class SeedDataTests(TestCase):
+    def test_seed_creates_profiles_jobs_and_applications(self):
+        out = StringIO()
+        call_command('seed_data', employers=3, students=10, jobs=8, applications=30, stdout=out)
+        self.assertIn("3 employers, 10 students, 8 jobs, 30 applications", out.getvalue())
+        self.assertEqual(User.objects.filter(role='employer', employer_profile__isnull=False).count(), 3)
+        self.assertEqual(User.objects.filter(role='student', student_profile__isnull=False).count(), 10)
+        self.assertEqual(Job.objects.count(), 8)
+        self.assertEqual(Application.objects.values('job', 'applicant').distinct().count(), 30)
+        self.assertTrue(User.objects.get(username='seed-student-3').check_password(seeding.DEFAULT_PASSWORD))
+        self.assertEqual(JobStats.objects.count(), 8)
+
+    def test_seeding_twice_adds_new_users(self):
+        seeding.seed(employers=1, students=2, jobs=1, applications=2, rebuild=False)
+        counts = seeding.seed(employers=1, students=2, jobs=1, applications=5, rebuild=False)
+        # Only two students can apply to the one new job
+        self.assertEqual(counts['applications'], 2)
+        self.assertEqual(User.objects.filter(username__startswith='seed-').count(), 6)
+
+
+class BenchmarkTests(TestCase):
+    def test_every_route_has_a_scenario(self):
+        self.assertEqual([name for name in benchmark.route_names() if name not in benchmark.SCENARIOS], [])
+
+    def test_run_times_routes_and_rolls_back_writes(self):
+        seeding.seed(employers=2, students=5, jobs=4, applications=10)
+        Job.objects.update(is_active=True)
+        statuses = list(Application.objects.order_by('id').values_list('id', 'status'))
+        routes = {
+            'job-list', 'job-detail', 'job-create', 'application-create', 'application-update-status',
+            'application-file', 'users:student_profile',
+        }
+        report = benchmark.run(iterations=2, warmup=0, only=routes)
+        results = report['results']
+        self.assertEqual(set(results), routes)
+        self.assertEqual({name: result['unexpected_statuses'] for name, result in results.items()},
+                         {name: [] for name in routes})
+        self.assertEqual(results['application-create']['status'], 201)
+        self.assertEqual(results['job-create']['status'], 201)
+        self.assertEqual(results['application-file']['status'], 200)
+        self.assertFalse(Application.objects.exclude(resume='').exists())
+        self.assertEqual(results['job-list']['status'], 200)
+        self.assertEqual(results['job-list']['iterations'], 2)
+        self.assertGreater(results['job-list']['queries'], 0)
+        self.assertGreater(results['job-detail']['bytes'], 0)
+        self.assertEqual(list(Application.objects.order_by('id').values_list('id', 'status')), statuses)
+
+    def test_error_responses_are_flagged(self):
+        seeding.seed(employers=1, students=2, jobs=2, applications=2)
+        Job.objects.update(is_active=True)
+        scenario = benchmark.Scenario('student', kwargs=lambda fx: {'pk': 0})
+        result = benchmark.run_scenario('job-detail', scenario, benchmark.Fixtures('x'), iterations=1, warmup=0)
+        self.assertEqual(result['unexpected_statuses'], [404])
+        scenario.expected_status = 404
+        result = benchmark.run_scenario('job-detail', scenario, benchmark.Fixtures('x'), iterations=1, warmup=0)
+        self.assertEqual(result['unexpected_statuses'], [])
+
+    def test_missing_seed_data_is_reported(self):
+        with self.assertRaises(LookupError):
+            benchmark.run(iterations=1, warmup=0)
+
+    def test_compare_flags_regressions_but_not_noise(self):
+        def report(**results):
+            defaults = {'status': 200, 'p95_ms': 10.0, 'queries': 3, 'bytes': 1000}
+            return {'results': {name: {**defaults, **values} for name, values in results.items()}}
+
+        baseline = report(a={}, b={}, c={}, d={}, e={})
+        current = report(
+            a={'p95_ms': 11.5},
+            b={'p95_ms': 20.0},
+            c={'queries': 4},
+            d={'bytes': 1500},
+            e={'status': 500},
+            new={},
+        )
+        self.assertEqual([name for name, _ in benchmark.compare(baseline, current)], ['b', 'c', 'd', 'e'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = patch.object(replicas.health, 'healthy', side_effect=lambda aliases: list(aliases))
+        self.healthy = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def handle(self, request, write=False):
+        """Run ``request`` through the middleware; returns the response and where reads went."""
+        seen = {}
+
+        def view(request):
+            seen['before'] = Job.objects.all().db
+            seen['session'] = Session.objects.all().db
+            if write:
+                router.db_for_write(Job)
+            seen['after'] = Job.objects.all().db
+            return HttpResponse()
+
+        response = replicas.ReplicaRoutingMiddleware(view)(request)
+        return response, seen
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(Job.objects.all().db, 'default')
+
+    def test_safe_reads_go_to_a_replica_until_the_request_writes(self):
+        response, seen = self.handle(RequestFactory().get('/'), write=True)
+        self.assertEqual((seen['before'], seen['session'], seen['after']), ('replica', 'default', 'default'))
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+
+        _, seen = self.handle(RequestFactory().post('/'))
+        self.assertEqual(seen['before'], 'default')
+
+    def test_clients_that_wrote_read_from_the_primary(self):
+        response, _ = self.handle(RequestFactory().post('/'), write=True)
+        factory = RequestFactory()
+        factory.cookies[replicas.PIN_COOKIE] = response.cookies[replicas.PIN_COOKIE].value
+        self.assertEqual(self.handle(factory.get('/'))[1]['before'], 'default')
+        with patch('backend.replicas.time.time', return_value=time.time() + 10):
+            self.assertEqual(self.handle(factory.get('/'))[1]['before'], 'replica')
+
+        self.handle(RequestFactory().post('/', HTTP_AUTHORIZATION="Bearer abc"), write=True)
+        self.assertEqual(self.handle(RequestFactory().get('/', HTTP_AUTHORIZATION="Bearer abc"))[1]['before'], 'default')
+        self.assertEqual(self.handle(RequestFactory().get('/', HTTP_AUTHORIZATION="Bearer xyz"))[1]['before'], 'replica')
+
+    def test_unhealthy_replicas_are_skipped(self):
+        self.healthy.side_effect = lambda aliases: []
+        self.assertEqual(self.handle(RequestFactory().get('/'))[1]['before'], 'default')
+
+
+class ReplicaHealthTests(TestCase):
+    def test_health_is_checked_once_per_interval(self):
+        health = replicas.ReplicaHealth()
+        self.assertEqual(health.healthy(['default']), ['default'])
+        with patch.object(health, 'check', return_value=False) as check:
+            self.assertEqual(health.healthy(['default']), ['default'])
+            check.assert_not_called()
+            with override_settings(REPLICA_HEALTH_INTERVAL=-1):
+                self.assertEqual(health.healthy(['default']), [])
+        self.assertEqual(health.status(), {'default': False})
+
+    def test_replica_without_schema_is_unhealthy(self):
+        with patch.object(connection, 'cursor', side_effect=DatabaseError("no such table: django_migrations")), \
+                self.assertLogs('backend.replicas', 'WARNING'):
+            self.assertFalse(replicas.ReplicaHealth().check('default'))
+
+
+class StaticFilesTests(SimpleTestCase):
+    def test_only_referenced_project_files_are_collected(self):
+        finder = staticfiles.ReferencedFilesFinder()
+        collected = {path for path, storage in finder.list([])}
+        # Linked from the templates, and from their stylesheets
+        self.assertIn('assets/css/style.css', collected)
+        self.assertIn('assets/fonts/fa-solid-900.woff2', collected)
+        # The theme's docs and unused plugins, but all of the admin
+        self.assertFalse([path for path in collected if path.startswith(('Doc/', 'syntax-highlighter/'))])
+        self.assertNotIn('css/responsive.css', collected)
+        self.assertIn('admin/js/core.js', collected)
+
+    def test_css_references_are_resolved_against_the_stylesheet(self):
+        source = """
+            @import "base.css";
+            src: url('../fonts/icons.eot?#iefix') format('embedded-opentype'), url(data:font/woff2;base64,AAA);
+            background: url("https://example.com/bg.png"), url(../img/bg.jpg);
+        """
+        self.assertEqual(
+            staticfiles.css_references('assets/css/style.css', source),
+            ['assets/css/base.css', 'assets/fonts/icons.eot', 'assets/img/bg.jpg'],
+        )
+
+    @override_settings(DEBUG=False)
+    def test_uncollected_files_are_linked_unhashed(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = staticfiles.CompressedManifestStorage(location=root)
+            self.assertEqual(storage.url('js/employeradmin.js'), '/static/js/employeradmin.js')
+
+
+class DownloadTests(APITestCase):
+    CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE=None)
+        self.override.enable()
+        self.employer = make_employer()
+        self.student = make_student()
+        self.student.cv.save("Thabo CV.pdf", ContentFile(self.CONTENT))
+        self.application = Application.objects.create(
+            job=make_job(self.employer), applicant=self.student, cover_letter="Hi", resume=self.student.cv.name,
+        )
+        self.url = reverse('application-file', args=[self.application.id, 'resume'])
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def download(self, user, url=None, **headers):
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+        response = self.client.get(url or self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_applicant_and_job_owner_only_with_one_query(self):
+        for user in (self.student.user, self.employer.user):
+            self.client.force_authenticate(User.objects.get(pk=user.pk))
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertIn('filename="Thabo_CV.pdf"', response['Content-Disposition'])
+            self.assertEqual(response['ETag'], f'"{self.student.cv.name.rsplit("/", 1)[1][:64]}"')
+
+        outsiders = [make_employer("globex").user, make_student("lerato").user]
+        for user in outsiders:
+            self.assertEqual(self.download(user)[0].status_code, 404)
+        self.assertEqual(self.download(self.student.user, reverse('application-file', args=[self.application.id, 'notes']))[0].status_code, 404)
+        self.assertEqual(self.download(self.student.user, reverse('application-file', args=[self.application.id, 'additional_documents']))[0].status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_api_links_files_to_the_download_views(self):
+        self.client.force_authenticate(User.objects.get(pk=self.employer.user.pk))
+        data = self.client.get(reverse('application-detail', args=[self.application.id])).data
+        self.assertEqual(data['resume'], 'http://testserver' + self.url)
+        self.assertIsNone(data['additional_documents'])
+        self.assertEqual(data['applicant']['cv'], 'http://testserver' + reverse('student-cv', args=[self.student.id]))
+        for url in (data['resume'], data['applicant']['cv']):
+            response, body = self.download(self.employer.user, url)
+            self.assertEqual((response.status_code, body), (200, self.CONTENT))
+
+    def test_ranges_and_conditional_requests(self):
+        size = len(self.CONTENT)
+        response, body = self.download(self.student.user, HTTP_RANGE='bytes=5-9')
+        self.assertEqual((response.status_code, body), (206, self.CONTENT[5:10]))
+        self.assertEqual(response['Content-Range'], f'bytes 5-9/{size}')
+        self.assertEqual(response['Content-Length'], '5')
+
+        response, body = self.download(self.student.user, HTTP_RANGE='bytes=-4')
+        self.assertEqual((response.status_code, body), (206, self.CONTENT[-4:]))
+        response, body = self.download(self.student.user, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{size}'))
+        response, body = self.download(self.student.user, HTTP_RANGE='bytes=0-1,4-5')
+        self.assertEqual((response.status_code, body), (200, self.CONTENT))
+
+        etag = response['ETag']
+        response, body = self.download(self.student.user, HTTP_RANGE='bytes=5-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, self.CONTENT))
+        response, body = self.download(self.student.user, HTTP_RANGE='bytes=5-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.download(self.student.user, HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+    def test_no_range_of_an_empty_file_is_satisfiable(self):
+        self.application.additional_documents.save("empty.pdf", ContentFile(b''))
+        url = reverse('application-file', args=[self.application.id, 'additional_documents'])
+        for header in ('bytes=-100', 'bytes=0-'):
+            response, body = self.download(self.student.user, url, HTTP_RANGE=header)
+            self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */0'))
+        response, body = self.download(self.student.user, url)
+        self.assertEqual((response.status_code, body), (200, b''))
+
+    def test_front_server_sends_the_file(self):
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response, body = self.download(self.employer.user)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.student.cv.name}')
+        self.assertEqual(body, b'')
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response, body = self.download(self.employer.user)
+        self.assertEqual(response['X-Sendfile'], self.student.cv.path)
+
+    def test_student_cv_for_the_student_and_employers_applied_to(self):
+        url = reverse('student-cv', args=[self.student.id])
+        for user in (self.student.user, self.employer.user):
+            response, body = self.download(user, url)
+            self.assertEqual((response.status_code, body), (200, self.CONTENT))
+        self.assertEqual(self.download(make_employer("globex").user, url)[0].status_code, 404)
+
+
+class RecommendationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        recommendations.invalidate()
+        self.addCleanup(recommendations.invalidate)
+        self.employer = make_employer()
+        self.data_job = make_job(
+            self.employer, title="Data Analyst Intern", education="BSc Statistics or Mathematics",
+            description="Clean datasets and build statistical models and dashboards.",
+        )
+        self.web_job = make_job(
+            self.employer, title="Web Developer Intern", education="Diploma in Software Development",
+            description="Build Django web applications and REST APIs.",
+        )
+        self.senior_job = make_job(
+            self.employer, title="Senior Statistician", education="MSc Statistics", experience="5+ years",
+            description="Lead statistical modelling for the analytics team.",
+        )
+        make_job(self.employer, title="Accountant", description="Prepare financial statements and audits.")
+        self.student = make_student()
+        self.student.degree = "BSc Statistics"
+        self.student.year_of_study = "3"
+        self.student.save()
+        self.client.force_authenticate(User.objects.get(pk=self.student.user.pk))
+
+    def recommended(self, student=None, **params):
+        student = student or self.student
+        response = self.client.get(reverse('job-recommendations'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(job['id'], job['match_score']) for job in response.data]
+
+    def test_ranks_jobs_matching_the_degree_and_cv(self):
+        ranked = self.recommended()
+        self.assertEqual([job_id for job_id, _ in ranked], [self.data_job.id, self.senior_job.id])
+        self.assertTrue(1 >= ranked[0][1] >= ranked[1][1] > 0)
+
+        # The CV's extracted text counts too
+        Student.objects.filter(pk=self.student.pk).update(cv='cvs/thabo.pdf')
+        DocumentText.objects.create(name='cvs/thabo.pdf', text="Python Django REST web developer", status='done')
+        self.client.force_authenticate(User.objects.get(pk=self.student.user.pk))
+        self.assertIn(self.web_job.id, [job_id for job_id, _ in self.recommended()])
+
+    def test_leaves_out_applied_and_inactive_jobs(self):
+        self.recommended()
+        Application.objects.create(job=self.data_job, applicant=self.student, cover_letter="Hi")
+        self.assertEqual([job_id for job_id, _ in self.recommended()], [self.senior_job.id])
+        cache.clear()
+        self.assertEqual([job_id for job_id, _ in self.recommended()], [self.senior_job.id])
+
+        self.senior_job.is_active = False
+        self.senior_job.save()
+        self.assertEqual(self.recommended(), [])
+
+    def test_job_changes_update_the_index_incrementally(self):
+        self.recommended()
+        index = recommendations.get_index()
+        self.web_job.title = "Statistics Intern"
+        self.web_job.education = "BSc Statistics"
+        self.web_job.save()
+        self.assertIn(self.web_job.id, [job_id for job_id, _ in self.recommended()])
+        new_job = make_job(self.employer, title="Statistics Tutor", description="Tutor first-year statistics.")
+        self.assertIn(new_job.id, [job_id for job_id, _ in self.recommended()])
+        self.assertIs(recommendations.get_index(), index)
+
+        self.data_job.delete()
+        self.assertIsNot(recommendations.get_index(), index)
+        self.assertNotIn(self.data_job.id, [job_id for job_id, _ in self.recommended()])
+
+    def test_scoring_reads_one_snapshot_while_the_index_changes(self):
+        if recommendations.numpy is None:
+            self.skipTest("Only the NumPy index is repacked")
+        index = recommendations.get_index()
+        new_job = make_job(self.employer, title="Statistics Tutor", description="Tutor statistics.")
+        row = recommendations._job_rows(Job.objects.filter(pk=new_job.pk))[0]
+        allowance = recommendations.experience_allowance
+
+        def refresh_meanwhile(year):
+            if new_job.id not in index.row_of:
+                index.apply_changes([row])
+            return allowance(year)
+
+        profiles = [(self.student.pk, recommendations.student_terms("BSc Statistics", ''), "3")]
+        with patch.object(recommendations, 'experience_allowance', refresh_meanwhile):
+            scored = index.score(profiles, {self.student.pk: {new_job.id}}, limit=10)
+        self.assertEqual([job_id for job_id, _ in scored[self.student.pk]], [self.data_job.id, self.senior_job.id])
+        self.assertEqual(len(index.packed[0]), len(index.job_ids))
+
+    def test_numpy_and_pure_python_agree(self):
+        students = [self.student, make_student("lerato"), make_student("sipho")]
+        students[1].degree, students[2].degree = "BSc Computer Science", "BCom Accounting"
+        for student in students[1:]:
+            student.save()
+        with patch.object(recommendations, 'BATCH_SIZE', 2):
+            dense = recommendations.recommend_many(students, limit=2)
+        cache.clear()
+        recommendations.invalidate()
+        with patch.object(recommendations, 'numpy', None):
+            sparse = recommendations.recommend_many(students, limit=2)
+        self.assertEqual(dense.keys(), sparse.keys())
+        for student_id, ranked in dense.items():
+            self.assertEqual([job for job, _ in ranked], [job for job, _ in sparse[student_id]])
+            for (_, a), (_, b) in zip(ranked, sparse[student_id]):
+                self.assertAlmostEqual(a, b, places=5)
+        self.assertEqual(len(dense[self.student.pk]), 2)
+
+    def test_cached_and_constant_queries(self):
+        self.recommended()
+        for _ in range(5):
+            make_job(self.employer, title="Statistics Intern")
+        self.recommended()
+        with self.assertNumQueries(2):
+            # Applied jobs, then the jobs themselves. There is no CV text to read.
+            ranked = self.recommended(limit=3)
+        self.assertEqual(len(ranked), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.recommended(limit=3), ranked)
+
+        self.client.force_authenticate(self.employer.user)
+        self.assertEqual(self.client.get(reverse('job-recommendations')).status_code, 403)
+        self.client.force_authenticate(self.student.user)
+        self.assertEqual(self.client.get(reverse('job-recommendations'), {'limit': 500}).status_code, 400)
+
+    def test_recommend_jobs_command(self):
+        make_student("lerato")
+        out = StringIO()
+        call_command('recommend_jobs', '--rebuild', stdout=out)
+        self.assertIn("Vectorised 4 jobs", out.getvalue())
+        self.assertIn("for 2 students", out.getvalue())
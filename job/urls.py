@@ -1,22 +1,39 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     JobListAPIView, JobCreateAPIView, JobDetailAPIView,
-    MyJobPostingsAPIView, JobStatsAPIView,
+    MyJobPostingsAPIView, JobStatsAPIView, RecommendedJobsAPIView,
     ApplicationCreateAPIView, MyApplicationsAPIView,
-    EmployerApplicationsAPIView, ApplicationStatusUpdateAPIView,
-    ApplicationDetailAPIView,
+    EmployerApplicationsAPIView, EmployerApplicationsExportAPIView,
+    EmployerApplicationsBundleAPIView,
+    ApplicationStatusUpdateAPIView,
+    ApplicationBulkStatusUpdateAPIView, ApplicationDetailAPIView,
+    ApplicationFileAPIView, StudentCVAPIView,
 )
 
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        AsyncJobListAPIView as JobListAPIView,
+        AsyncJobDetailAPIView as JobDetailAPIView,
+        AsyncMyApplicationsAPIView as MyApplicationsAPIView,
+    )
+
 urlpatterns = [
     path('jobs/', JobListAPIView.as_view(), name='job-list'),
     path('jobs/create/', JobCreateAPIView.as_view(), name='job-create'),
     path('jobs/<int:pk>/', JobDetailAPIView.as_view(), name='job-detail'),
     path('jobs/my/', MyJobPostingsAPIView.as_view(), name='my-jobs'),
     path('jobs/stats/', JobStatsAPIView.as_view(), name='job-stats'),
+    path('jobs/recommended/', RecommendedJobsAPIView.as_view(), name='job-recommendations'),
 
     path('applications/create/', ApplicationCreateAPIView.as_view(), name='application-create'),
     path('applications/my/', MyApplicationsAPIView.as_view(), name='my-applications'),
     path('applications/job/<int:job_id>/', EmployerApplicationsAPIView.as_view(), name='employer-applications'),
+    path('applications/job/<int:job_id>/export/<str:export_format>/', EmployerApplicationsExportAPIView.as_view(), name='employer-applications-export'),
+    path('applications/job/<int:job_id>/files/', EmployerApplicationsBundleAPIView.as_view(), name='employer-applications-files'),
+    path('applications/update-status/', ApplicationBulkStatusUpdateAPIView.as_view(), name='application-bulk-update-status'),
     path('applications/<int:application_id>/update-status/', ApplicationStatusUpdateAPIView.as_view(), name='application-update-status'),
     path('applications/<int:application_id>/', ApplicationDetailAPIView.as_view(), name='application-detail'),
+    path('applications/<int:application_id>/files/<str:field>/', ApplicationFileAPIView.as_view(), name='application-file'),
+    path('students/<int:student_id>/cv/', StudentCVAPIView.as_view(), name='student-cv'),
 ]
\ No newline at end of file
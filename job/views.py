@@ -1,47 +1,89 @@
-from rest_framework import generics, status
+from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.core.paginator import Paginator
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render 
-from django.db.models import Q
-
+from django.utils import timezone
+from django.views.decorators.http import condition
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Student
+from users.profiles import employer_profile, student_profile
+from users.throttling import BucketThrottleMixin
 from .models import Job, Application
+from .permissions import (
+    IsApplicantOrJobOwner, IsApplicationJobOwner, IsEmployer, IsJobOwnerOrReadOnly, IsStudent,
+)
+from .search import search_job_ids, rank_expression
+from . import conditional, documents, downloads, exports, recommendations, stats, summary, tasks
 from .serializers import (
-    JobSerializer, JobCreateSerializer,
+    JobSerializer, JobCreateSerializer, RecommendedJobSerializer,
     ApplicationSerializer, ApplicationCreateSerializer,
-    ApplicationStatusUpdateSerializer
+    ApplicationStatusUpdateSerializer, ApplicationBulkStatusItemSerializer,
+    ApplicationBulkStatusUpdateSerializer,
 )
 
+JOBS_PER_PAGE = 10
+HOME_CATEGORY_LIMIT = 8
+
 def home_view(request):
     """Renders the homepage with featured jobs and categories."""
-    
-    featured_jobs = Job.objects.filter(is_active=True).order_by('-posted_on')[:6]
-    
-    context = {
+    context = home_context(summary.featured_jobs(), summary.category_counts())
+    return render(request, "index.html", context) 
+
+
+def home_context(featured_jobs, counts):
+    return {
         'featured_jobs': featured_jobs,
-        'categories': [
-            {'name': 'Design & Creative', 'job_count': 653},
-            {'name': 'Development', 'job_count': 658},
-            {'name': 'Marketing', 'job_count': 400},
-            {'name': 'Finance', 'job_count': 210},
-        ]
+        'categories': counts['industries'][:HOME_CATEGORY_LIMIT],
+        'job_types': counts['types'],
     }
-    
-    return render(request, "index.html", context) 
 
 
 def job_list_view(request):
     """
-    Renders the job listing page (job_listing.html) with a list of all active jobs.
+    Renders the job listing page (job_listing.html) with one page of active jobs,
+    filtered the same way as the job list API.
     """
-    jobs = Job.objects.filter(is_active=True).order_by('-posted_on')
-    
-    context = {
-        'jobs': jobs, 
+    jobs = filter_jobs(listing_queryset(), request.GET)
+    paginator = Paginator(jobs, JOBS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, "job_listing.html", job_listing_context(request, paginator, page_obj))
+
+
+def listing_queryset():
+    return Job.objects.filter(is_active=True).select_related('employer')
+
+
+def job_listing_context(request, paginator, page_obj):
+    filters = request.GET.copy()
+    filters.pop('page', None)
+    return {
+        'jobs': page_obj.object_list,
+        'page_obj': page_obj,
+        'page_range': paginator.get_elided_page_range(page_obj.number, on_each_side=2, on_ends=1),
+        'filter_query': filters.urlencode(),
+        'filters': filters,
     }
-    return render(request, "job_listing.html", context)
 
 
+def _job_updated_at(request, pk):
+    # Shared by both validators so the page costs one query when unchanged
+    if not hasattr(request, '_job_updated_at'):
+        request._job_updated_at = Job.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return request._job_updated_at
+
+
+def _job_detail_etag(request, pk):
+    updated_at = _job_updated_at(request, pk)
+    return updated_at and conditional.strong_etag('job_details.html', pk, updated_at.isoformat())
+
+
+@condition(etag_func=_job_detail_etag, last_modified_func=_job_updated_at)
 def job_detail_view(request, pk):
     """
     Renders the single job detail page (job_details.html) for a specific job ID (pk).
@@ -65,161 +107,535 @@ def application_form_view(request, job_id):
     return render(request, 'application_form.html', context)
 
 
-class JobListAPIView(generics.ListAPIView):
+def filter_jobs(queryset, params):
+    """
+    Apply the search, location, type and experience filters from ``params``.
+    Searches come back in relevance order, annotated with ``search_rank``.
+    """
+    return apply_job_filters(queryset, params, ranked_search_ids(params))
+
+
+def ranked_search_ids(params):
+    """Job ids matching ``?search=``, best first, or None when not searching."""
+    search = params.get('search')
+    return search_job_ids(search) if search else None
+
+
+def apply_job_filters(queryset, params, ranked_ids):
+    location = params.get('location')
+    job_type = params.get('type')
+    experience = params.get('experience')
+
+    if ranked_ids is not None:
+        queryset = queryset.filter(id__in=ranked_ids)
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+    if job_type:
+        queryset = queryset.filter(type__icontains=job_type)
+    if experience:
+        queryset = queryset.filter(experience__icontains=experience)
+
+    if ranked_ids is not None:
+        return queryset.annotate(search_rank=rank_expression(ranked_ids)).order_by('search_rank')
+    return queryset.order_by('-posted_on', '-id')
+
+
+JOB_COLUMNS = {field.name for field in Job._meta.concrete_fields}
+APPLICATION_COLUMNS = {field.name for field in Application._meta.concrete_fields}
+JOB_SUMMARY_COLUMNS = ['job__title', 'job__location', 'job__updated_at', 'job__employer__company_name']
+
+
+def applications_count():
+    """
+    Per-job application count as a correlated subquery. Unlike a joined
+    Count() it needs no GROUP BY, so list queries keep their index order.
+    """
+    counts = (
+        Application.objects.filter(job=OuterRef('pk'))
+        .order_by().values('job').annotate(count=Count('id')).values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def job_list_queryset(fields=None):
+    """
+    Jobs for JobSerializer. With ``fields`` (from ``?fields=``) only the
+    columns, joins and annotations those fields need are queried.
+    """
+    queryset = Job.objects.all()
+    if fields is None or 'employer' in fields:
+        queryset = queryset.select_related('employer__user')
+    if fields is None or 'applications_count' in fields:
+        queryset = queryset.annotate(applications_count=applications_count())
+    if fields is not None:
+        queryset = queryset.only('id', 'posted_on', 'updated_at', *(fields & JOB_COLUMNS))
+    return queryset
+
+
+def application_list_queryset(fields=None, expand=()):
+    """
+    Applications for ApplicationSerializer. The nested job is either joined
+    in as a summary or, with ``?expand=job``, prefetched in full.
+    """
+    queryset = Application.objects.all()
+    columns = set(APPLICATION_COLUMNS if fields is None else fields & APPLICATION_COLUMNS)
+    columns.update({'id', 'applied_date', 'updated_at'})
+    if fields is None or 'applicant' in fields:
+        queryset = queryset.select_related('applicant__user')
+    if fields is None or 'job' in fields:
+        if 'job' in expand:
+            queryset = queryset.prefetch_related(Prefetch('job', queryset=job_list_queryset()))
+        else:
+            queryset = queryset.select_related('job__employer')
+            columns.update(JOB_SUMMARY_COLUMNS)
+    return queryset.only(*columns)
+
+
+class FieldSelectionMixin:
+    """Passes ``?fields=`` and ``?expand=`` through to the serializer context."""
+
+    def _query_param_set(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        return {part.strip() for part in value.split(',') if part.strip()}
+
+    def requested_fields(self):
+        return self._query_param_set('fields')
+
+    def requested_expansions(self):
+        return self._query_param_set('expand') or set()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, 'request', None) is not None:
+            context['fields'] = self.requested_fields()
+            context['expand'] = self.requested_expansions()
+        return context
+
+
+class AppliedJobsContextMixin(FieldSelectionMixin):
+    """Looks up the requesting student's applied job ids once per request."""
+    applied_job_ids = None
+
+    def needs_applied_job_ids(self):
+        fields = self.requested_fields()
+        return fields is None or 'user_has_applied' in fields
+
+    def applied_job_ids_queryset(self):
+        student = student_profile(self.request.user)
+        if student is None:
+            return Application.objects.none().values_list('job_id', flat=True)
+        return Application.objects.filter(applicant=student).values_list('job_id', flat=True)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if not self.needs_applied_job_ids():
+            return context
+        if self.applied_job_ids is None:
+            self.applied_job_ids = set(self.applied_job_ids_queryset())
+        context['applied_job_ids'] = self.applied_job_ids
+        return context
+
+
+class ApplicationListMixin(AppliedJobsContextMixin):
+    """Applied job ids are only needed when the nested job is expanded."""
+
+    def needs_applied_job_ids(self):
+        fields = self.requested_fields()
+        return 'job' in self.requested_expansions() and (fields is None or 'job' in fields)
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified validators for GET responses. When the
+    client's copy is still current a 304 goes out before anything is
+    serialized.
+    """
+
+    def validator_variant(self, context):
+        """Everything besides the objects themselves that shapes the body."""
+        return [
+            self.request.user.pk,
+            self.request.accepted_renderer.format,
+            sorted(context.get('fields') or ()),
+            sorted(context.get('expand') or ()),
+            sorted(context.get('applied_job_ids') or ()),
+        ]
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.object_response(self.get_object())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        return self.list_response(list(queryset) if page is None else page, paginated=page is not None)
+
+    def object_response(self, instance):
+        """The (possibly 304) response for an already loaded object."""
+        context = self.get_serializer_context()
+        etag, modified = conditional.validators([instance], self.validator_variant(context))
+        # The body also holds counts and the user's applied state, which
+        # change without touching updated_at: only the ETag covers them
+        response = conditional.not_modified(self.request, etag, modified, use_last_modified=False)
+        if response is not None:
+            return response
+        serializer = self.get_serializer_class()(instance, context=context)
+        return conditional.add_validators(Response(serializer.data), etag, modified)
+
+    def list_response(self, rows, paginated):
+        """The (possibly 304) response for an already loaded list or page of rows."""
+        context = self.get_serializer_context()
+        variant = self.validator_variant(context)
+        if paginated:
+            variant += [self.paginator.get_next_link(), self.paginator.get_previous_link()]
+        etag, modified = conditional.validators(rows, variant)
+        response = conditional.not_modified(self.request, etag, modified, use_last_modified=False)
+        if response is not None:
+            return response
+        data = self.get_serializer_class()(rows, many=True, context=context).data
+        response = self.get_paginated_response(data) if paginated else Response(data)
+        return conditional.add_validators(response, etag, modified)
+
+
+class JobListAPIView(ConditionalGetMixin, AppliedJobsContextMixin, generics.ListAPIView):
     """List all active jobs with optional filtering"""
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-posted_on', '-id')
 
     def get_queryset(self):
-        queryset = Job.objects.filter(is_active=True)
-        search = self.request.query_params.get('search')
-        location = self.request.query_params.get('location')
-        job_type = self.request.query_params.get('type')
-        experience = self.request.query_params.get('experience')
-        
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(detailed_experience__icontains=search)
-            )
-        if location:
-            queryset = queryset.filter(location__icontains=location)
-        if job_type:
-            queryset = queryset.filter(type__icontains=job_type)
-        if experience:
-            queryset = queryset.filter(experience__icontains=experience)
+        queryset = job_list_queryset(self.requested_fields()).filter(is_active=True)
+        return filter_jobs(queryset, self.request.query_params)
+
+    def get_cursor_ordering(self, queryset):
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+        return self.cursor_ordering
+
 
-        return queryset.order_by('-posted_on')
+class RecommendedJobsAPIView(FieldSelectionMixin, generics.ListAPIView):
+    """
+    Active jobs best matching the student's degree and CV, best first, as
+    ranked by job/recommendations.py. ``?limit=`` sets how many (default 10,
+    at most 50). Jobs the student has applied to are left out.
+    """
+    serializer_class = RecommendedJobSerializer
+    permission_classes = [IsAuthenticated, IsStudent]
+    permission_denied_messages = {'*': "Only students get job recommendations."}
+    pagination_class = None
+
+    def get_limit(self):
+        value = self.request.query_params.get('limit')
+        if value is None:
+            return recommendations.DEFAULT_LIMIT
+        if not value.isdigit() or not 1 <= int(value) <= recommendations.MAX_LIMIT:
+            raise ValidationError({'limit': f"Limit must be between 1 and {recommendations.MAX_LIMIT}."})
+        return int(value)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Applied jobs are never recommended
+        context['applied_job_ids'] = set()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        student = student_profile(request.user)
+        ranked = recommendations.recommend(student, self.get_limit())
+        scores = dict(ranked)
+        job_ids = list(scores)
+        applied = Application.objects.filter(job=OuterRef('pk'), applicant=student)
+        jobs = list(
+            job_list_queryset(self.requested_fields())
+            # Recommendations are cached, so applications since are dropped here
+            .filter(pk__in=job_ids, is_active=True)
+            .exclude(Exists(applied))
+            .order_by(rank_expression(job_ids))
+        )
+        for job in jobs:
+            job.match_score = scores[job.pk]
+        return Response(self.get_serializer(jobs, many=True).data)
 
 
 class JobCreateAPIView(generics.CreateAPIView):
     """Allow employers to create a new job"""
     serializer_class = JobCreateSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can create jobs."}
 
-    def perform_create(self, serializer):
-        user = self.request.user
-        if not hasattr(user, 'employer_profile'):
-            raise PermissionDenied("Only employers can create jobs.")
-        serializer.save() 
 
-
-class JobDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class JobDetailAPIView(ConditionalGetMixin, AppliedJobsContextMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a job (employer only for updates/deletes)"""
-    queryset = Job.objects.all()
     serializer_class = JobSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsJobOwnerOrReadOnly]
+    permission_denied_messages = {
+        'PUT': "You can only edit your own job postings.",
+        'PATCH': "You can only edit your own job postings.",
+        'DELETE': "You can only delete your own job postings.",
+    }
 
-    def update(self, request, *args, **kwargs):
-        job = self.get_object()
-        if not hasattr(request.user, 'employer_profile') or job.employer != request.user.employer_profile:
-            raise PermissionDenied("You can only edit your own job postings.")
-        return super().update(request, *args, **kwargs)
+    def get_queryset(self):
+        return job_list_queryset()
 
-    def destroy(self, request, *args, **kwargs):
-        job = self.get_object()
-        if not hasattr(request.user, 'employer_profile') or job.employer != request.user.employer_profile:
-            raise PermissionDenied("You can only delete your own job postings.")
-        return super().destroy(request, *args, **kwargs)
+    def perform_destroy(self, job):
+        # Take the posting down now; the cascading delete runs on the task queue
+        if job.is_active:
+            job.is_active = False
+            job.save(update_fields=['is_active', 'updated_at'])
+        tasks.delete_job.enqueue(job.id)
 
 
-class MyJobPostingsAPIView(generics.ListAPIView):
+class MyJobPostingsAPIView(ConditionalGetMixin, AppliedJobsContextMixin, generics.ListAPIView):
     """List all jobs posted by the logged-in employer"""
     serializer_class = JobSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can view their job postings."}
+    cursor_ordering = ('-posted_on', '-id')
 
     def get_queryset(self):
-        user = self.request.user
-        if not hasattr(user, 'employer_profile'):
-            raise PermissionDenied("Only employers can view their job postings.")
-        return Job.objects.filter(employer=user.employer_profile).order_by('-posted_on')
+        return (
+            job_list_queryset(self.requested_fields())
+            .filter(employer=employer_profile(self.request.user))
+            .order_by('-posted_on', '-id')
+        )
 
 
-class ApplicationCreateAPIView(generics.CreateAPIView):
+class ApplicationCreateAPIView(BucketThrottleMixin, generics.CreateAPIView):
     """Students apply to a job"""
     serializer_class = ApplicationCreateSerializer
-    permission_classes = [IsAuthenticated]
-
-    def perform_create(self, serializer):
-        user = self.request.user
-        if not hasattr(user, 'student_profile'):
-            raise PermissionDenied("Only students can apply for jobs.")
-        
-        serializer.save()
+    permission_classes = [IsAuthenticated, IsStudent]
+    throttle_scope = 'apply'
+    permission_denied_messages = {'*': "Only students can apply for jobs."}
 
 
-class MyApplicationsAPIView(generics.ListAPIView):
+class MyApplicationsAPIView(ConditionalGetMixin, ApplicationListMixin, generics.ListAPIView):
     """List all applications submitted by the logged-in student"""
     serializer_class = ApplicationSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsStudent]
+    permission_denied_messages = {'*': "Only students can view their applications."}
+    cursor_ordering = ('-applied_date', '-id')
 
     def get_queryset(self):
-        user = self.request.user
-        if not hasattr(user, 'student_profile'):
-            raise PermissionDenied("Only students can view their applications.")
-        return Application.objects.filter(applicant=user.student_profile).order_by('-applied_date')
+        return (
+            application_list_queryset(self.requested_fields(), self.requested_expansions())
+            .filter(applicant=student_profile(self.request.user))
+            .order_by('-applied_date', '-id')
+        )
 
 
-class EmployerApplicationsAPIView(generics.ListAPIView):
-    """List all applications for a specific job (employer only)"""
+class EmployerApplicationsAPIView(ConditionalGetMixin, ApplicationListMixin, generics.ListAPIView):
+    """
+    List all applications for a specific job (employer only). ``?search=``
+    keeps the applicants whose CV or documents mention every keyword, best
+    match first.
+    """
     serializer_class = ApplicationSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can view job applications."}
+    cursor_ordering = ('-applied_date', '-id')
 
     def get_queryset(self):
-        user = self.request.user
-        if not hasattr(user, 'employer_profile'):
-            raise PermissionDenied("Only employers can view job applications.")
         job_id = self.kwargs['job_id']
-        job = get_object_or_404(Job, id=job_id, employer=user.employer_profile)
-        return Application.objects.filter(job=job).order_by('-applied_date')
+        job = get_object_or_404(Job, id=job_id, employer=employer_profile(self.request.user))
+        queryset = (
+            application_list_queryset(self.requested_fields(), self.requested_expansions())
+            .filter(job=job)
+        )
+
+        search = self.request.query_params.get('search')
+        ranked_ids = documents.search_application_ids(job, search) if search else None
+        if ranked_ids is not None:
+            return (
+                queryset.filter(id__in=ranked_ids)
+                .annotate(search_rank=rank_expression(ranked_ids))
+                .order_by('search_rank')
+            )
+        return queryset.order_by('-applied_date', '-id')
+
+    def get_cursor_ordering(self, queryset):
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+        return self.cursor_ordering
+
+
+class EmployerApplicationsExportAPIView(generics.GenericAPIView):
+    """Stream a job's applications as CSV or NDJSON (employer only)"""
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can export job applications."}
+
+    def get(self, request, job_id, export_format, *args, **kwargs):
+        if export_format not in exports.STREAMERS:
+            raise ValidationError({'format': f"Export format must be one of: {sorted(exports.STREAMERS)}"})
+        job = get_object_or_404(Job, id=job_id, employer=employer_profile(request.user))
+
+        rows = exports.export_rows(job, status=request.query_params.get('status'))
+        response = StreamingHttpResponse(
+            exports.streaming_content(request, exports.STREAMERS[export_format](rows)),
+            content_type=exports.CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="job-{job.id}-applications.{export_format}"'
+        return response
+
+
+class EmployerApplicationsBundleAPIView(generics.GenericAPIView):
+    """Stream a ZIP of every resume and document for a job (employer only)"""
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can download application files."}
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = get_object_or_404(Job, id=job_id, employer=employer_profile(request.user))
+
+        storage = Application._meta.get_field('resume').storage
+        archive = exports.stream_zip(job, storage, status=request.query_params.get('status'))
+        response = StreamingHttpResponse(
+            exports.streaming_content(request, archive),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="job-{job.id}-applications.zip"'
+        return response
+
+
+class ApplicationFileAPIView(generics.GenericAPIView):
+    """Download an application's resume or document (its applicant or the job's employer)"""
+    permission_classes = [IsAuthenticated]
+    fields = ('resume', 'additional_documents')
+
+    def get(self, request, application_id, field, *args, **kwargs):
+        if field not in self.fields:
+            raise Http404("No such file.")
+        # Who may see it and where it is, in one query
+        queryset = (
+            Application.objects
+            .filter(Q(applicant__user_id=request.user.pk) | Q(job__employer__user_id=request.user.pk))
+            .annotate(original_name=downloads.original_name(field))
+        )
+        application = get_object_or_404(queryset, pk=application_id)
+        fieldfile = getattr(application, field)
+        name = downloads.download_name(fieldfile, application.original_name, f"application-{application.id}-{field}")
+        return downloads.serve(request, fieldfile, name)
+
+
+class StudentCVAPIView(generics.GenericAPIView):
+    """Download a student's CV (the student, or an employer they have applied to)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, student_id, *args, **kwargs):
+        applied_to_employer = Application.objects.filter(
+            applicant=OuterRef('pk'), job__employer__user_id=request.user.pk,
+        )
+        queryset = (
+            Student.objects
+            .filter(Q(user_id=request.user.pk) | Q(Exists(applied_to_employer)))
+            .annotate(original_name=downloads.original_name('cv'))
+        )
+        student = get_object_or_404(queryset, pk=student_id)
+        name = downloads.download_name(student.cv, student.original_name, f"student-{student.id}-cv")
+        return downloads.serve(request, student.cv, name)
 
 
 class ApplicationStatusUpdateAPIView(generics.UpdateAPIView):
     """Employers update the status or notes of an application"""
     serializer_class = ApplicationStatusUpdateSerializer
-    permission_classes = [IsAuthenticated]
-    queryset = Application.objects.all()
+    permission_classes = [IsAuthenticated, IsApplicationJobOwner]
+    permission_denied_messages = {'*': "You can only update applications for your own job postings."}
+    queryset = Application.objects.select_related('job').select_for_update(of=('self',))
     lookup_url_kwarg = 'application_id'
 
-    def perform_update(self, serializer):
-        application = self.get_object()
-        user = self.request.user
-        if not hasattr(user, 'employer_profile') or application.job.employer != user.employer_profile:
-            raise PermissionDenied("You can only update applications for your own job postings.")
-        serializer.save()
+    def update(self, request, *args, **kwargs):
+        # The row is locked from reading its old status until the stats
+        # counters are adjusted from it (job/signals.py), as in the bulk update
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
 
 
-class ApplicationDetailAPIView(generics.RetrieveAPIView):
+class ApplicationBulkStatusUpdateAPIView(generics.GenericAPIView):
+    """
+    Employers update the status and notes of many applications at once.
+    Ownership is checked for the whole batch in one query and the changes
+    are written with a single bulk_update; each item gets its own result.
+    """
+    serializer_class = ApplicationBulkStatusUpdateSerializer
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can update applications."}
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        valid = {}
+        for raw in serializer.validated_data['updates']:
+            item = ApplicationBulkStatusItemSerializer(data=raw)
+            if not item.is_valid():
+                results.append({
+                    'application_id': raw.get('application_id'),
+                    'result': 'invalid',
+                    'errors': item.errors,
+                })
+                continue
+            application_id = item.validated_data['application_id']
+            if application_id in valid:
+                results.append({
+                    'application_id': application_id,
+                    'result': 'invalid',
+                    'errors': {'application_id': ["Duplicate application in this batch."]},
+                })
+                continue
+            valid[application_id] = item.validated_data
+            results.append({'application_id': application_id, 'result': None})
+
+        changed = []
+        now = timezone.now()
+        # Rows are locked from reading their old status until the counters
+        # are adjusted from it, so a concurrent change cannot skew them
+        with transaction.atomic():
+            owned = {
+                application.id: application
+                for application in Application.objects.filter(
+                    id__in=valid, job__employer=employer_profile(request.user)
+                ).select_for_update(of=('self',)).only('id', 'job_id', 'status', 'notes', 'updated_at')
+            }
+
+            transitions = []
+            for result in results:
+                if result['result'] is not None:
+                    continue
+                application = owned.get(result['application_id'])
+                if application is None:
+                    result['result'] = 'not_found'
+                    continue
+                data = valid[application.id]
+                notes = data.get('notes', application.notes)
+                if application.status == data['status'] and application.notes == notes:
+                    result['result'] = 'unchanged'
+                    continue
+                transitions.append((application.job_id, application.status, data['status']))
+                application.status = data['status']
+                application.notes = notes
+                application.updated_at = now
+                changed.append(application)
+                result['result'] = 'updated'
+
+            if changed:
+                Application.objects.bulk_update(changed, ['status', 'notes', 'updated_at'], batch_size=500)
+                stats.apply_status_changes(transitions)
+
+        return Response({'updated': len(changed), 'results': results})
+
+
+class ApplicationDetailAPIView(ConditionalGetMixin, ApplicationListMixin, generics.RetrieveAPIView):
     """Retrieve an application (student or employer)"""
     serializer_class = ApplicationSerializer
-    permission_classes = [IsAuthenticated]
-    queryset = Application.objects.all()
+    permission_classes = [IsAuthenticated, IsApplicantOrJobOwner]
     lookup_url_kwarg = 'application_id'
 
-    def get_object(self):
-        application = super().get_object()
-        user = self.request.user
-        if hasattr(user, 'student_profile') and application.applicant == user.student_profile:
-            return application
-        if hasattr(user, 'employer_profile') and application.job.employer == user.employer_profile:
-            return application
-        raise PermissionDenied("You do not have permission to view this application.")
+    def get_queryset(self):
+        return application_list_queryset(expand=self.requested_expansions())
 
 class JobStatsAPIView(generics.GenericAPIView):
-    """Return stats for an employer's jobs"""
-    permission_classes = [IsAuthenticated]
+    """Return stats for an employer's jobs, with a status funnel per job"""
+    permission_classes = [IsAuthenticated, IsEmployer]
+    permission_denied_messages = {'*': "Only employers can view job stats."}
 
     def get(self, request, *args, **kwargs):
-        user = request.user
-        if not hasattr(user, 'employer_profile'):
-            raise PermissionDenied("Only employers can view job stats.")
-        jobs = Job.objects.filter(employer=user.employer_profile)
-        total_jobs = jobs.count()
-        active_jobs = jobs.filter(is_active=True).count()
-        total_applications = Application.objects.filter(job__in=jobs).count()
-        return Response({
-            'total_jobs': total_jobs,
-            'active_jobs': active_jobs,
-            'total_applications': total_applications,
-        })
\ No newline at end of file
+        return Response(stats.employer_summary(employer_profile(request.user)))
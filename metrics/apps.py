@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MetricsConfig(AppConfig):
+    name = 'metrics'
+
+    def ready(self):
+        from .timing import install_query_recorder
+        connection_created.connect(install_query_recorder, dispatch_uid='metrics.install_query_recorder')
@@ -0,0 +1,122 @@
+"""
+Per-request instrumentation.
+
+Every request is labelled with its URL name (``job-list``,
+``users:login``...), or ``unmatched`` when no route matched, so the number
+of label values stays bounded. The middleware records total time, the
+number and duration of database queries, and serialize, render and
+template time into the histograms exported at ``/metrics``, and sends the
+same breakdown to the client in a ``Server-Timing`` header.
+
+Settings:
+
+``METRICS_SERVER_TIMING``
+    Add the ``Server-Timing`` header (default True).
+``METRICS_SLOW_REQUEST_MS``
+    Log the slowest queries of requests that take longer than this many
+    milliseconds to the ``metrics.slow_requests`` logger (default None,
+    off). Recording SQL costs a little memory, so leave it off unless
+    you are looking for something.
+``METRICS_SLOW_QUERY_LOG_LIMIT``
+    How many queries to log per slow request (default 5).
+"""
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import timing
+from .registry import COUNT_BUCKETS, counter, histogram
+
+logger = logging.getLogger('metrics.slow_requests')
+
+UNMATCHED = 'unmatched'
+
+REQUESTS = counter(
+    'http_requests', "Requests handled, by route, method and status code.",
+    ['route', 'method', 'status'],
+)
+REQUEST_DURATION = histogram(
+    'http_request_duration_seconds', "Time from the request reaching Django to the response leaving it.",
+    ['route', 'method'],
+)
+PHASE_DURATION = histogram(
+    'http_request_phase_duration_seconds',
+    "Time spent in the database, serializers, renderers and templates per request.",
+    ['route', 'phase'],
+)
+DB_QUERIES = histogram(
+    'http_request_db_queries', "Database queries per request.",
+    ['route'], buckets=COUNT_BUCKETS,
+)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None and match.view_name else UNMATCHED
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = self.start()
+        started = time.perf_counter()
+        with timing.activate(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = self.start()
+        started = time.perf_counter()
+        with timing.activate(timings):
+            response = await self.get_response(request)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def start(self):
+        return timing.RequestTimings(record_queries=getattr(settings, 'METRICS_SLOW_REQUEST_MS', None) is not None)
+
+    def finish(self, request, response, timings, total):
+        slow_ms = getattr(settings, 'METRICS_SLOW_REQUEST_MS', None)
+        route = route_name(request)
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(total, route=route, method=request.method)
+        DB_QUERIES.observe(timings.query_count, route=route)
+        for phase, seconds in timings.durations.items():
+            PHASE_DURATION.observe(seconds, route=route, phase=phase)
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', True):
+            response['Server-Timing'] = server_timing(timings, total)
+        if slow_ms is not None and total * 1000 > slow_ms:
+            log_slow_request(request, route, timings, total)
+        return response
+
+
+def server_timing(timings, total):
+    entries = [f'db;dur={timings.durations["db"] * 1000:.1f};desc="{timings.query_count} queries"']
+    for phase in timing.PHASES[1:]:
+        if timings.durations[phase]:
+            entries.append(f'{phase};dur={timings.durations[phase] * 1000:.1f}')
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def log_slow_request(request, route, timings, total):
+    limit = getattr(settings, 'METRICS_SLOW_QUERY_LOG_LIMIT', 5)
+    slowest = sorted(timings.queries, key=lambda query: query[0], reverse=True)[:limit]
+    logger.warning(
+        "Slow request %s %s (%s): %.0fms, %d queries in %.0fms%s",
+        request.method, request.path, route, total * 1000,
+        timings.query_count, timings.durations['db'] * 1000,
+        ''.join(f"\n  {seconds * 1000:.1f}ms [{alias}] {sql}" for seconds, alias, sql in slowest),
+    )
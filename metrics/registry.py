@@ -0,0 +1,171 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters and histograms live in this process's memory and are exported by
+the ``/metrics`` view. With several worker processes each one keeps, and
+reports, its own numbers; Prometheus adds them up per instance.
+
+Values that are cheap to read on demand (queue depth, cache sizes) are
+registered as collectors instead, functions called on every scrape::
+
+    registry.register_collector(lambda: [
+        ('taskqueue_tasks', "Tasks per status.", 'gauge', [({'status': 'queued'}, 3)]),
+    ])
+"""
+import math
+import threading
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {_escape_help(self.help)}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self, items):
+        for key, value in items:
+            yield f"{self.name}_total{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state['count'] if state else 0
+
+    def _samples(self, items):
+        names = self.labelnames + ('le',)
+        for key, state in items:
+            for bound, observed in zip(self.buckets, state['buckets']):
+                yield f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {observed}"
+            yield f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {state['count']}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(state['sum'])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {state['count']}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"A different metric named {metric.name!r} is already registered.")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector):
+        """Call ``collector()`` on every scrape; it returns ``(name, help, type, samples)`` tuples."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+        return collector
+
+    def clear(self):
+        """Reset every value (the metrics themselves stay registered). Used by tests."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def exposition(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].exposition())
+        for collector in self._collectors:
+            for name, help, type, samples in collector():
+                lines.append(f"# HELP {name} {_escape_help(help)}")
+                lines.append(f"# TYPE {name} {type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+registry = Registry()
+counter = registry.counter
+histogram = registry.histogram
+register_collector = registry.register_collector
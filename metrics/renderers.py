@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+from .timing import timed
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that counts encoding the response body as render time."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
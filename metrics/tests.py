@@ -0,0 +1,115 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from job.models import Job
+from users.models import User
+from .middleware import DB_QUERIES, PHASE_DURATION, REQUESTS
+from .registry import Registry, registry
+
+
+class RegistryTests(TestCase):
+    def test_exposition_format(self):
+        metrics = Registry()
+        hits = metrics.counter('hits', "Hits.", ['route'])
+        latency = metrics.histogram('latency_seconds', "Latency.", ['route'], buckets=(0.1, 1))
+        hits.inc(route='a"b')
+        hits.inc(2, route='a"b')
+        latency.observe(0.05, route='x')
+        latency.observe(0.5, route='x')
+        metrics.register_collector(lambda: [('depth', "Depth.", 'gauge', [({'status': 'queued'}, 3)])])
+
+        self.assertEqual(metrics.exposition().splitlines(), [
+            '# HELP hits Hits.',
+            '# TYPE hits counter',
+            'hits_total{route="a\\"b"} 3',
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{route="x",le="0.1"} 1',
+            'latency_seconds_bucket{route="x",le="1"} 2',
+            'latency_seconds_bucket{route="x",le="+Inf"} 2',
+            'latency_seconds_sum{route="x"} 0.55',
+            'latency_seconds_count{route="x"} 2',
+            '# HELP depth Depth.',
+            '# TYPE depth gauge',
+            'depth{status="queued"} 3',
+        ])
+
+    def test_labels_must_match(self):
+        hits = Registry().counter('hits', "Hits.", ['route'])
+        with self.assertRaises(ValueError):
+            hits.inc(path='/')
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.employer = User.objects.create_user(username="acme", role="employer").employer_profile
+        self.student = User.objects.create_user(username="thabo", role="student")
+        Job.objects.create(
+            employer=self.employer, title="Graduate Developer", description="Django",
+            location="Potchefstroom", type="Full Time",
+        )
+
+    def timing_entries(self, response):
+        return {entry.split(';')[0]: entry for entry in response['Server-Timing'].split(', ')}
+
+    def test_api_request_is_timed_by_route(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('job-list'))
+        self.assertEqual(response.status_code, 200)
+        entries = self.timing_entries(response)
+        self.assertEqual(set(entries), {'db', 'serialize', 'render', 'total'})
+        self.assertRegex(entries['db'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+
+        self.assertEqual(REQUESTS.value(route='job-list', method='GET', status=200), 1)
+        self.assertEqual(DB_QUERIES.count(route='job-list'), 1)
+        self.assertEqual(PHASE_DURATION.count(route='job-list', phase='serialize'), 1)
+
+    def test_template_view_is_timed(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('users:student_profile'))
+        self.assertIn('template', self.timing_entries(response))
+        self.assertEqual(REQUESTS.value(route='users:student_profile', method='GET', status=200), 1)
+
+    def test_unknown_paths_share_one_label(self):
+        self.client.get('/no/such/page/')
+        self.client.get('/nor/this/one/')
+        self.assertEqual(REQUESTS.value(route='unmatched', method='GET', status=404), 2)
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_turned_off(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('job_listing')))
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0, METRICS_SLOW_QUERY_LOG_LIMIT=1)
+    def test_slow_requests_log_their_slowest_queries(self):
+        with self.assertLogs('metrics.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('job_listing'))
+        message = logs.output[0]
+        self.assertIn("Slow request GET /listing/ (job_listing)", message)
+        self.assertEqual(message.count('[default] SELECT'), 1)
+
+
+class MetricsViewTests(TestCase):
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_scrape_lists_request_and_queue_metrics(self):
+        registry.clear()
+        self.client.get(reverse('job_listing'))
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('http_requests_total{route="job_listing",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="job_listing",method="GET",le="+Inf"} 1', body)
+        self.assertIn('taskqueue_tasks{status="queued"} 0', body)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_scrape_needs_staff_token_or_allowed_ip(self):
+        url = reverse('metrics')
+        # Not even from localhost by default: a local reverse proxy looks the same
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.5']):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.5').status_code, 200)
+        self.client.force_login(User.objects.create_user(username="admin", is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,97 @@
+"""
+Where a request's time goes.
+
+RequestMetricsMiddleware starts a RequestTimings for each request and
+makes it current for the code that handles it. Instrumented code adds to
+it with ``timed(phase)``: the template backend in metrics.templates, the
+renderer in metrics.renderers and the serializers that use
+TimedSerializerMixin. Database queries are counted by ``record_query``, an
+execute wrapper installed on every connection when it opens (see
+MetricsConfig.ready). The current request travels in a context variable,
+so queries that async views run through sync_to_async count too.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_timings', default=None)
+
+PHASES = ('db', 'serialize', 'render', 'template')
+
+
+class RequestTimings:
+    def __init__(self, record_queries=False):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.query_count = 0
+        self.record_queries = record_queries
+        self.queries = []
+        self._active = set()
+
+    def add(self, phase, seconds):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+    def add_query(self, seconds, alias, sql):
+        self.query_count += 1
+        self.add('db', seconds)
+        if self.record_queries:
+            self.queries.append((seconds, alias, sql))
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request, if any."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(time.perf_counter() - started, context['connection'].alias, sql)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def current():
+    """The RequestTimings of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def activate(timings):
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to ``phase`` of the current request.
+    Nested blocks for the same phase (a serializer inside a serializer, an
+    included template) are only counted once, by the outermost one.
+    """
+    timings = _current.get()
+    if timings is None or phase in timings._active:
+        yield
+        return
+    timings._active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._active.discard(phase)
+        timings.add(phase, time.perf_counter() - started)
+
+
+class TimedSerializerMixin:
+    """Counts a serializer's ``to_representation`` as serialize time."""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
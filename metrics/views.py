@@ -0,0 +1,32 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+from .registry import registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Open to staff users, to requests carrying
+    ``Authorization: Bearer <METRICS_TOKEN>`` when a token is configured,
+    and to requests from ``METRICS_ALLOWED_IPS`` (default: none). Behind a
+    reverse proxy every request comes from the proxy's address, so only
+    list addresses there when nothing proxies to this server.
+    """
+    if not _allowed(request):
+        raise PermissionDenied
+    return HttpResponse(registry.exposition(), content_type=CONTENT_TYPE)
+
+
+def _allowed(request):
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
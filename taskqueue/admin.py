@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_after', 'created_at', 'finished_at')
+    search_fields = ('name', 'last_error')
+    list_filter = ('status', 'name')
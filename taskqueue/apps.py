@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TaskqueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taskqueue'
+
+    def ready(self):
+        autodiscover_modules('tasks')  # Register the @task functions of every app
+
+        from metrics.registry import register_collector
+        from .worker import queue_metrics
+        register_collector(queue_metrics)
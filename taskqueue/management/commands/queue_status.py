@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from taskqueue.models import Task
+from taskqueue.worker import queue_depth
+
+
+class Command(BaseCommand):
+    help = "Show how many background tasks are queued, running, done and failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help="List the failed tasks and their last error.")
+
+    def handle(self, *args, **options):
+        depth = queue_depth()
+        for status, _ in Task.STATUS_CHOICES:
+            self.stdout.write(f"{status:<8} {depth[status]}")
+        self.stdout.write(f"ready    {depth['ready']} (oldest waiting {depth['oldest_ready_age']:.0f}s)")
+
+        if options['failed']:
+            for task in Task.objects.filter(status='failed').order_by('-finished_at')[:50]:
+                error = task.last_error.strip().splitlines()[-1:] or ['']
+                self.stdout.write(f"#{task.id} {task.name} after {task.attempts} attempts: {error[0]}")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks on a thread or process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Tasks run at the same time (default 4).")
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help="Run tasks in threads (default) or in separate processes for CPU-bound work.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls of an idle queue.")
+        parser.add_argument('--burst', action='store_true', help="Exit once no task is ready.")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            pool=options['pool'],
+            poll_interval=options['poll_interval'],
+        )
+        worker.install_signal_handlers()
+        self.stdout.write(f"Worker {worker.name} running up to {worker.concurrency} tasks in a {worker.pool} pool")
+        ran = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after running {ran} tasks."))
@@ -0,0 +1,21 @@
+"""
+Entry points for the process pool. Spawned children unpickle these before
+Django is set up, so this module must not import models at import time.
+"""
+import os
+
+
+def setup(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def execute(task_id):
+    from django.db import connection
+    from .worker import execute
+
+    try:
+        return execute(task_id)
+    finally:
+        connection.close()
@@ -0,0 +1,93 @@
+"""
+Task registration.
+
+Each app declares its background work in a ``tasks.py`` module, which is
+imported when Django starts (see TaskqueueConfig.ready)::
+
+    from taskqueue.registry import task
+
+    @task(priority=5, max_attempts=5)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue(user.id)
+
+Arguments are stored as JSON, so pass ids rather than model instances.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+DEFAULT_PRIORITY = 0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 10
+
+_registry = {}
+
+
+class TaskFunction:
+    """A registered task. Calling it runs the function inline."""
+
+    def __init__(self, function, name, priority, max_attempts, retry_delay):
+        self.function = function
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.__doc__ = function.__doc__
+        self.__wrapped__ = function
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<task {self.name}>"
+
+    def enqueue(self, *args, **kwargs):
+        """Queue a call with this task's default priority."""
+        return self.enqueue_with(args, kwargs)
+
+    def enqueue_with(self, args=(), kwargs=None, priority=None, delay=None):
+        """
+        Queue a call, optionally overriding the priority or holding it back
+        for ``delay`` seconds. The row is written in the caller's transaction,
+        so a rolled back request never leaves a task behind.
+        """
+        from .models import Task
+
+        run_after = timezone.now()
+        if delay:
+            run_after += timedelta(seconds=delay)
+        return Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs or {},
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_after=run_after,
+        )
+
+
+def task(function=None, *, name=None, priority=DEFAULT_PRIORITY,
+         max_attempts=DEFAULT_MAX_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY):
+    """Register ``function`` as a task. Usable with or without arguments."""
+
+    def register(function):
+        task_name = name or f"{function.__module__}.{function.__qualname__}"
+        if task_name in _registry and _registry[task_name].function is not function:
+            raise ValueError(f"A task named {task_name!r} is already registered.")
+        _registry[task_name] = TaskFunction(function, task_name, priority, max_attempts, retry_delay)
+        return _registry[task_name]
+
+    if function is not None:
+        return register(function)
+    return register
+
+
+def get_task(name):
+    """The registered task called ``name``. Raises KeyError if there is none."""
+    return _registry[name]
+
+
+def registered_names():
+    return sorted(_registry)
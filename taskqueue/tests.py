@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Task
+from .registry import get_task, task
+from .worker import LOCK_TIMEOUT, Worker, claim, execute, queue_depth, release_stale_locks, run_pending
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.flaky', max_attempts=2, retry_delay=30)
+def flaky():
+    raise RuntimeError("boom")
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_registered_task_runs_inline_or_queued(self):
+        self.assertIs(get_task('tests.record'), record)
+        record("inline")
+        record.enqueue("queued")
+        self.assertEqual(calls, ["inline"])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ["inline", "queued"])
+        self.assertEqual(Task.objects.get().status, 'done')
+
+    def test_higher_priority_runs_first(self):
+        record.enqueue("low")
+        record.enqueue_with(["high"], priority=5)
+        record.enqueue_with(["later"], delay=60)
+        run_pending()
+        self.assertEqual(calls, ["high", "low"])
+        self.assertEqual(Task.objects.filter(status='queued').count(), 1)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = flaky.enqueue()
+        with self.assertLogs('taskqueue.worker', 'WARNING'):
+            self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreaterEqual(job.run_after, timezone.now() + timedelta(seconds=29))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Task.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('taskqueue.worker', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_unknown_task_fails_without_retry(self):
+        Task.objects.create(name='tests.missing')
+        with self.assertLogs('taskqueue.worker', 'ERROR'):
+            run_pending()
+        self.assertEqual(Task.objects.get().status, 'failed')
+
+    def test_claimed_task_is_not_claimed_twice(self):
+        record.enqueue("once")
+        self.assertEqual(len(claim(5, 'a')), 1)
+        self.assertEqual(claim(5, 'b'), [])
+
+    def test_stale_locks_are_released(self):
+        job = record.enqueue("stuck")
+        claim(1, 'dead-worker')
+        Task.objects.filter(pk=job.pk).update(locked_at=timezone.now() - LOCK_TIMEOUT - timedelta(seconds=1))
+        self.assertEqual(release_stale_locks(), 1)
+        self.assertEqual(execute(claim(1, 'b')[0]), 'done')
+
+    def test_queue_depth(self):
+        record.enqueue("ready")
+        record.enqueue_with(["delayed"], delay=60)
+        Task.objects.create(name='tests.record', status='failed')
+        depth = queue_depth()
+        self.assertEqual((depth['queued'], depth['ready'], depth['failed'], depth['done']), (2, 1, 1, 0))
+
+        out = StringIO()
+        call_command('queue_status', '--failed', stdout=out)
+        self.assertIn("ready    1", out.getvalue())
+
+
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_worker_drains_the_queue_on_a_thread_pool(self):
+        for value in range(5):
+            record.enqueue(value)
+        ran = Worker(concurrency=3, poll_interval=0.01).run(burst=True)
+        self.assertEqual(ran, 5)
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4])
+        self.assertEqual(queue_depth()['done'], 5)
@@ -0,0 +1,231 @@
+"""
+Claiming and running queued tasks.
+
+Rows are claimed with a conditional UPDATE (``status = 'queued'`` in the
+WHERE clause), so several workers can share one database, SQLite included,
+without running a task twice. A task that raises is queued again after an
+exponential backoff until it has used up its attempts. Tasks whose worker
+died mid-run are released again once their lock is older than
+``LOCK_TIMEOUT``.
+"""
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.db import connection, connections
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from . import process
+from .models import Task
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = timedelta(minutes=30)
+MAX_RETRY_DELAY = 60 * 60
+DONE_RETENTION = timedelta(days=1)
+MAINTENANCE_INTERVAL = 60
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(limit, locked_by):
+    """Mark up to ``limit`` ready tasks as running and return their ids."""
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(status='queued', run_after__lte=now)
+        .order_by('-priority', 'run_after', 'id')
+        .values_list('id', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for task_id in candidates:
+        if len(claimed) >= limit:
+            break
+        updated = Task.objects.filter(pk=task_id, status='queued').update(
+            status='running', locked_by=locked_by, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(task_id)
+    return claimed
+
+
+def retry_delay(task_function, attempts):
+    """Seconds to wait before attempt ``attempts + 1``, with a little jitter."""
+    base = task_function.retry_delay if task_function else 0
+    delay = min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    return delay * random.uniform(1.0, 1.1)
+
+
+def execute(task_id):
+    """Run one claimed task and record the outcome. Returns the new status."""
+    task = Task.objects.get(pk=task_id)
+    try:
+        task_function = get_task(task.name)
+    except KeyError:
+        task_function = None
+        error = f"No task named {task.name!r} is registered."
+    else:
+        try:
+            task_function(*task.args, **task.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+        else:
+            error = None
+
+    now = timezone.now()
+    if error is None:
+        changes = {'status': 'done', 'finished_at': now, 'last_error': ''}
+    elif task_function is not None and task.attempts < task.max_attempts:
+        logger.warning("Task %s #%s failed, retrying:\n%s", task.name, task.id, error)
+        delay = retry_delay(task_function, task.attempts)
+        changes = {'status': 'queued', 'run_after': now + timedelta(seconds=delay), 'last_error': error}
+    else:
+        logger.error("Task %s #%s failed:\n%s", task.name, task.id, error)
+        changes = {'status': 'failed', 'finished_at': now, 'last_error': error}
+    Task.objects.filter(pk=task_id).update(locked_by='', locked_at=None, **changes)
+    return changes['status']
+
+
+def _execute_in_pool(task_id):
+    try:
+        return execute(task_id)
+    finally:
+        # Pool threads and processes hold their own connections
+        connection.close()
+
+
+def release_stale_locks():
+    """Queue again the tasks whose worker stopped before finishing them."""
+    cutoff = timezone.now() - LOCK_TIMEOUT
+    return Task.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None,
+    )
+
+
+def purge_done(retention=DONE_RETENTION):
+    """Delete finished tasks older than ``retention``. Failed tasks are kept."""
+    cutoff = timezone.now() - retention
+    deleted, _ = Task.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def run_pending(limit=None):
+    """
+    Run ready tasks in this thread until none are left (or ``limit`` have
+    run). Returns the number of tasks run. Handy in tests and scripts.
+    """
+    ran = 0
+    while limit is None or ran < limit:
+        claimed = claim(1, worker_name())
+        if not claimed:
+            break
+        execute(claimed[0])
+        ran += 1
+    return ran
+
+
+def queue_depth():
+    """
+    Counts per status, plus how many queued tasks are ready now and the age
+    in seconds of the oldest ready one.
+    """
+    now = timezone.now()
+    depth = dict.fromkeys([status for status, _ in Task.STATUS_CHOICES], 0)
+    depth.update(Task.objects.values_list('status').annotate(count=Count('id')).order_by())
+    ready = Task.objects.filter(status='queued', run_after__lte=now).aggregate(
+        count=Count('id'), oldest=Min('run_after'),
+    )
+    depth['ready'] = ready['count']
+    depth['oldest_ready_age'] = (now - ready['oldest']).total_seconds() if ready['oldest'] else 0.0
+    return depth
+
+
+def queue_metrics():
+    """queue_depth() as Prometheus gauges, collected on every /metrics scrape."""
+    depth = queue_depth()
+    statuses = [status for status, _ in Task.STATUS_CHOICES]
+    return [
+        ('taskqueue_tasks', "Tasks per status.", 'gauge',
+         [({'status': status}, depth[status]) for status in statuses]),
+        ('taskqueue_ready_tasks', "Queued tasks whose run_after has passed.", 'gauge',
+         [({}, depth['ready'])]),
+        ('taskqueue_oldest_ready_age_seconds', "How long the oldest ready task has been waiting.", 'gauge',
+         [({}, depth['oldest_ready_age'])]),
+    ]
+
+
+class Worker:
+    """Polls the queue and runs tasks on a thread or process pool."""
+
+    def __init__(self, concurrency=4, pool='thread', poll_interval=1.0, name=None):
+        self.concurrency = max(1, concurrency)
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.name = name or worker_name()
+        self.stopping = False
+
+    def make_executor(self):
+        if self.pool == 'process':
+            # Fresh interpreters: forked children would share the parent's connections
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=process.setup,
+                initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='task-worker')
+
+    @property
+    def run_task(self):
+        return process.execute if self.pool == 'process' else _execute_in_pool
+
+    def install_signal_handlers(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+    def stop(self, *args):
+        logger.info("Worker %s stopping after the running tasks finish", self.name)
+        self.stopping = True
+
+    def run(self, burst=False):
+        """
+        Work until stopped. With ``burst`` the worker exits as soon as the
+        queue has nothing ready. Returns the number of tasks run.
+        """
+        ran = 0
+        running = set()
+        last_maintenance = None
+        connections.close_all()
+        with self.make_executor() as executor:
+            while not self.stopping:
+                if last_maintenance is None or time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                    release_stale_locks()
+                    purge_done()
+                    last_maintenance = time.monotonic()
+
+                if len(running) < self.concurrency:
+                    claimed = claim(self.concurrency - len(running), self.name)
+                    running.update(executor.submit(self.run_task, task_id) for task_id in claimed)
+
+                if not running:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                finished, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    ran += 1
+                    if future.exception():
+                        logger.error("Worker crashed running a task", exc_info=future.exception())
+        connections.close_all()
+        return ran
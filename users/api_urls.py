@@ -0,0 +1,8 @@
+from django.urls import path
+from .api_views import TokenObtainAPIView, TokenRefreshAPIView, TokenRevokeAPIView
+
+urlpatterns = [
+    path('token/', TokenObtainAPIView.as_view(), name='token-obtain'),
+    path('token/refresh/', TokenRefreshAPIView.as_view(), name='token-refresh'),
+    path('token/revoke/', TokenRevokeAPIView.as_view(), name='token-revoke'),
+]
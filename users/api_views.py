@@ -0,0 +1,64 @@
+from django.contrib.auth.signals import user_logged_in
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+
+from . import tokens
+from .throttling import BucketThrottleMixin
+from .serializers import LoginSerializer, TokenRefreshSerializer
+
+
+class TokenObtainAPIView(BucketThrottleMixin, generics.GenericAPIView):
+    """Exchange a username and password for an access/refresh token pair."""
+    serializer_class = LoginSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
+
+    def throttle_user(self, request):
+        # Anything but an object is left for the serializer to reject
+        if not isinstance(request.data, dict):
+            return None
+        return request.data.get('username') or None
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        # Updates last_login, as a session login would
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+        return Response(tokens.issue_pair(user))
+
+
+class TokenRefreshAPIView(generics.GenericAPIView):
+    """Exchange a refresh token for a new pair. The old refresh token stops working."""
+    serializer_class = TokenRefreshSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens.revoke(serializer.validated_data['payload'], tokens.REFRESH)
+        return Response(tokens.issue_pair(serializer.validated_data['user']))
+
+
+class TokenRevokeAPIView(generics.GenericAPIView):
+    """
+    Log out: revoke the access token the request was made with and, if
+    given, the refresh token issued with it.
+    """
+    serializer_class = TokenRefreshSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            # Anything but an object is rejected by the serializer, before any token is revoked
+            self.get_serializer(data=request.data).is_valid(raise_exception=True)
+        if isinstance(request.auth, dict):
+            tokens.revoke(request.auth, tokens.ACCESS)
+        if request.data.get('refresh'):
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            if serializer.validated_data['user'].pk == request.user.pk:
+                tokens.revoke(serializer.validated_data['payload'], tokens.REFRESH)
+        return Response(status=204)
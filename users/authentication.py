@@ -0,0 +1,33 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import tokens
+from .models import User
+from .profiles import PROFILE_FIELDS
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <access token>`` (see users/tokens.py). Costs
+    one query: the user, loaded with both profiles. ``request.auth`` is
+    the token's payload.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed("Invalid Authorization header. Expected 'Bearer <token>'.")
+        try:
+            token = header[1].decode()
+            payload = tokens.decode(token, tokens.ACCESS)
+            user = User.objects.select_related(*PROFILE_FIELDS).filter(pk=payload['u']).first()
+            tokens.check_user(payload, user)
+        except (UnicodeError, tokens.InvalidToken) as exc:
+            raise AuthenticationFailed(str(exc) if isinstance(exc, tokens.InvalidToken) else "Token is invalid.")
+        return user, payload
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -0,0 +1,18 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+from .profiles import PROFILE_FIELDS
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the student and employer profiles together
+    with the session's user, so role checks later in the request are free.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related(*PROFILE_FIELDS).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from users.models import StoredBlob
+from users.storage import blob_fields, blob_storage, is_blob, recount_references
+
+
+class Command(BaseCommand):
+    help = (
+        "Garbage-collect unreferenced blobs in the content-addressed storage, "
+        "optionally importing legacy media files into it first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--import-legacy", action="store_true",
+            help="Move files stored before deduplication (cvs/, resumes/, documents/) into blob storage.",
+        )
+        parser.add_argument(
+            "--delete-originals", action="store_true",
+            help="With --import-legacy, delete the legacy files once imported.",
+        )
+        parser.add_argument(
+            "--recount", action="store_true",
+            help="Recompute reference counts from the database before collecting.",
+        )
+        parser.add_argument(
+            "--grace-minutes", type=int, default=60,
+            help="Keep unreferenced blobs younger than this, since uploads may still be in flight.",
+        )
+
+    def handle(self, *args, **options):
+        if options["import_legacy"]:
+            self.import_legacy(options["delete_originals"])
+        if options["recount"] or options["import_legacy"]:
+            recount_references()
+
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+        removed = 0
+        freed = 0
+        for blob in StoredBlob.objects.filter(ref_count__lte=0, created_at__lt=cutoff).iterator():
+            blob_storage.delete(blob.name)
+            blob.delete()
+            removed += 1
+            freed += blob.size
+        total = StoredBlob.objects.aggregate(total=Sum("size"))["total"] or 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {removed} unreferenced blobs ({freed} bytes). {total} bytes stored."
+        ))
+
+    def import_legacy(self, delete_originals):
+        imported = {}
+        for model, field_name in blob_fields():
+            rows = (
+                model._default_manager.exclude(**{field_name: ""})
+                .exclude(**{field_name: None})
+                .values_list("pk", field_name)
+            )
+            for pk, name in rows.iterator():
+                if is_blob(name):
+                    continue
+                if name not in imported:
+                    if not blob_storage.exists(name):
+                        self.stderr.write(f"Missing file {name} on {model.__name__} {pk}, skipped.")
+                        continue
+                    with blob_storage.open(name) as handle:
+                        imported[name] = blob_storage.save(name, handle)
+                model._default_manager.filter(pk=pk).update(**{field_name: imported[name]})
+
+        if delete_originals:
+            for name in imported:
+                blob_storage.delete(name)
+        self.stdout.write(f"Imported {len(imported)} legacy files into blob storage.")
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from .storage import blob_storage
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -20,7 +21,7 @@ class Student(models.Model):
     student_id = models.CharField(max_length=50, unique=True)
     degree = models.CharField(max_length=100, blank=True)
     year_of_study = models.CharField(max_length=50, blank=True)
-    cv = models.FileField(upload_to="cvs/", blank=True, null=True)
+    cv = models.FileField(upload_to="cvs/", storage=blob_storage, blank=True, null=True)
 
     def __str__(self):
         return self.user.username or f"Student ID {self.student_id}"
@@ -34,3 +35,19 @@ class Employer(models.Model):
 
     def __str__(self):
         return self.company_name or self.user.username
+
+
+class StoredBlob(models.Model):
+    """
+    One deduplicated file in the content-addressed storage (users/storage.py).
+    ``ref_count`` is the number of model file fields pointing at it.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    original_name = models.CharField(max_length=255, blank=True)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.original_name or self.name
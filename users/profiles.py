@@ -0,0 +1,41 @@
+"""
+Role and profile lookups that cost at most one query per request.
+
+``hasattr(user, 'student_profile')`` queries the database every time the
+profile is missing, because Django only caches related objects it found.
+These helpers load both profiles together and cache misses as well, on
+the user object, which lives as long as the request. Users loaded by
+ProfileModelBackend (users/backends.py), i.e. every session-authenticated
+request, already carry both relations and need no query at all.
+"""
+from .models import User
+
+PROFILE_FIELDS = ('student_profile', 'employer_profile')
+
+
+def load_profiles(user):
+    """Cache both profile relations of ``user``, present or not."""
+    if not getattr(user, 'is_authenticated', False) or user.pk is None:
+        return
+    cache = user._state.fields_cache
+    missing = [field for field in PROFILE_FIELDS if field not in cache]
+    if not missing:
+        return
+    loaded = User.objects.select_related(*missing).only('id', *missing).get(pk=user.pk)
+    for field in missing:
+        profile = loaded._state.fields_cache.get(field)
+        if profile is not None:
+            profile._state.fields_cache['user'] = user
+        cache[field] = profile
+
+
+def student_profile(user):
+    """The user's Student profile, or None."""
+    load_profiles(user)
+    return user._state.fields_cache.get('student_profile') if user.is_authenticated else None
+
+
+def employer_profile(user):
+    """The user's Employer profile, or None."""
+    load_profiles(user)
+    return user._state.fields_cache.get('employer_profile') if user.is_authenticated else None
@@ -1,7 +1,9 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import User, Student, Employer
+from . import tokens
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
@@ -15,8 +17,30 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email", "first_name", "last_name", "role"]
 
 
+class DownloadURLField(serializers.Field):
+    """
+    A stored file as the URL of the view that serves it after a permission
+    check (``view_name``, with ``url_kwargs(instance, field_name)``), or
+    None when no file is set. Stored files have no public URL.
+    """
+
+    def __init__(self, view_name, url_kwargs, **kwargs):
+        kwargs['read_only'] = True
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+        self.view_name = view_name
+        self.url_kwargs = url_kwargs
+
+    def to_representation(self, instance):
+        if not getattr(instance, self.field_name):
+            return None
+        return reverse(self.view_name, kwargs=self.url_kwargs(instance, self.field_name),
+                       request=self.context.get('request'))
+
+
 class StudentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    cv = DownloadURLField('student-cv', lambda student, field: {'student_id': student.pk})
 
     class Meta:
         model = Student
@@ -27,7 +51,6 @@ class StudentSerializer(serializers.ModelSerializer):
             "degree",
             "year_of_study",
             "cv",
-            "cover_letter",
         ]
 
 
@@ -166,3 +189,18 @@ class StudentCVUploadSerializer(serializers.ModelSerializer):
         instance.cv = validated_data.get("cv", instance.cv)
         instance.save()
         return instance
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, data):
+        try:
+            payload = tokens.decode(data["refresh"], tokens.REFRESH)
+            user = User.objects.filter(pk=payload["u"]).first()
+            tokens.check_user(payload, user)
+        except tokens.InvalidToken as exc:
+            raise serializers.ValidationError({"refresh": str(exc)})
+        data["payload"] = payload
+        data["user"] = user
+        return data
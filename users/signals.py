@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from .models import User, Student, Employer
+from . import storage
+
+STUDENT_FILE_FIELDS = ['cv']
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -9,3 +12,17 @@ def create_profile(sender, instance, created, **kwargs):
             Student.objects.create(user=instance, student_id=f"STU{instance.pk:04d}")
         elif instance.is_employer():
             Employer.objects.create(user=instance, employer_id=f"EMP{instance.pk:04d}")
+
+
+# Reference counting for CVs kept in the content-addressed storage
+@receiver(post_init, sender=Student)
+def remember_cv(sender, instance, **kwargs):
+    storage.remember_files(instance, STUDENT_FILE_FIELDS)
+
+@receiver(post_save, sender=Student)
+def count_cv_reference(sender, instance, created, **kwargs):
+    storage.update_references(instance, STUDENT_FILE_FIELDS, created=created)
+
+@receiver(post_delete, sender=Student)
+def release_cv_reference(sender, instance, **kwargs):
+    storage.release_references(instance, STUDENT_FILE_FIELDS)
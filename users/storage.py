@@ -0,0 +1,161 @@
+"""
+Content-addressed, deduplicated file storage for CVs and application documents.
+
+Uploads are hashed with SHA-256 while they are streamed to a temporary file
+and stored once under ``blobs/<aa>/<bb>/<digest><ext>``. The digest is only
+known once the whole upload is written, so a file that is already stored
+is still written to the temporary file, which is then deleted instead of
+kept as a second copy. Each blob has a
+StoredBlob row whose ``ref_count`` is kept in step by model signals, and
+``manage.py collect_blobs`` deletes blobs nothing points at any more.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+
+# Sent after a saved model starts pointing at a different file. Receivers get
+# ``instance``, ``field_name`` and the new stored ``name``.
+file_changed = Signal()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by the SHA-256 of their content."""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, and an existing blob is reused
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        extension = os.path.splitext(name)[1].lower()[:16]
+        temp_dir = os.path.join(self.location, BLOB_PREFIX, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            hexdigest = digest.hexdigest()
+            blob_name = blob_name_for(hexdigest, extension)
+            full_path = self.path(blob_name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        StoredBlob.objects.get_or_create(
+            name=blob_name,
+            defaults={
+                'digest': hexdigest,
+                'size': size,
+                'original_name': os.path.basename(name)[:255],
+            },
+        )
+        return blob_name
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def blob_name_for(hexdigest, extension=''):
+    return f"{BLOB_PREFIX}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}"
+
+
+def blob_fields():
+    """``(model, field_name)`` for every file field backed by ``blob_storage``."""
+    from django.apps import apps
+    from django.db.models import FileField
+
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def recount_references():
+    """Recompute every StoredBlob.ref_count from the file fields that use it."""
+    from collections import Counter
+    from .models import StoredBlob
+
+    counts = Counter()
+    for model, field_name in blob_fields():
+        for name in model._default_manager.filter(**{f'{field_name}__startswith': BLOB_PREFIX + '/'}).values_list(field_name, flat=True).iterator():
+            counts[name] += 1
+    blobs = list(StoredBlob.objects.only('id', 'name', 'ref_count'))
+    for blob in blobs:
+        blob.ref_count = counts.get(blob.name, 0)
+    StoredBlob.objects.bulk_update(blobs, ['ref_count'], batch_size=500)
+    return len(blobs)
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX + '/')
+
+
+def _adjust(name, amount):
+    from .models import StoredBlob
+
+    if is_blob(name):
+        StoredBlob.objects.filter(name=name).update(ref_count=F('ref_count') + amount)
+
+
+def _loaded_name(instance, field_name):
+    """The stored file name, or ``None`` when the field was deferred."""
+    attname = instance._meta.get_field(field_name).attname
+    if attname not in instance.__dict__:
+        return None
+    value = instance.__dict__[attname]
+    return getattr(value, 'name', value) or ''
+
+
+# Signal helpers for models with blob-backed file fields
+
+def remember_files(instance, field_names):
+    instance._blob_names = {name: _loaded_name(instance, name) for name in field_names}
+
+
+def update_references(instance, field_names, created=False):
+    previous = getattr(instance, '_blob_names', {})
+    for field_name in field_names:
+        current = _loaded_name(instance, field_name)
+        before = '' if created else previous.get(field_name)
+        if current is None or before is None:
+            # Deferred field: collect_blobs --recount settles these
+            continue
+        if before != current:
+            _adjust(current, 1)
+            if before:
+                _adjust(before, -1)
+            if current:
+                file_changed.send(sender=type(instance), instance=instance, field_name=field_name, name=current)
+    remember_files(instance, field_names)
+
+
+def release_references(instance, field_names):
+    previous = getattr(instance, '_blob_names', {})
+    for field_name in field_names:
+        name = previous.get(field_name)
+        if name:
+            _adjust(name, -1)
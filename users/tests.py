@@ -0,0 +1,213 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from job.models import Job, Application
+from . import throttling
+from .models import User, StoredBlob
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_student(self, username):
+        return User.objects.create_user(username=username, role="student").student_profile
+
+    def upload_cv(self, student, content=b"PK\x03\x04 my cv", name="CV.docx"):
+        student.cv.save(name, ContentFile(content))
+        return student
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload_cv(self.make_student("thabo"))
+        second = self.upload_cv(self.make_student("lerato"), name="Lerato CV.docx")
+        self.assertEqual(first.cv.name, second.cv.name)
+        self.assertTrue(first.cv.name.startswith("blobs/") and first.cv.name.endswith(".docx"))
+        blob = StoredBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_applying_with_existing_cv_only_adds_a_reference(self):
+        student = self.upload_cv(self.make_student("thabo"))
+        employer = User.objects.create_user(username="acme", role="employer").employer_profile
+        job = Job.objects.create(employer=employer, title="Graduate Developer", description="Build things.")
+        application = Application.objects.create(
+            job=job, applicant=student, cover_letter="Hi", resume=student.cv,
+        )
+        self.assertEqual(application.resume.name, student.cv.name)
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+        application.delete()
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+
+    def test_replacing_a_cv_releases_the_old_blob(self):
+        student = self.upload_cv(self.make_student("thabo"))
+        old_name = student.cv.name
+        self.upload_cv(student, content=b"PK\x03\x04 my new cv")
+        self.assertEqual(StoredBlob.objects.get(name=old_name).ref_count, 0)
+        call_command("collect_blobs", grace_minutes=0, stdout=StringIO())
+        self.assertFalse(StoredBlob.objects.filter(name=old_name).exists())
+        self.assertTrue(student.cv.storage.exists(student.cv.name))
+        self.assertFalse(student.cv.storage.exists(old_name))
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        throttling.local_store.clear()
+        self.user = User.objects.create_user(username="thabo", password="s3cret-pass", role="student")
+
+    def obtain(self, password="s3cret-pass"):
+        return self.client.post(reverse('token-obtain'), {'username': "thabo", 'password': password})
+
+    def bearer(self, token):
+        return {'HTTP_AUTHORIZATION': f"Bearer {token}"}
+
+    def test_obtain_refresh_and_revoke(self):
+        self.assertEqual(self.obtain("wrong").status_code, 400)
+        pair = self.obtain().data
+        self.assertEqual(pair['token_type'], "Bearer")
+        response = self.client.get(reverse('my-applications'), **self.bearer(pair['access']))
+        self.assertEqual(response.status_code, 200)
+
+        refreshed = self.client.post(reverse('token-refresh'), {'refresh': pair['refresh']})
+        self.assertEqual(refreshed.status_code, 200)
+        # Refresh tokens work once, and are not access tokens
+        self.assertEqual(self.client.post(reverse('token-refresh'), {'refresh': pair['refresh']}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('token-refresh'), {'refresh': pair['access']}).status_code, 400)
+
+        access = refreshed.data['access']
+        revoked = self.client.post(
+            reverse('token-revoke'), {'refresh': refreshed.data['refresh']}, **self.bearer(access),
+        )
+        self.assertEqual(revoked.status_code, 204)
+        self.assertEqual(self.client.get(reverse('my-applications'), **self.bearer(access)).status_code, 401)
+        self.assertEqual(
+            self.client.post(reverse('token-refresh'), {'refresh': refreshed.data['refresh']}).status_code, 400,
+        )
+
+    def test_revoke_rejects_a_body_that_is_not_an_object(self):
+        access = self.obtain().data['access']
+        for body in ([1, 2], '"refresh"'):
+            response = self.client.post(
+                reverse('token-revoke'), body, content_type='application/json', **self.bearer(access),
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('my-applications'), **self.bearer(access)).status_code, 200)
+
+    def test_authenticated_request_loads_only_the_user(self):
+        access = self.obtain().data['access']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('my-applications'), **self.bearer(access))
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries]
+        self.assertFalse([q for q in sql if 'django_session' in q])
+        self.assertEqual(len([q for q in sql if 'FROM "users_user"' in q]), 1)
+
+    def test_expired_tampered_and_stale_tokens_are_refused(self):
+        access = self.obtain().data['access']
+        url = reverse('my-applications')
+        response = self.client.get(url, **self.bearer(access[:-2] + "xx"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+        with override_settings(TOKEN_ACCESS_LIFETIME=-1):
+            self.assertEqual(self.client.get(url, **self.bearer(access)).status_code, 401)
+
+        self.user.set_password("another-pass")
+        self.user.save()
+        self.assertEqual(self.client.get(url, **self.bearer(access)).status_code, 401)
+
+
+@override_settings(THROTTLE_STORE='local', THROTTLE_RATES={
+    'login': {'ip': '3/min', 'user': '2/min'},
+    'apply': {'endpoint': '100/min', 'user': '1/min'},
+})
+class ThrottleTests(TestCase):
+    def setUp(self):
+        throttling.local_store.clear()
+        throttling.THROTTLED.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username="thabo", password="s3cret-pass", role="student")
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('5/min'), (5, 5 / 60))
+        self.assertEqual(throttling.parse_rate('100/15m'), (100, 100 / 900))
+        with self.assertRaises(ValueError):
+            throttling.parse_rate('5/fortnight')
+
+    def test_bucket_refills_over_time(self):
+        store = throttling.LocalBucketStore()
+        with patch('users.throttling.time.monotonic', return_value=100.0):
+            self.assertEqual([store.take('k', 2, 1.0) for _ in range(3)], [0, 0, 1.0])
+        with patch('users.throttling.time.monotonic', return_value=101.5):
+            self.assertEqual(store.take('k', 2, 1.0), 0)
+
+    def test_login_is_rejected_before_hashing_or_queries(self):
+        url = reverse('users:login')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'username': "thabo", 'password': "s3cret-pass"}).status_code, 302)
+        with patch('django.contrib.auth.hashers.PBKDF2PasswordHasher.encode') as encode, \
+                self.assertNumQueries(0):
+            response = self.client.post(url, {'username': "THABO", 'password': "guess"})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        encode.assert_not_called()
+
+        # The rejected attempt took nothing from the per-IP bucket, so one
+        # more account can log in from the address before it runs out
+        User.objects.create_user(username="lerato", password="s3cret-pass", role="student")
+        self.assertEqual(self.client.post(url, {'username': "lerato", 'password': "s3cret-pass"}).status_code, 302)
+        self.assertEqual(self.client.post(url, {'username': "sipho", 'password': "x"}).status_code, 429)
+        self.assertEqual(throttling.THROTTLED.value(scope='login', bucket='user'), 1)
+        self.assertEqual(throttling.THROTTLED.value(scope='login', bucket='ip'), 1)
+
+    def test_token_endpoint_shares_the_login_buckets(self):
+        url = reverse('token-obtain')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'username': "thabo", 'password': "s3cret-pass"}).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'username': "thabo", 'password': "s3cret-pass"})
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(THROTTLE_RATES={'login': {'endpoint': '4/min', 'ip': '2/min'}})
+    def test_rejected_client_does_not_drain_the_endpoint_bucket(self):
+        url = reverse('token-obtain')
+        attacker = {'REMOTE_ADDR': '203.0.113.9'}
+        statuses = [self.client.post(url, {'username': "thabo", 'password': "guess"}, **attacker).status_code
+                    for _ in range(10)]
+        self.assertEqual(statuses, [400, 400] + [429] * 8)
+        response = self.client.post(url, {'username': "thabo", 'password': "s3cret-pass"}, REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(throttling.THROTTLED.value(scope='login', bucket='endpoint'), 0)
+
+    def test_token_endpoint_rejects_a_body_that_is_not_an_object(self):
+        response = self.client.post(reverse('token-obtain'), [1, 2], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(THROTTLE_STORE='default')
+    def test_apply_is_limited_per_user_on_a_shared_cache(self):
+        employer = User.objects.create_user(username="acme", role="employer").employer_profile
+        jobs = [
+            Job.objects.create(employer=employer, title=f"Developer {i}", description="Code",
+                               location="Potchefstroom", type="Full Time")
+            for i in range(2)
+        ]
+        self.client.force_login(self.user)
+        url = reverse('application-create')
+        self.assertEqual(self.client.post(url, {'job': jobs[0].pk, 'cover_letter': "Hi"}).status_code, 201)
+        self.assertEqual(self.client.post(url, {'job': jobs[1].pk, 'cover_letter': "Hi"}).status_code, 429)
+        self.assertEqual(self.user.student_profile.applications.count(), 1)
+        self.assertEqual(throttling.THROTTLED.value(scope='apply', bucket='user'), 1)
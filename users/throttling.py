@@ -0,0 +1,201 @@
+"""
+Token-bucket throttles for logging in and applying to jobs.
+
+Each scope (``login``, ``apply``) has up to three buckets per request,
+configured in ``THROTTLE_RATES``:
+
+- ``endpoint``: one bucket shared by every client, a ceiling on the total
+  work the endpoint may cause;
+- ``ip``: one per client address (see DRF's ``NUM_PROXIES`` for clients
+  behind proxies);
+- ``user``: one per account, the submitted username for logins and the
+  authenticated user for applications.
+
+A bucket holds up to ``n`` tokens and refills at ``n`` per period, so a
+rate of ``5/min`` allows a burst of five and then one every twelve
+seconds. A request takes a token from each of its buckets only if every
+one of them has a token to give, checking the narrowest first, so a
+client turned away by its own bucket cannot drain the endpoint bucket
+everyone else shares. Requests are checked before passwords are hashed
+and, except for the per-user bucket of an authenticated endpoint, before
+the database is touched at all.
+
+Buckets live in this process's memory by default. With several worker
+processes set ``THROTTLE_STORE`` to a cache alias shared by all of them;
+two processes updating one bucket at the same instant can let a request
+or two more through, which is fine for throttling.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from metrics.registry import counter
+
+ENDPOINT = 'endpoint'
+IP = 'ip'
+USER = 'user'
+# Narrowest first
+BUCKETS = (USER, IP, ENDPOINT)
+
+KEY_PREFIX = 'throttle:'
+
+UNITS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60,
+         'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+THROTTLED = counter(
+    'throttled_requests', "Requests rejected by a throttle, by scope and bucket.",
+    ['scope', 'bucket'],
+)
+
+
+def parse_rate(rate):
+    """``'5/min'`` or ``'100/15m'`` as ``(capacity, tokens per second)``."""
+    count, period = rate.split('/')
+    digits = period.rstrip('abcdefghijklmnopqrstuvwxyz')
+    unit = period[len(digits):]
+    if unit not in UNITS:
+        raise ValueError(f"Unknown throttle period {period!r} in {rate!r}.")
+    seconds = (int(digits) if digits else 1) * UNITS[unit]
+    return int(count), int(count) / seconds
+
+
+def refill(state, capacity, per_second, now):
+    """Tokens in a bucket last seen as ``state`` (``(tokens, when)`` or None) at ``now``."""
+    if state is None:
+        return capacity
+    tokens, then = state
+    return min(capacity, tokens + max(0.0, now - then) * per_second)
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory. Full buckets are dropped once there are many."""
+    max_buckets = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second, consume=True):
+        """
+        Take one token. Returns 0 if there was one, else the seconds until
+        there is. With ``consume=False`` the bucket is only looked at.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+            tokens = refill(state and state[:2], capacity, per_second, now)
+            if tokens < 1:
+                return (1 - tokens) / per_second
+            if consume:
+                if len(self._buckets) >= self.max_buckets:
+                    self._prune(now)
+                tokens -= 1
+                self._buckets[key] = (tokens, now, now + (capacity - tokens) / per_second)
+            return 0.0
+
+    def _prune(self, now):
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache, shared by every process using it."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, per_second, consume=True):
+        now = time.time()
+        tokens = refill(self.cache.get(key), capacity, per_second, now)
+        if tokens < 1:
+            return (1 - tokens) / per_second
+        if consume:
+            tokens -= 1
+            # Gone from the cache is the same as full
+            self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / per_second) + 1)
+        return 0.0
+
+
+local_store = LocalBucketStore()
+
+
+def get_store():
+    alias = getattr(settings, 'THROTTLE_STORE', None)
+    if not alias or alias == 'local':
+        return local_store
+    return CacheBucketStore(alias)
+
+
+def client_ip(request):
+    return BaseThrottle().get_ident(request)
+
+
+def check(scope, request, buckets=BUCKETS, user=None, consume=True):
+    """
+    Take a token from each of ``scope``'s ``buckets`` that is configured,
+    or from none of them if any is empty. The per-user bucket is skipped
+    when ``user`` is None. Returns 0 if the request may go ahead, else the
+    seconds until it may be retried. With ``consume=False`` the buckets
+    are only looked at.
+    """
+    rates = getattr(settings, 'THROTTLE_RATES', {}).get(scope, {})
+    keys = []
+    for bucket in BUCKETS:
+        rate = rates.get(bucket)
+        if bucket not in buckets or rate is None:
+            continue
+        if bucket == ENDPOINT:
+            ident = ''
+        elif bucket == IP:
+            ident = client_ip(request)
+        elif user is None:
+            continue
+        else:
+            ident = str(user).lower()
+        keys.append((bucket, f'{KEY_PREFIX}{scope}:{bucket}:{ident}', parse_rate(rate)))
+    if not keys:
+        return 0
+    store = get_store()
+    for bucket, key, rate in keys:
+        wait = store.take(key, *rate, consume=False)
+        if wait:
+            THROTTLED.inc(scope=scope, bucket=bucket)
+            return wait
+    if consume:
+        for bucket, key, rate in keys:
+            store.take(key, *rate)
+    return 0
+
+
+class BucketThrottleMixin:
+    """
+    Throttles a DRF view by its ``throttle_scope``. The IP and endpoint
+    buckets are looked at before authentication, so a request they would
+    reject costs no query. Tokens are taken after authentication, from
+    all buckets at once, with ``throttle_user(request)`` for the user one.
+    """
+    throttle_scope = None
+
+    def initial(self, request, *args, **kwargs):
+        self.check_buckets(request, (IP, ENDPOINT), consume=False)
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        super().check_throttles(request)
+        self.check_buckets(request, BUCKETS, self.throttle_user(request))
+
+    def throttle_user(self, request):
+        return request.user.pk if request.user.is_authenticated else None
+
+    def check_buckets(self, request, buckets, user=None, consume=True):
+        wait = check(self.throttle_scope, request, buckets, user, consume)
+        if wait:
+            self.throttled(request, math.ceil(wait))
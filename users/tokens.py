@@ -0,0 +1,92 @@
+"""
+Signed, expiring API tokens.
+
+A token is a payload signed with SECRET_KEY (django.core.signing), so
+checking one needs no database lookup and no password hashing: the
+signature and its timestamp say who it was issued to and when. Access
+tokens are short-lived and sent as ``Authorization: Bearer <token>``;
+refresh tokens live longer and are exchanged for a new pair at
+``api/auth/token/refresh/``. Each refresh token works once.
+
+Every token carries a fingerprint of the user's password hash, so
+changing the password ends every token, like it ends sessions. Logging
+out revokes single tokens by id in the cache until they would have
+expired anyway. Use a shared cache (Redis, Memcached, the database) when
+running several processes, or a revoked token is only refused by the
+process that revoked it.
+"""
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+REVOKED_KEY_PREFIX = 'revoked-token:'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def lifetime(kind):
+    if kind == ACCESS:
+        return getattr(settings, 'TOKEN_ACCESS_LIFETIME', 15 * 60)
+    return getattr(settings, 'TOKEN_REFRESH_LIFETIME', 7 * 24 * 60 * 60)
+
+
+def fingerprint(user):
+    """Changes whenever the user's password does."""
+    return user.get_session_auth_hash()[:16]
+
+
+def issue(user, kind):
+    payload = {'u': user.pk, 'j': secrets.token_urlsafe(12), 'f': fingerprint(user), 'iat': int(time.time())}
+    return signing.dumps(payload, salt=_salt(kind))
+
+
+def issue_pair(user):
+    return {
+        'token_type': 'Bearer',
+        'access': issue(user, ACCESS),
+        'refresh': issue(user, REFRESH),
+        'access_expires_in': lifetime(ACCESS),
+        'refresh_expires_in': lifetime(REFRESH),
+    }
+
+
+def decode(token, kind):
+    """
+    The payload of a valid, unexpired, unrevoked ``kind`` token. Raises
+    InvalidToken otherwise.
+    """
+    try:
+        payload = signing.loads(token, salt=_salt(kind), max_age=lifetime(kind))
+    except signing.SignatureExpired:
+        raise InvalidToken("Token has expired.")
+    except signing.BadSignature:
+        raise InvalidToken("Token is invalid.")
+    if cache.get(REVOKED_KEY_PREFIX + payload['j']):
+        raise InvalidToken("Token has been revoked.")
+    return payload
+
+
+def check_user(payload, user):
+    """Raise InvalidToken unless ``user`` may still use a token carrying ``payload``."""
+    if user is None or not user.is_active or payload['f'] != fingerprint(user):
+        raise InvalidToken("Token is no longer valid.")
+
+
+def revoke(payload, kind):
+    """Refuse this token from now until it expires."""
+    remaining = int(payload['iat'] + lifetime(kind) - time.time()) + 1
+    if remaining > 0:
+        cache.set(REVOKED_KEY_PREFIX + payload['j'], True, remaining)
+
+
+def _salt(kind):
+    # Different salts keep an access token from passing as a refresh token
+    return f'users.tokens.{kind}'
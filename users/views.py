@@ -1,9 +1,13 @@
+import math
+
+from django.http import HttpResponse
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .forms import UserCreationForm, StudentForm
 from .models import Student
+from . import profiles, throttling
 
 # Registration
 def register(request):
@@ -27,13 +31,19 @@ def login_view(request):
     if request.method == "POST":
         username = request.POST.get("username")
         password = request.POST.get("password")
+        # Before authenticate(), which hashes the password
+        wait = throttling.check("login", request, user=username or None)
+        if wait:
+            response = HttpResponse("Too many login attempts. Please try again later.", status=429)
+            response["Retry-After"] = math.ceil(wait)
+            return response
         user = authenticate(request, username=username, password=password)
         if user:
             login(request, user)
             
-            if hasattr(user, 'employer_profile'):
+            if profiles.employer_profile(user) is not None:
                 return redirect("users:employer_dashboard")
-            elif hasattr(user, 'student_profile'):
+            elif profiles.student_profile(user) is not None:
                  return redirect("home") 
             
             return redirect("home")
@@ -49,21 +59,20 @@ def logout_view(request):
 # Student Profile
 @login_required
 def student_profile(request):
-    if not hasattr(request.user, "student_profile"):
+    profile = profiles.student_profile(request.user)
+    if profile is None:
         messages.error(request, "No student profile found")
         return redirect("home")
-    profile = request.user.student_profile
     return render(request, "studentprofile.html", {"profile": profile})
 
 # CV Upload
 @login_required
 def upload_cv_view(request):
-    if not hasattr(request.user, "student_profile"):
+    profile = profiles.student_profile(request.user)
+    if profile is None:
         messages.error(request, "Only students can upload CVs")
         return redirect("home")
 
-    profile = request.user.student_profile
-
     if request.method == "POST":
         form = StudentForm(request.POST, request.FILES, instance=profile) 
         if form.is_valid():
@@ -82,12 +91,11 @@ def employer_dashboard(request):
     Renders the employer dashboard page, accessible via the URL /users/employer/dashboard/.
     It checks if the user is logged in and has an employer profile.
     """
-    if not hasattr(request.user, "employer_profile"):
+    profile = profiles.employer_profile(request.user)
+    if profile is None:
         messages.error(request, "Access denied. Only registered employers can view this page.")
         return redirect("home") 
     
-    profile = request.user.employer_profile
-    
     context = {
         'profile': profile,
     }